@@ -0,0 +1,146 @@
+# Файл: apps/core/asyncviews.py
+
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework.response import Response
+
+
+async def gather(*aws):
+    """
+    asyncio.gather, который дожидается всех и поднимает первую ошибку
+    в порядке аргументов: 404 проекта важнее NotFound страницы, как в sync-пути.
+    """
+    results = await asyncio.gather(*aws, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+async def alist(queryset):
+    # async for выполняет и prefetch_related
+    return [row async for row in queryset]
+
+
+class AsyncReadMixin:
+    """
+    Асинхронные GET/HEAD для экшенов из ``async_actions`` (или методов APIView):
+    под ASGI такой запрос не занимает поток, запросы к БД идут через async ORM
+    (aget, acount, async for), независимые — одним gather.
+
+    Включается настройкой ASYNC_READ_VIEWS при сборке URLconf; без неё вью
+    остаётся синхронной. Экшен ``list`` реализуется методом ``alist`` и т.д.;
+    остальные методы и экшены уходят в обычный dispatch через sync_to_async.
+    """
+
+    async_actions = ()
+    # Выставляется через initkwargs из as_view(); у экземпляра вне ASGI — False
+    async_dispatch = False
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        if not getattr(settings, "ASYNC_READ_VIEWS", False):
+            return super().as_view(*args, **initkwargs)
+
+        view = super().as_view(*args, async_dispatch=True, **initkwargs)
+        actions = getattr(view, "actions", None)
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if cls.async_action(actions, request.method):
+                # view() создаёт экземпляр как обычно, а dispatch вернёт корутину
+                return await view(request, *args, **kwargs)
+            return await sync_view(request, *args, **kwargs)
+
+        # cls, actions, initkwargs, csrf_exempt — их читают роутер и тесты
+        return functools.update_wrapper(async_view, view)
+
+    @classmethod
+    def async_action(cls, actions, method):
+        """Имя асинхронного экшена для метода запроса или None."""
+        method = method.lower()
+        if method not in ("get", "head"):
+            return None
+        name = (actions.get(method) or actions.get("get")) if actions else "get"
+        return name if name in cls.async_actions else None
+
+    def dispatch(self, request, *args, **kwargs):
+        action = self.async_dispatch and self.async_action(
+            getattr(self, "action_map", None), request.method
+        )
+        if action:
+            return self.adispatch(request, action, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, action, *args, **kwargs):
+        # То же, что APIView.dispatch, но обработчик — корутина
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            if self.initial_is_sync_safe(request):
+                self.initial(request, *args, **kwargs)
+            else:
+                await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, f"a{action}")
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def initial_is_sync_safe(self, request):
+        """
+        Аутентификация без БД: только аноним. С токеном пользователь
+        читается из кэша или БД (CachedJWTAuthentication), и initial()
+        уходит в поток.
+        """
+        return "HTTP_AUTHORIZATION" not in request.META
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        paginate = getattr(self.paginator, "apaginate_queryset", None)
+        if paginate is None:
+            paginate = sync_to_async(self.paginator.paginate_queryset)
+        return await paginate(queryset, self.request, view=self)
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except queryset.model.DoesNotExist:
+            raise Http404(
+                f"No {queryset.model._meta.object_name} matches the given query."
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Как rest_framework.generics.get_object_or_404: 404 без текста
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(await alist(queryset), many=True)
+        return Response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
@@ -0,0 +1,94 @@
+# Файл: apps/core/conditional.py
+
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET (ETag / Last-Modified / 304) для list и retrieve.
+
+    Вью реализует ``get_validators(request)`` и возвращает ``(parts, last_modified)``
+    из лёгкого запроса вроде ``MAX(updated_at), COUNT(*)`` — или None, если
+    валидаторов нет. Тело ответа строится, только если клиентская копия устарела.
+    """
+
+    def get_validators(self, request):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return handler(request, *args, **kwargs)
+        validators = self.get_validators(request)
+        if validators is None:
+            return handler(request, *args, **kwargs)
+
+        etag, timestamp = self.conditional_tags(request, validators)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return self.patch_conditional_headers(response, etag, timestamp)
+
+    # Асинхронный путь (apps/core/asyncviews.py): те же валидаторы и заголовки
+
+    async def aget_validators(self, request):
+        return await sync_to_async(self.get_validators)(request)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.aconditional_response(request, super().alist, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.aconditional_response(
+            request, super().aretrieve, *args, **kwargs
+        )
+
+    async def aconditional_response(self, request, handler, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await handler(request, *args, **kwargs)
+        validators = await self.aget_validators(request)
+        if validators is None:
+            return await handler(request, *args, **kwargs)
+
+        etag, timestamp = self.conditional_tags(request, validators)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return self.patch_conditional_headers(response, etag, timestamp)
+
+    def conditional_tags(self, request, validators):
+        parts, last_modified = validators
+        # Представление зависит от зрителя, формата и параметров запроса
+        etag = make_etag(
+            getattr(self, "action", None) or request.method,
+            request.user.pk,
+            request.accepted_media_type,
+            sorted(request.query_params.lists()),
+            parts,
+        )
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return etag, timestamp
+
+    def patch_conditional_headers(self, response, etag, timestamp):
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_vary_headers(response, ["Authorization"])
+        return response
@@ -0,0 +1,133 @@
+# Файл: apps/core/images.py
+
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+# Формат -> (формат Pillow, расширение файла)
+FORMATS = {"webp": ("WEBP", "webp"), "jpeg": ("JPEG", "jpg")}
+
+
+class UnreadableImage(Exception):
+    """Файл не декодируется (не картинка, обрезан, бомба): повтор не поможет."""
+
+
+def derivatives_field(field_name):
+    """Имя JSON-поля модели, в котором лежит карта производных изображения."""
+    return f"{field_name}_derivatives"
+
+
+def derivative_name(name, width, fmt):
+    """
+    Детерминированный ключ рядом с оригиналом:
+    projects/<slug>/images/main/photo.png -> .../main/derivatives/photo-640w.webp
+    """
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(
+        directory, "derivatives", f"{stem}-{width}w.{FORMATS[fmt][1]}"
+    )
+
+
+def _widths():
+    return sorted(getattr(settings, "IMAGE_DERIVATIVE_WIDTHS", (320, 640, 1280)))
+
+
+def _formats():
+    formats = getattr(settings, "IMAGE_DERIVATIVE_FORMATS", ("webp", "jpeg"))
+    # Pillow может быть собран без libwebp
+    return [fmt for fmt in formats if fmt != "webp" or features.check("webp")]
+
+
+def _encode(image, fmt):
+    if fmt == "jpeg" and image.mode != "RGB":
+        # В JPEG нет прозрачности: кладём картинку на белый фон
+        background = Image.new("RGB", image.size, "white")
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    buffer = BytesIO()
+    quality = getattr(settings, "IMAGE_DERIVATIVE_QUALITY", 80)
+    image.save(buffer, FORMATS[fmt][0], quality=quality, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_derivatives(field_file):
+    """
+    Нарезает уменьшенные копии в WebP/JPEG и пишет их через storage поля
+    (локальный MEDIA_ROOT или S3). Возвращает карту
+    {"source": имя оригинала, "webp": {"320": ключ, ...}, "jpeg": {...}}.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, "rb") as source:
+        try:
+            original = ImageOps.exif_transpose(Image.open(source))
+            original.load()
+        except (OSError, Image.DecompressionBombError) as exc:
+            # UnidentifiedImageError и "image file is truncated" — тоже OSError
+            raise UnreadableImage(f"{field_file.name}: {exc}") from exc
+    if original.mode not in ("RGB", "RGBA"):
+        original = original.convert("RGBA" if "A" in original.getbands() else "RGB")
+
+    # Не увеличиваем: ширины больше оригинала заменяет сам оригинал
+    widths = [w for w in _widths() if w < original.width] or [original.width]
+    derivatives = {"source": field_file.name}
+    for fmt in _formats():
+        derivatives[fmt] = {}
+        for width in widths:
+            height = max(round(original.height * width / original.width), 1)
+            resized = original.resize((width, height), Image.Resampling.LANCZOS)
+            key = derivative_name(field_file.name, width, fmt)
+            # FileSystemStorage не перезаписывает файлы, а дописывает суффикс
+            if storage.exists(key):
+                storage.delete(key)
+            derivatives[fmt][str(width)] = storage.save(key, _encode(resized, fmt))
+    return derivatives
+
+
+def delete_derivatives(storage, derivatives, keep=()):
+    for fmt in FORMATS:
+        for key in (derivatives or {}).get(fmt, {}).values():
+            if key not in keep and storage.exists(key):
+                storage.delete(key)
+
+
+def is_stale(instance, field_name):
+    """Оригинал сменился (или удалён), а карта производных ещё старая."""
+    field_file = getattr(instance, field_name)
+    derivatives = getattr(instance, derivatives_field(field_name)) or {}
+    return (field_file.name or None) != derivatives.get("source")
+
+
+def refresh_derivatives(instance, field_name, **extra):
+    """
+    Перегенерирует производные и сохраняет карту UPDATE'ом (без сигналов save).
+    extra — дополнительные поля того же UPDATE, например updated_at.
+    Возвращает False, если обновлять было нечего.
+    """
+    if not is_stale(instance, field_name):
+        return False
+    field_file = getattr(instance, field_name)
+    previous = getattr(instance, derivatives_field(field_name)) or {}
+    derivatives = generate_derivatives(field_file) if field_file.name else {}
+    keep = {key for fmt in FORMATS for key in derivatives.get(fmt, {}).values()}
+    delete_derivatives(field_file.storage, previous, keep=keep)
+    type(instance).objects.filter(pk=instance.pk).update(
+        **{derivatives_field(field_name): derivatives}, **extra
+    )
+    setattr(instance, derivatives_field(field_name), derivatives)
+    return True
+
+
+def pick(derivatives, width, fmt="jpeg"):
+    """Ключ наименьшей копии не уже width (или самой большой из имеющихся)."""
+    variants = sorted(
+        ((int(w), key) for w, key in (derivatives or {}).get(fmt, {}).items())
+    )
+    for variant_width, key in variants:
+        if variant_width >= width:
+            return key
+    return variants[-1][1] if variants else None
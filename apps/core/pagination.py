@@ -0,0 +1,251 @@
+# Файл: apps/core/pagination.py
+
+import json
+import operator
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+from decimal import Decimal
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .asyncviews import alist, gather
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Постраничная навигация с опциональным keyset-режимом.
+
+    Без параметра ``cursor`` работает как обычный PageNumberPagination.
+    С ``?cursor=`` (пустым для первой страницы) страница выбирается условием
+    ``WHERE (ключ сортировки, id) < (значения последней строки)`` вместо
+    COUNT(*) + OFFSET, поэтому N-я страница стоит столько же, сколько первая.
+    Ключ берётся из текущей сортировки queryset'а (Meta.ordering или
+    OrderingFilter) и всегда дополняется первичным ключом для однозначности.
+    """
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        keyset_queryset = self._start_keyset(queryset, request)
+        if keyset_queryset is None:
+            return super().paginate_queryset(queryset, request, view)
+        return self._finish_keyset(list(keyset_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        То же для асинхронных вью (apps/core/asyncviews.py). В постраничном
+        режиме строки страницы и COUNT(*) друг от друга не зависят и
+        запрашиваются одним gather.
+        """
+        keyset_queryset = self._start_keyset(queryset, request)
+        if keyset_queryset is not None:
+            return self._finish_keyset([row async for row in keyset_queryset])
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        page_number = request.query_params.get(self.page_query_param) or 1
+        try:
+            bottom = (int(page_number) - 1) * page_size
+        except (TypeError, ValueError):
+            bottom = -1  # "last" или мусор: без COUNT(*) страницу не выбрать
+        if bottom >= 0:
+            count, rows = await gather(
+                queryset.acount(), alist(queryset[bottom : bottom + page_size])
+            )
+        else:
+            count, rows = await queryset.acount(), None
+
+        # Paginator.count — cached_property, подставляем уже посчитанное
+        paginator.count = count
+        if page_number in self.last_page_strings:
+            page_number = paginator.num_pages
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number, message=str(exc)
+                )
+            )
+        if rows is None:
+            bottom = (number - 1) * page_size
+            rows = await alist(queryset[bottom : bottom + page_size])
+        self.page = Page(rows, number, paginator)
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return rows
+
+    def _start_keyset(self, queryset, request):
+        """Запрос keyset-страницы (на одну строку больше) или None для page=N."""
+        self.keyset = False
+        if self.cursor_query_param not in request.query_params:
+            return None
+
+        ordering = self.get_keyset_ordering(queryset)
+        if ordering is None:
+            # Сортировка по выражению или случайная — keyset здесь неприменим
+            return None
+
+        self.keyset = True
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = ordering
+        values, reverse = self.decode_cursor(request, queryset.model)
+        self._cursor_values, self._cursor_reverse = values, reverse
+
+        if reverse:
+            ordering = [self._flip(name) for name in ordering]
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.build_keyset_filter(ordering, values))
+        return queryset[: self.page_size + 1]
+
+    def _finish_keyset(self, rows):
+        values, reverse = self._cursor_values, self._cursor_reverse
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page_rows = rows
+        # При движении назад «следующая» страница существует всегда (мы с неё пришли)
+        self.has_next = has_more if not reverse else values is not None
+        self.has_previous = has_more if reverse else values is not None
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page_rows:
+            return None
+        return self.encode_cursor(self.page_rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_rows:
+            return None
+        return self.encode_cursor(self.page_rows[0], reverse=True)
+
+    # --- Ключ сортировки ---
+
+    def get_keyset_ordering(self, queryset):
+        query = queryset.query
+        ordering = list(query.order_by)
+        if not ordering and query.default_ordering:
+            ordering = list(queryset.model._meta.ordering)
+        if not all(isinstance(name, str) and name != "?" for name in ordering):
+            return None
+        if any(name.lstrip("-") in query.annotations for name in ordering):
+            # Аннотации вроде search_rank (float4) не переживают JSON в курсоре
+            # без округления: строки на границе страниц повторялись бы или терялись
+            return None
+
+        pk_name = queryset.model._meta.pk.name
+        names = {name.lstrip("-") for name in ordering}
+        if not names & {"pk", pk_name}:
+            # Тай-брейк по id в том же направлении, что и последний ключ
+            last_desc = bool(ordering) and ordering[-1].startswith("-")
+            ordering.append(f"-{pk_name}" if last_desc else pk_name)
+        return ordering
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith("-") else f"-{name}"
+
+    @staticmethod
+    def build_keyset_filter(ordering, values):
+        """(a, b, id) > (x, y, z) для произвольной смеси направлений сортировки."""
+        branches = []
+        for index, name in enumerate(ordering):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            equal = {o.lstrip("-"): v for o, v in zip(ordering[:index], values)}
+            branches.append(Q(**equal, **{f"{field}__{lookup}": values[index]}))
+        condition = reduce(operator.or_, branches)
+        # Избыточное условие на ведущий столбец даёт планировщику диапазон по индексу
+        leading = ordering[0]
+        bound = "lte" if leading.startswith("-") else "gte"
+        return Q(**{f"{leading.lstrip('-')}__{bound}": values[0]}) & condition
+
+    # --- Кодирование курсора ---
+
+    def encode_cursor(self, row, reverse):
+        values = [self._row_value(row, name.lstrip("-")) for name in self.ordering]
+        payload = {"v": [self._to_json(value) for value in values]}
+        if reverse:
+            payload["r"] = 1
+        token = urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode()
+        ).decode()
+        url = remove_query_param(self.base_url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(token.encode()))
+            raw = payload["v"]
+            if len(raw) != len(self.ordering):
+                raise ValueError
+            values = [
+                self._from_json(model, name.lstrip("-"), value)
+                for name, value in zip(self.ordering, raw)
+            ]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, bool(payload.get("r"))
+
+    @staticmethod
+    def _row_value(row, path):
+        value = row
+        for part in path.split("__"):
+            value = getattr(value, part)
+        return value
+
+    @staticmethod
+    def _to_json(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    @staticmethod
+    def _from_json(model, path, value):
+        # Значения приводятся через to_python поля модели
+        field = None
+        opts = model._meta
+        for part in path.split("__"):
+            try:
+                field = opts.pk if part == "pk" else opts.get_field(part)
+            except FieldDoesNotExist:
+                return value
+            if field.is_relation and field.related_model is not None:
+                opts = field.related_model._meta
+        return field.to_python(value) if field is not None else value
@@ -0,0 +1,67 @@
+# Файл: apps/core/querycheck.py
+
+import json
+
+from django.db import connection as default_connection
+
+# Инструменты для регрессионных тестов запросов: какие GET-маршруты есть
+# у роутеров DRF и какие таблицы читаются последовательным сканированием.
+
+
+def router_get_routes(*routers):
+    """
+    {имя маршрута: (имена kwargs, ...)} для всех GET-маршрутов роутеров.
+    Варианты с суффиксом формата (.json) не дублируются.
+    """
+    routes = {}
+    for router in routers:
+        for pattern in router.urls:
+            kwargs = tuple(pattern.pattern.regex.groupindex)
+            if "format" in kwargs:
+                continue
+            actions = getattr(pattern.callback, "actions", None)
+            # У корня API (api-root) actions нет, но это тоже GET
+            if actions is None or "get" in actions:
+                routes[pattern.name] = kwargs
+    return routes
+
+
+def explain(sql, params=None, connection=None, seqscan=False):
+    """
+    План запроса (EXPLAIN FORMAT JSON, без выполнения). С seqscan=False
+    планировщик берёт индекс всюду, где он применим, — на маленьких тестовых
+    таблицах иначе Seq Scan выбирается всегда. Оставшийся Seq Scan значит,
+    что подходящего индекса нет.
+    """
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        if not seqscan:
+            cursor.execute("SET enable_seqscan = off")
+        try:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        finally:
+            if not seqscan:
+                cursor.execute("RESET enable_seqscan")
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def _nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child)
+
+
+def seq_scans(plan):
+    """Имена таблиц, которые план читает целиком (Seq Scan)."""
+    return {
+        node["Relation Name"]
+        for node in _nodes(plan)
+        if node["Node Type"] == "Seq Scan"
+    }
+
+
+def is_explainable(sql):
+    return sql.lstrip().upper().startswith(("SELECT", "WITH"))
@@ -0,0 +1,250 @@
+# Файл: apps/core/replicas.py
+
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from apps.metrics.registry import registry
+
+logger = logging.getLogger(__name__)
+
+# Чтение с реплик (REPLICA_DATABASES). Реплику выбирает middleware до вызова вью
+# и кладёт её алиас в ContextVar; роутер только читает его. Поэтому на реплики
+# уходят лишь GET/HEAD вью, перечисливших экшен в replica_read_actions, а команды,
+# задачи, записи и всё прочее остаются на default.
+
+read_alias = ContextVar("replica_read_alias", default=None)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+# Отставание в секундах; 0 — на primary или если реплика проиграла всё полученное
+# (на простаивающем primary pg_last_xact_replay_timestamp() стареет и без отставания)
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery()
+            OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+def replica_aliases():
+    return getattr(settings, "REPLICA_DATABASES", ())
+
+
+def reading_from_replica():
+    return read_alias.get() is not None
+
+
+class ReplicaRouter:
+    """DATABASE_ROUTERS: чтения — на реплику, выбранную для запроса, записи — на default."""
+
+    def db_for_read(self, model, **hints):
+        alias = read_alias.get()
+        # Внутри транзакции на primary читаем оттуда же: реплика её ещё не видит
+        if alias is None or connections["default"].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default: объекты с разных алиасов можно связывать
+        databases = {"default", *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему на реплики приносит репликация
+        return False if db in replica_aliases() else None
+
+
+class ReplicaHealth:
+    """
+    Доступность и отставание реплик, с кэшем на REPLICA_HEALTH_CHECK_INTERVAL
+    секунд в процессе. Упавшая или отставшая больше REPLICA_MAX_LAG_SECONDS
+    реплика пропускается до повторной проверки через REPLICA_RETRY_INTERVAL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}  # алиас -> (время проверки, здорова ли)
+
+    def healthy(self, alias):
+        """Результат свежей проверки или None, если пора проверить заново."""
+        state = self._state.get(alias)
+        if state is None:
+            return None
+        checked_at, healthy = state
+        # Недоступную реплику проверяем реже: каждая проверка ждёт таймаут
+        # подключения, и платит за него запрос, которому выпала проверка
+        interval = (
+            getattr(settings, "REPLICA_HEALTH_CHECK_INTERVAL", 5)
+            if healthy
+            else getattr(settings, "REPLICA_RETRY_INTERVAL", 30)
+        )
+        if time.monotonic() - checked_at >= interval:
+            return None
+        return healthy
+
+    def check(self, alias):
+        connection = connections[alias]
+        max_lag = getattr(settings, "REPLICA_MAX_LAG_SECONDS", 10)
+        try:
+            with connection.cursor() as cursor:
+                if connection.vendor == "postgresql":
+                    cursor.execute(LAG_SQL)
+                    lag = cursor.fetchone()[0]
+                else:
+                    cursor.execute("SELECT 1")
+                    lag = 0
+        except DatabaseError as exc:
+            healthy = False
+            logger.warning("Реплика %s недоступна: %s", alias, exc)
+            # Битое соединение не должно достаться следующему запросу
+            connection.close()
+        else:
+            healthy = lag is not None and float(lag) <= max_lag
+            if not healthy:
+                logger.warning("Реплика %s отстаёт: %s с", alias, lag)
+        with self._lock:
+            self._state[alias] = (time.monotonic(), healthy)
+        return healthy
+
+    def stale(self, aliases):
+        return [alias for alias in aliases if self.healthy(alias) is None]
+
+    def reset(self):
+        with self._lock:
+            self._state.clear()
+
+
+health = ReplicaHealth()
+
+
+def pinned_to_primary(request):
+    """Клиент недавно писал: до метки из cookie или заголовка читаем с primary."""
+    value = request.COOKIES.get(settings.REPLICA_PIN_COOKIE) or request.headers.get(
+        settings.REPLICA_PIN_HEADER
+    )
+    try:
+        return float(value) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+
+def replica_read_action(view_func, method):
+    """Экшен вью, который можно читать с реплики, или None."""
+    if method not in ("GET", "HEAD"):
+        return None
+    cls = getattr(view_func, "cls", None)
+    actions = getattr(view_func, "actions", None)
+    method = method.lower()
+    name = (actions.get(method) or actions.get("get")) if actions else "get"
+    return name if name in getattr(cls, "replica_read_actions", ()) else None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Выбирает реплику для безопасных чтений (process_view) и закрепляет клиента
+    за primary на REPLICA_STICKY_SECONDS после успешной записи: cookie и заголовок
+    с меткой времени, которые клиент возвращает, — read-your-writes без общего
+    состояния между воркерами.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Django берёт process_view с экземпляра: под ASGI без ухода в поток
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = read_alias.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_alias.reset(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = read_alias.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_alias.reset(token)
+        return self.pin(request, response)
+
+    def candidates(self, request, view_func):
+        aliases = replica_aliases()
+        if not aliases or not replica_read_action(view_func, request.method):
+            return ()
+        if pinned_to_primary(request):
+            registry.inc(
+                "db_read_routing_total", {"alias": "default", "reason": "pinned"}
+            )
+            return ()
+        return aliases
+
+    def route(self, aliases):
+        healthy = [alias for alias in aliases if health.healthy(alias)]
+        alias = random.choice(healthy) if healthy else None
+        read_alias.set(alias)
+        registry.inc(
+            "db_read_routing_total",
+            {
+                "alias": alias or "default",
+                "reason": "replica" if alias else "fallback",
+            },
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        aliases = self.candidates(request, view_func)
+        if aliases:
+            for alias in health.stale(aliases):
+                health.check(alias)
+            self.route(aliases)
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        aliases = self.candidates(request, view_func)
+        if aliases:
+            for alias in health.stale(aliases):
+                await sync_to_async(health.check)(alias)
+            self.route(aliases)
+        return None
+
+    def pin(self, request, response):
+        if (
+            not replica_aliases()
+            or request.method in SAFE_METHODS
+            or response.status_code >= 400
+        ):
+            return response
+        sticky = settings.REPLICA_STICKY_SECONDS
+        until = str(int(time.time() + sticky) + 1)
+        response.set_cookie(
+            settings.REPLICA_PIN_COOKIE,
+            until,
+            max_age=sticky,
+            secure=request.is_secure(),
+            httponly=True,
+            samesite="Lax",
+        )
+        # Для клиентов без cookie (мобильные, server-to-server): вернуть в запросе
+        response[settings.REPLICA_PIN_HEADER] = until
+        return response
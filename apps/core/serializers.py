@@ -0,0 +1,41 @@
+# Файл: apps/core/serializers.py
+
+from rest_framework import serializers
+
+from .images import FORMATS, derivatives_field
+
+
+def media_url(storage, name, request=None):
+    url = storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+class SrcsetField(serializers.Field):
+    """
+    Производные изображения в виде готовых srcset по форматам:
+    {"webp": "https://.../photo-320w.webp 320w, ...", "jpeg": "..."}.
+    Пока производные не сгенерированы, отдаёт пустой объект.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs.update(source="*", read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        field_file = getattr(instance, self.image_field)
+        derivatives = getattr(instance, derivatives_field(self.image_field)) or {}
+        if not field_file.name or derivatives.get("source") != field_file.name:
+            return {}
+        request = self.context.get("request")
+        srcset = {}
+        for fmt in FORMATS:
+            variants = sorted(
+                (int(width), key) for width, key in derivatives.get(fmt, {}).items()
+            )
+            if variants:
+                srcset[fmt] = ", ".join(
+                    f"{media_url(field_file.storage, key, request)} {width}w"
+                    for width, key in variants
+                )
+        return srcset
@@ -0,0 +1,20 @@
+# Файл: apps/jobs/admin.py
+
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        "name",
+        "queue",
+        "status",
+        "attempts",
+        "run_at",
+        "duration_ms",
+        "finished_at",
+    )
+    list_filter = ("queue", "status", "name")
+    search_fields = ("name", "last_error")
+    readonly_fields = ("locked_at", "locked_by", "duration_ms", "finished_at")
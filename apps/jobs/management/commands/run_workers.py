@@ -0,0 +1,105 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.jobs.queue import stats
+from apps.jobs.worker import run_threads
+
+
+def _process_main(threads, options):
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    # Ctrl+C получает вся группа процессов; останавливается родитель
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_threads(threads, stop_event, **options)
+
+
+class Command(BaseCommand):
+    help = "Запускает воркеры фоновых задач (SELECT ... FOR UPDATE SKIP LOCKED)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Сколько процессов запустить (для CPU-тяжёлых задач).",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Сколько потоков-воркеров в каждом процессе (для задач с I/O).",
+        )
+        parser.add_argument("--queue", default="default", help="Имя очереди.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1,
+            help="Сколько задач воркер забирает за один запрос.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Пауза в секундах, когда очередь пуста.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Разобрать готовые задачи и выйти, не дожидаясь новых.",
+        )
+
+    def handle(self, *args, **options):
+        threads = max(options["threads"], 1)
+        processes = max(options["processes"], 1)
+        worker_options = {
+            "queue": options["queue"],
+            "batch_size": max(options["batch_size"], 1),
+            "poll_interval": options["poll_interval"],
+            "burst": options["burst"],
+        }
+        if processes == 1:
+            self._run_inline(threads, worker_options)
+        else:
+            self._run_processes(processes, threads, worker_options)
+
+    def _run_inline(self, threads, worker_options):
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        try:
+            processed = run_threads(threads, stop_event, **worker_options)
+        except KeyboardInterrupt:
+            stop_event.set()
+            return
+        self.stdout.write(self.style.SUCCESS(f"Выполнено задач: {processed}"))
+        for name, item in sorted(stats.snapshot().items()):
+            count = item["done"] + item["failed"]
+            self.stdout.write(
+                f"  {name}: ok={item['done']} failed={item['failed']} "
+                f"avg={item['total_ms'] // count} мс max={item['max_ms']} мс"
+            )
+
+    def _run_processes(self, processes, threads, worker_options):
+        # Соединения с БД не должны наследоваться дочерними процессами
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        children = [
+            context.Process(
+                target=_process_main, args=(threads, worker_options), daemon=False
+            )
+            for _ in range(processes)
+        ]
+        for child in children:
+            child.start()
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
+            for child in children:
+                child.join()
+        self.stdout.write(self.style.SUCCESS("Воркеры остановлены."))
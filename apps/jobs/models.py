@@ -0,0 +1,42 @@
+# Файл: apps/jobs/models.py
+
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    name = models.CharField(max_length=100)
+    queue = models.CharField(max_length=50, default="default")
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # Не раньше этого момента: отложенный запуск и бэкофф между попытками
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ["run_at", "id"]
+        indexes = [
+            # Выборка воркера: WHERE queue = ? AND status = 'queued' AND run_at <= now
+            models.Index(
+                fields=["queue", "status", "run_at", "id"], name="job_pick_idx"
+            ),
+        ]
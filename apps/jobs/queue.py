@@ -0,0 +1,231 @@
+# Файл: apps/jobs/queue.py
+
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_handler, job_name
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class JobStats:
+    """Время выполнения задач по именам в пределах процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_name = {}
+
+    def record(self, name, duration_ms, ok):
+        with self._lock:
+            item = self._by_name.setdefault(
+                name, {"done": 0, "failed": 0, "total_ms": 0, "max_ms": 0}
+            )
+            item["done" if ok else "failed"] += 1
+            item["total_ms"] += duration_ms
+            item["max_ms"] = max(item["max_ms"], duration_ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(item) for name, item in self._by_name.items()}
+
+    def reset(self):
+        with self._lock:
+            self._by_name.clear()
+
+
+stats = JobStats()
+
+
+def enqueue(
+    name,
+    args=(),
+    kwargs=None,
+    queue="default",
+    delay=None,
+    max_attempts=None,
+    unique=False,
+):
+    """
+    Ставит задачу в очередь. Строка пишется в текущей транзакции, поэтому
+    воркер увидит её только после коммита — вместе с данными, которые ей нужны.
+
+    unique=True: если такая же задача (имя и аргументы) ещё ждёт в очереди,
+    новая не создаётся. Уже выполняющаяся не в счёт — она могла прочитать
+    данные до изменения, ради которого задачу ставят снова.
+    """
+    if unique:
+        pending = Job.objects.filter(
+            name=job_name(name),
+            queue=queue,
+            status=Job.Status.QUEUED,
+            args=list(args),
+            kwargs=kwargs or {},
+        ).first()
+        if pending is not None:
+            return pending
+    job = Job.objects.create(
+        name=job_name(name),
+        queue=queue,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=timezone.now() + (delay or timedelta()),
+        max_attempts=max_attempts or _setting("JOBS_MAX_ATTEMPTS", 5),
+    )
+    if _setting("JOBS_EAGER", False):
+        # Локальная разработка без воркера: выполняем сразу после коммита
+        transaction.on_commit(lambda: run_pending(queue=queue))
+    return job
+
+
+def claim(queue="default", limit=1, worker=""):
+    """
+    Забирает до limit готовых задач. SKIP LOCKED позволяет нескольким воркерам
+    разбирать очередь параллельно, не блокируя друг друга на одних строках.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pks = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(queue=queue, status=Job.Status.QUEUED, run_at__lte=now)
+            .order_by("run_at", "id")
+            .values_list("pk", flat=True)[:limit]
+        )
+        if not pks:
+            return []
+        # Условие по статусу страхует бэкенды без FOR UPDATE (SQLite)
+        Job.objects.filter(pk__in=pks, status=Job.Status.QUEUED).update(
+            status=Job.Status.RUNNING,
+            locked_at=now,
+            locked_by=worker,
+            attempts=F("attempts") + 1,
+        )
+    return list(
+        Job.objects.filter(
+            pk__in=pks, status=Job.Status.RUNNING, locked_by=worker, locked_at=now
+        ).order_by("run_at", "id")
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальный бэкофф: base, 2*base, 4*base ... но не больше max."""
+    base = _setting("JOBS_RETRY_BACKOFF", 10)
+    return min(base * 2 ** (attempts - 1), _setting("JOBS_RETRY_BACKOFF_MAX", 3600))
+
+
+def run_job(job):
+    started = time.perf_counter()
+    handler = None
+    try:
+        handler = get_handler(job.name)
+        handler(*job.args, **job.kwargs)
+    except Exception as exc:
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        stats.record(job.name, duration_ms, ok=False)
+        # Неизвестную задачу повторять бессмысленно, как и объявленные permanent
+        permanent = handler is None or isinstance(
+            exc, getattr(handler, "permanent_errors", ())
+        )
+        _failed(job, exc, duration_ms, permanent=permanent)
+        return False
+    duration_ms = int((time.perf_counter() - started) * 1000)
+    stats.record(job.name, duration_ms, ok=True)
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.Status.DONE,
+        finished_at=timezone.now(),
+        duration_ms=duration_ms,
+        last_error="",
+    )
+    logger.info("Задача %s #%s выполнена за %s мс", job.name, job.pk, duration_ms)
+    return True
+
+
+def _failed(job, exc, duration_ms, permanent=False):
+    error = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+    if permanent or job.attempts >= job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.Status.FAILED,
+            finished_at=timezone.now(),
+            duration_ms=duration_ms,
+            last_error=error,
+        )
+        logger.error("Задача %s #%s провалена: %s", job.name, job.pk, exc)
+        _notify_failure(job, exc)
+        return
+    delay = retry_delay(job.attempts)
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.Status.QUEUED,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        duration_ms=duration_ms,
+        last_error=error,
+        locked_at=None,
+        locked_by="",
+    )
+    logger.warning(
+        "Задача %s #%s: попытка %s не удалась, повтор через %s с",
+        job.name,
+        job.pk,
+        job.attempts,
+        delay,
+    )
+
+
+def _notify_failure(job, error):
+    try:
+        hook = getattr(get_handler(job.name), "on_failure", None)
+    except LookupError:
+        return
+    if hook is None:
+        return
+    try:
+        hook(job, error)
+    except Exception:
+        # Сбой хука не должен мешать воркеру: задача уже помечена failed
+        logger.exception("on_failure задачи %s #%s не выполнен", job.name, job.pk)
+
+
+def requeue_stale(timeout=None):
+    """
+    Возвращает в очередь задачи, чей воркер умер посреди выполнения.
+    Попытка уже засчитана при захвате, так что зацикливания не будет.
+    """
+    timeout = timeout or _setting("JOBS_LOCK_TIMEOUT", 600)
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=timeout),
+    )
+    error = "Воркер не завершил задачу за отведённое время."
+    exhausted = list(stale.filter(attempts__gte=F("max_attempts")))
+    failed = stale.filter(pk__in=[job.pk for job in exhausted]).update(
+        status=Job.Status.FAILED,
+        finished_at=timezone.now(),
+        last_error=error,
+    )
+    for job in exhausted:
+        _notify_failure(job, error)
+    requeued = stale.update(status=Job.Status.QUEUED, locked_at=None, locked_by="")
+    return requeued + failed
+
+
+def run_pending(queue="default", limit=None, worker="inline"):
+    """Синхронно выполняет готовые задачи очереди; для тестов и JOBS_EAGER."""
+    done = 0
+    while limit is None or done < limit:
+        jobs = claim(queue=queue, limit=1, worker=worker)
+        if not jobs:
+            break
+        run_job(jobs[0])
+        done += 1
+    return done
@@ -0,0 +1,41 @@
+# Файл: apps/jobs/registry.py
+
+_handlers = {}
+
+
+def register(name, permanent=(), on_failure=None):
+    """
+    Регистрирует функцию как обработчик задачи:
+
+        @register("projects.build_derivatives")
+        def build_derivatives(media_id): ...
+
+    Аргументы задачи хранятся в JSON, поэтому передавайте id, а не объекты.
+    permanent — исключения, которые повтор не исправит (битый файл и т.п.):
+    задача с ними сразу помечается failed.
+    on_failure(job, error) вызывается, когда задача помечена failed окончательно
+    (исчерпаны попытки, permanent-ошибка или брошена воркером): например,
+    чтобы перевести в "failed" объект, который ждал результата задачи.
+    """
+
+    def decorator(func):
+        if _handlers.get(name, func) is not func:
+            raise ValueError(f"Обработчик задачи {name!r} уже зарегистрирован.")
+        _handlers[name] = func
+        func.job_name = name
+        func.permanent_errors = tuple(permanent)
+        func.on_failure = on_failure
+        return func
+
+    return decorator
+
+
+def get_handler(name):
+    try:
+        return _handlers[name]
+    except KeyError:
+        raise LookupError(f"Неизвестная задача: {name!r}") from None
+
+
+def job_name(name_or_func):
+    return getattr(name_or_func, "job_name", name_or_func)
@@ -0,0 +1,155 @@
+# Файл: apps/jobs/tests.py
+
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import claim, enqueue, requeue_stale, retry_delay, run_pending, stats
+from .registry import register
+
+calls = []
+
+
+@register("tests.record")
+def record(value, suffix=""):
+    calls.append(f"{value}{suffix}")
+
+
+@register("tests.explode")
+def explode():
+    raise RuntimeError("boom")
+
+
+@register("tests.corrupt", permanent=[ValueError])
+def corrupt():
+    raise ValueError("not an image")
+
+
+def record_failure(job, error):
+    calls.append(f"failed:{error}")
+
+
+@register("tests.doomed", on_failure=record_failure)
+def doomed():
+    raise RuntimeError("gone")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        stats.reset()
+
+    def test_enqueue_and_run(self):
+        job = enqueue(record, args=["a"], kwargs={"suffix": "!"})
+        self.assertEqual(job.name, "tests.record")
+        self.assertEqual(job.status, Job.Status.QUEUED)
+
+        self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(calls, ["a!"])
+        self.assertEqual(job.status, Job.Status.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.duration_ms)
+        self.assertEqual(stats.snapshot()["tests.record"]["done"], 1)
+
+    def test_claimed_job_is_not_handed_out_twice(self):
+        enqueue("tests.record", args=["x"])
+        self.assertEqual(len(claim(worker="w1", limit=5)), 1)
+        self.assertEqual(claim(worker="w2", limit=5), [])
+
+    def test_delayed_and_other_queue_jobs_wait(self):
+        enqueue("tests.record", args=["later"], delay=timedelta(minutes=5))
+        enqueue("tests.record", args=["mail"], queue="mail")
+        self.assertEqual(run_pending(), 0)
+        self.assertEqual(run_pending(queue="mail"), 1)
+        self.assertEqual(calls, ["mail"])
+
+    @override_settings(JOBS_RETRY_BACKOFF=10, JOBS_RETRY_BACKOFF_MAX=25)
+    def test_retry_with_backoff_then_fail(self):
+        self.assertEqual([retry_delay(n) for n in (1, 2, 3)], [10, 20, 25])
+
+        job = enqueue(explode, max_attempts=2)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertIn("boom", job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(stats.snapshot()["tests.explode"]["failed"], 2)
+
+    def test_unknown_job_fails_without_retry(self):
+        job = enqueue("tests.missing")
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 1)
+
+    def test_permanent_error_fails_without_retry(self):
+        job = enqueue(corrupt)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("not an image", job.last_error)
+
+    def test_on_failure_runs_once_attempts_are_exhausted(self):
+        job = enqueue(doomed, max_attempts=2)
+        run_pending()
+        self.assertEqual(calls, [])
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run_pending()
+        self.assertEqual(calls, ["failed:gone"])
+
+        # Брошенная воркером задача без попыток в запасе — тоже окончательный провал
+        stale = enqueue(doomed, max_attempts=1)
+        claim(worker="dead")
+        Job.objects.filter(pk=stale.pk).update(
+            locked_at=timezone.now() - timedelta(hours=1)
+        )
+        requeue_stale(timeout=60)
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(calls[1].startswith("failed:"))
+
+    def test_unique_reuses_queued_job(self):
+        first = enqueue(record, args=["a"], unique=True)
+        self.assertEqual(enqueue(record, args=["a"], unique=True), first)
+        self.assertNotEqual(enqueue(record, args=["b"], unique=True), first)
+        # Выполняющаяся задача могла прочитать старые данные — ставим новую
+        claim(worker="w1", limit=5)
+        self.assertNotEqual(enqueue(record, args=["a"], unique=True), first)
+        self.assertEqual(Job.objects.count(), 3)
+
+    def test_stale_running_job_is_requeued(self):
+        job = enqueue("tests.record", args=["again"])
+        claim(worker="dead")
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(requeue_stale(timeout=60), 1)
+        run_pending()
+        self.assertEqual(calls, ["again"])
+
+
+class RunWorkersCommandTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_burst_drains_queue_with_threads(self):
+        for value in range(6):
+            enqueue("tests.record", args=[value])
+        out = StringIO()
+        call_command(
+            "run_workers", "--threads=3", "--batch-size=2", "--burst", stdout=out
+        )
+        self.assertIn("Выполнено задач: 6", out.getvalue())
+        self.assertEqual(sorted(calls), [str(v) for v in range(6)])
+        self.assertFalse(Job.objects.exclude(status=Job.Status.DONE).exists())
@@ -0,0 +1,72 @@
+# Файл: apps/jobs/worker.py
+
+import os
+import socket
+import threading
+
+from django.db import close_old_connections, connection
+
+from .queue import claim, requeue_stale, run_job
+
+
+class Worker:
+    """Цикл одного потока: забрать пачку задач, выполнить, подождать, повторить."""
+
+    # Как часто (в итерациях) подбирать задачи умерших воркеров
+    stale_check_every = 50
+
+    def __init__(self, queue="default", batch_size=1, poll_interval=1.0, burst=False):
+        self.queue = queue
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.name = (
+            f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        )
+        self.processed = 0
+
+    def run_once(self):
+        close_old_connections()
+        jobs = claim(queue=self.queue, limit=self.batch_size, worker=self.name)
+        for job in jobs:
+            run_job(job)
+        self.processed += len(jobs)
+        return len(jobs)
+
+    def run(self, stop_event):
+        iteration = 0
+        try:
+            while not stop_event.is_set():
+                if iteration % self.stale_check_every == 0:
+                    requeue_stale()
+                iteration += 1
+                if self.run_once():
+                    continue
+                if self.burst:
+                    break
+                stop_event.wait(self.poll_interval)
+        finally:
+            connection.close()
+        return self.processed
+
+
+def run_threads(threads, stop_event, **options):
+    """Запускает threads воркеров в текущем процессе и ждёт их завершения."""
+    workers = []
+
+    def target():
+        worker = Worker(**options)
+        workers.append(worker)
+        worker.run(stop_event)
+
+    pool = [
+        threading.Thread(target=target, name=f"jobs-{i}", daemon=True)
+        for i in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        # join с таймаутом, чтобы главный поток успевал обрабатывать сигналы
+        while thread.is_alive():
+            thread.join(0.5)
+    return sum(worker.processed for worker in workers)
@@ -0,0 +1,46 @@
+import time
+
+from django.apps import AppConfig
+
+
+def _instrument_serializers():
+    """
+    Время построения ответа сериализатором: оборачиваем BaseSerializer.data,
+    через него проходят и Serializer, и ListSerializer. Вложенные вызовы
+    .data (SerializerMethodField и т.п.) не считаются дважды.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    from .middleware import current_request
+
+    original = BaseSerializer.data
+    if getattr(original.fget, "_metrics_wrapped", False):
+        return
+
+    def data(self):
+        stats = current_request.get()
+        if stats is None or stats.serializer_depth:
+            return original.fget(self)
+        stats.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            stats.serializer_depth -= 1
+            stats.serializer_seconds += time.perf_counter() - start
+
+    data._metrics_wrapped = True
+    BaseSerializer.data = property(data)
+
+
+class MetricsConfig(AppConfig):
+    name = "apps.metrics"
+    label = "metrics"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .middleware import instrument
+
+        _instrument_serializers()
+        connection_created.connect(instrument, dispatch_uid="metrics_instrument")
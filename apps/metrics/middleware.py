@@ -0,0 +1,158 @@
+# Файл: apps/metrics/middleware.py
+
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .pools import sample_pools
+from .registry import registry
+
+logger = logging.getLogger(__name__)
+
+# Счётчики текущего запроса; serializer .data (см. apps.py) добавляет сюда своё время
+current_request = ContextVar("metrics_current_request", default=None)
+
+
+class RequestStats:
+    __slots__ = ("queries", "query_seconds", "serializer_seconds", "serializer_depth")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+
+
+def observe_query(execute, sql, params, many, context):
+    """
+    execute_wrapper, который стоит на соединениях постоянно (instrument()).
+    Соединения привязаны к потоку, а при async-вью ORM работает в потоке
+    sync_to_async — поэтому запрос ищется через ContextVar, а не оборачивается
+    в middleware.
+    """
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - start
+
+
+def instrument(connection, **kwargs):
+    # Обработчик connection_created (см. apps.py); при переподключении не дублируется
+    if observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_query)
+
+
+# Скрейп /metrics в метрики API не попадает
+SKIP_ROUTES = {"metrics"}
+
+
+# Метод — метка серии: произвольные токены от клиента сводим в одну "other"
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+def _method(request):
+    return request.method if request.method in KNOWN_METHODS else "other"
+
+
+def _route(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    # Имя маршрута, а не путь: у /projects/<slug>/ одна серия, а не по серии на слаг
+    return match.view_name or match.route or "unnamed"
+
+
+class MetricsMiddleware:
+    """
+    Латентность, число и время SQL-запросов, время сериализации, размер ответа
+    и попадания в кэш ответов — по маршрутам. Ставится первым в MIDDLEWARE.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Под ASGI с асинхронными вью цепочка не должна уходить в поток из-за нас
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, "METRICS_ENABLED", True):
+            return self.get_response(request)
+
+        stats = RequestStats()
+        start = time.perf_counter()
+        token = current_request.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, "METRICS_ENABLED", True):
+            return await self.get_response(request)
+
+        stats = RequestStats()
+        start = time.perf_counter()
+        token = current_request.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, stats, elapsed):
+        route = _route(request)
+        if route in SKIP_ROUTES:
+            return
+        labels = {"route": route, "method": _method(request)}
+        registry.inc(
+            "http_requests_total", {**labels, "status": str(response.status_code)}
+        )
+        registry.observe("http_request_duration_seconds", labels, elapsed)
+        registry.observe("http_request_db_queries", labels, stats.queries)
+        if stats.query_seconds:
+            registry.inc("db_query_duration_seconds_total", labels, stats.query_seconds)
+        if stats.serializer_seconds:
+            registry.inc(
+                "serializer_duration_seconds_total", labels, stats.serializer_seconds
+            )
+        if not response.streaming:
+            registry.observe(
+                "http_response_size_bytes", {"route": route}, len(response.content)
+            )
+        cache_result = response.get("X-Cache")
+        if cache_result:
+            registry.inc(
+                "response_cache_requests_total",
+                {"route": route, "result": cache_result.lower()},
+            )
+        sample_pools()
+        registry.flush()
+
+        slow = getattr(settings, "METRICS_SLOW_REQUEST_SECONDS", None)
+        if slow and elapsed >= slow:
+            logger.warning(
+                "Медленный запрос %s %s (%s): %.3f с, SQL: %d за %.3f с",
+                request.method,
+                request.path,
+                route,
+                elapsed,
+                stats.queries,
+                stats.query_seconds,
+            )
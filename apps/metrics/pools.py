@@ -0,0 +1,45 @@
+# Файл: apps/metrics/pools.py
+
+from django.db import connections
+
+from .registry import registry
+
+# psycopg_pool.ConnectionPool.pop_stats(): мгновенные значения — в gauge,
+# накопленные с прошлого вызова — приращением счётчиков. Насыщение пула видно
+# по db_pool_requests_waiting > 0 и росту db_pool_requests_queued_total.
+
+GAUGES = {
+    "pool_size": "db_pool_size",
+    "pool_available": "db_pool_available",
+    "pool_max": "db_pool_max_size",
+    "requests_waiting": "db_pool_requests_waiting",
+}
+COUNTERS = {
+    "requests_num": ("db_pool_requests_total", 1),
+    "requests_queued": ("db_pool_requests_queued_total", 1),
+    "requests_wait_ms": ("db_pool_wait_seconds_total", 0.001),
+    "requests_errors": ("db_pool_errors_total", 1),
+}
+
+
+def sample_pools():
+    """
+    Переносит статистику пулов в реестр метрик процесса. Смотрим только
+    алиасы с открытым соединением: обращение к .pool создаёт и открывает пул
+    (min_size соединений) даже для реплики, которой запрос не пользовался.
+    Накопленное pop_stats() не теряется, его заберёт следующий вызов.
+    """
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is None:
+            continue
+        # Без OPTIONS["pool"] (и не на PostgreSQL) пула нет
+        pool = getattr(connection, "pool", None)
+        if pool is None:
+            continue
+        stats = pool.pop_stats()
+        labels = {"alias": connection.alias}
+        for key, name in GAUGES.items():
+            registry.set(name, labels, stats.get(key, 0))
+        for key, (name, scale) in COUNTERS.items():
+            if stats.get(key):
+                registry.inc(name, labels, stats[key] * scale)
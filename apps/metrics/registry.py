@@ -0,0 +1,301 @@
+# Файл: apps/metrics/registry.py
+
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Метрики процесса: счётчики и гистограммы с метками. Под gunicorn у каждого
+# воркера свой реестр; он периодически сбрасывается в файл
+# <METRICS_MULTIPROC_DIR>/metrics-<pid>.json, а /metrics складывает все файлы.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# имя -> (тип, описание, границы корзин для гистограмм)
+METRICS = {
+    "http_requests_total": ("counter", "HTTP requests by route and status.", None),
+    "http_request_duration_seconds": (
+        "histogram",
+        "Request latency, seconds.",
+        LATENCY_BUCKETS,
+    ),
+    "http_response_size_bytes": ("histogram", "Response body size.", SIZE_BUCKETS),
+    "http_request_db_queries": (
+        "histogram",
+        "Database queries per request.",
+        QUERY_BUCKETS,
+    ),
+    "db_query_duration_seconds_total": (
+        "counter",
+        "Time spent in database queries.",
+        None,
+    ),
+    "serializer_duration_seconds_total": (
+        "counter",
+        "Time spent building serializer .data.",
+        None,
+    ),
+    "response_cache_requests_total": (
+        "counter",
+        "Response cache lookups by result (X-Cache).",
+        None,
+    ),
+    # Пул соединений psycopg (apps/metrics/pools.py), по алиасам БД
+    "db_pool_size": ("gauge", "Open pool connections, busy and idle.", None),
+    "db_pool_available": ("gauge", "Idle pool connections.", None),
+    "db_pool_max_size": ("gauge", "Pool max_size.", None),
+    "db_pool_requests_waiting": (
+        "gauge",
+        "Requests waiting for a pool connection.",
+        None,
+    ),
+    "db_pool_requests_total": (
+        "counter",
+        "Connections handed out by the pool.",
+        None,
+    ),
+    "db_pool_requests_queued_total": (
+        "counter",
+        "Pool requests that had to wait for a connection.",
+        None,
+    ),
+    "db_pool_wait_seconds_total": (
+        "counter",
+        "Time spent waiting for a pool connection.",
+        None,
+    ),
+    "db_pool_errors_total": (
+        "counter",
+        "Pool requests that failed (timeout waiting for a connection).",
+        None,
+    ),
+    # Куда ушли чтения (apps/core/replicas.py): replica, pinned, fallback
+    "db_read_routing_total": (
+        "counter",
+        "Replica-eligible reads by database alias and reason.",
+        None,
+    ),
+}
+
+ARCHIVE_FILE = "metrics-archive.json"
+LOCK_FILE = "metrics.lock"
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._values = {}
+        self._flushed_at = 0.0
+
+    def _check_fork(self):
+        # После fork() дочерний процесс не должен отчитываться данными родителя
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._values = {}
+            self._flushed_at = 0.0
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_fork()
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, name, labels, value):
+        """Текущее значение gauge; между процессами складывается, как и счётчики."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_fork()
+            self._values[key] = value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_fork()
+            # [счётчики корзин..., +Inf, сумма]; в файле и в выдаче — накопительно
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(buckets) + 2)
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            else:
+                series[len(buckets)] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            self._check_fork()
+            return [
+                [
+                    name,
+                    [list(pair) for pair in labels],
+                    list(value) if isinstance(value, list) else value,
+                ]
+                for (name, labels), value in self._values.items()
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+    # --- Несколько процессов ---
+
+    def flush(self, force=False):
+        """Пишет снимок в файл процесса не чаще METRICS_FLUSH_INTERVAL."""
+        directory = multiproc_dir()
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed_at < _flush_interval():
+            return
+        self._flushed_at = now
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            _write_json(path, self.snapshot())
+        except OSError as exc:
+            # Сбой записи метрик не должен ронять запрос, в котором случился
+            logger.warning("Не удалось сбросить метрики в %s: %s", directory, exc)
+
+
+registry = Registry()
+
+
+def multiproc_dir():
+    return getattr(settings, "METRICS_MULTIPROC_DIR", None)
+
+
+def _flush_interval():
+    return getattr(settings, "METRICS_FLUSH_INTERVAL", 5)
+
+
+def _write_json(path, data):
+    # Запись через временный файл и rename: читатель не увидит половину файла
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return []
+
+
+@contextmanager
+def _dir_lock(directory, exclusive):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_FILE), "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _merge(into, rows, gauges=True):
+    for name, labels, value in rows:
+        key = (name, tuple(tuple(pair) for pair in labels))
+        if name not in METRICS:
+            continue
+        if not gauges and METRICS[name][0] == "gauge":
+            continue
+        if isinstance(value, list):
+            current = into.setdefault(key, [0] * len(value))
+            into[key] = [a + b for a, b in zip(current, value)]
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def collect():
+    """Сумма по всем процессам (или только текущий без METRICS_MULTIPROC_DIR)."""
+    directory = multiproc_dir()
+    merged = {}
+    if not directory:
+        _merge(merged, registry.snapshot())
+        return merged
+    registry.flush(force=True)
+    with _dir_lock(directory, exclusive=False):
+        for path in sorted(glob.glob(os.path.join(directory, "metrics-*.json"))):
+            _merge(merged, _read_json(path))
+    return merged
+
+
+def mark_process_dead(pid, directory=None):
+    """
+    Переносит данные завершившегося воркера в общий архив (gunicorn child_exit):
+    счётчики остаются монотонными, а файлы мёртвых pid не копятся.
+    """
+    directory = directory or multiproc_dir()
+    if not directory:
+        return
+    path = os.path.join(directory, f"metrics-{pid}.json")
+    if not os.path.exists(path):
+        return
+    with _dir_lock(directory, exclusive=True):
+        archive_path = os.path.join(directory, ARCHIVE_FILE)
+        merged = {}
+        _merge(merged, _read_json(archive_path))
+        # Gauge мёртвого процесса (его пул и т.п.) больше ничего не значит
+        _merge(merged, _read_json(path), gauges=False)
+        rows = [[name, list(labels), value] for (name, labels), value in merged.items()]
+        _write_json(archive_path, rows)
+        os.remove(path)
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(merged=None):
+    """Prometheus text exposition format 0.0.4."""
+    merged = collect() if merged is None else merged
+    by_name = {}
+    for (name, labels), value in sorted(merged.items()):
+        by_name.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in by_name.get(name, ()):
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, "+Inf"), value[:-1]):
+                cumulative += count
+                le = (("le", bound if bound == "+Inf" else _format_number(bound)),)
+                lines.append(f"{name}_bucket{_format_labels(labels, le)} {cumulative}")
+            lines.append(
+                f"{name}_sum{_format_labels(labels)} {_format_number(value[-1])}"
+            )
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
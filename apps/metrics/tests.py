@@ -0,0 +1,302 @@
+# Файл: apps/metrics/tests.py
+
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.projects.models import Project
+from apps.users.models import CustomUser
+
+from .pools import sample_pools
+from .registry import collect, mark_process_dead, registry, render
+
+
+class MetricsMiddlewareTests(APITestCase):
+    def setUp(self):
+        registry.reset()
+        cache.clear()
+        owner = CustomUser.objects.create_user(
+            username="owner", email="owner@example.com", password="password123"
+        )
+        Project.objects.create(owner=owner, title="Метрики", description="...")
+
+    def series(self, name, **labels):
+        wanted = tuple(sorted(labels.items()))
+        return collect().get((name, wanted))
+
+    def test_request_recorded_by_route(self):
+        response = self.client.get(reverse("project-list"))
+        self.assertEqual(response.status_code, 200)
+
+        labels = {"route": "project-list", "method": "GET"}
+        self.assertEqual(self.series("http_requests_total", status="200", **labels), 1)
+        duration = self.series("http_request_duration_seconds", **labels)
+        self.assertEqual(sum(duration[:-1]), 1)
+        queries = self.series("http_request_db_queries", **labels)
+        self.assertGreater(queries[-1], 0)  # сумма = число запросов к БД
+        self.assertGreater(self.series("db_query_duration_seconds_total", **labels), 0)
+        self.assertGreater(
+            self.series("serializer_duration_seconds_total", **labels), 0
+        )
+        size = self.series("http_response_size_bytes", route="project-list")
+        self.assertEqual(size[-1], len(response.content))
+
+    def test_response_cache_results_counted(self):
+        url = reverse("project-list")
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(
+            self.series(
+                "response_cache_requests_total", route="project-list", result="miss"
+            ),
+            1,
+        )
+        self.assertEqual(
+            self.series(
+                "response_cache_requests_total", route="project-list", result="hit"
+            ),
+            1,
+        )
+
+    async def test_async_chain_recorded(self):
+        # Под ASGI middleware работает в event loop, а ORM — в потоке sync_to_async:
+        # запросы и сериализация всё равно попадают в счётчики своего запроса
+        response = await self.async_client.get(reverse("project-list"))
+        self.assertEqual(response.status_code, 200)
+
+        labels = {"route": "project-list", "method": "GET"}
+        self.assertEqual(self.series("http_requests_total", status="200", **labels), 1)
+        self.assertGreater(self.series("http_request_db_queries", **labels)[-1], 0)
+        self.assertGreater(
+            self.series("serializer_duration_seconds_total", **labels), 0
+        )
+
+    def test_scrape_not_recorded(self):
+        self.client.get(reverse("metrics"))
+        routes = {dict(labels).get("route") for _, labels in collect()}
+        self.assertNotIn("metrics", routes)
+
+    def test_unmatched_route_has_single_series(self):
+        self.client.get("/no-such-page/1/")
+        self.client.get("/no-such-page/2/")
+        self.assertEqual(
+            self.series(
+                "http_requests_total", route="unmatched", method="GET", status="404"
+            ),
+            2,
+        )
+
+    def test_unknown_methods_share_one_series(self):
+        for method in ("FOO", "BAR"):
+            self.client.generic(method, "/no-such-page/")
+        self.assertEqual(
+            self.series(
+                "http_requests_total", route="unmatched", method="other", status="404"
+            ),
+            2,
+        )
+        methods = {dict(labels).get("method") for _, labels in collect()}
+        self.assertFalse(methods & {"FOO", "BAR"})
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.client.get(reverse("project-list"))
+        self.assertEqual(collect(), {})
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        registry.reset()
+
+    def test_prometheus_text_format(self):
+        registry.inc("http_requests_total", {"route": "a", "method": "GET"})
+        registry.observe("http_request_db_queries", {"route": "a", "method": "GET"}, 4)
+        registry.observe(
+            "http_request_db_queries", {"route": "a", "method": "GET"}, 500
+        )
+        text = render()
+        self.assertIn("# TYPE http_request_db_queries histogram", text)
+        self.assertIn('http_requests_total{method="GET",route="a"} 1', text)
+        # Корзины накопительные, +Inf равна _count
+        self.assertIn(
+            'http_request_db_queries_bucket{method="GET",route="a",le="3"} 0', text
+        )
+        self.assertIn(
+            'http_request_db_queries_bucket{method="GET",route="a",le="5"} 1', text
+        )
+        self.assertIn(
+            'http_request_db_queries_bucket{method="GET",route="a",le="+Inf"} 2', text
+        )
+        self.assertIn('http_request_db_queries_count{method="GET",route="a"} 2', text)
+        self.assertIn('http_request_db_queries_sum{method="GET",route="a"} 504', text)
+
+    def test_label_values_escaped(self):
+        registry.inc("http_requests_total", {"route": 'a"b\\c'})
+        self.assertIn('route="a\\"b\\\\c"', render())
+
+    def test_endpoint(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response["Content-Type"].startswith("text/plain; version=0.0.4")
+        )
+        self.assertIn(b"# TYPE http_requests_total counter", response.content)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token_required(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 401)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DEBUG=False, METRICS_ALLOWED_IPS=["10.0.0.5"])
+    def test_without_token_only_allowed_ips(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        response = self.client.get(url, REMOTE_ADDR="10.0.0.5")
+        self.assertEqual(response.status_code, 200)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class MultiprocessTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = self.tmp.name
+
+    def write_worker(self, pid, count):
+        rows = [["http_requests_total", [["route", "a"]], count]]
+        with open(os.path.join(self.dir, f"metrics-{pid}.json"), "w") as fh:
+            json.dump(rows, fh)
+
+    def test_workers_summed_and_dead_archived(self):
+        with override_settings(METRICS_MULTIPROC_DIR=self.dir):
+            registry.inc("http_requests_total", {"route": "a"})
+            self.write_worker(111, 2)
+            self.write_worker(222, 4)
+            key = ("http_requests_total", (("route", "a"),))
+            self.assertEqual(collect()[key], 7)
+
+            mark_process_dead(111)
+            mark_process_dead(222)
+            self.assertFalse(os.path.exists(os.path.join(self.dir, "metrics-111.json")))
+            # Счётчик не уменьшился после ухода воркеров
+            self.assertEqual(collect()[key], 7)
+
+    def test_dead_process_gauges_dropped(self):
+        with override_settings(METRICS_MULTIPROC_DIR=self.dir):
+            rows = [
+                ["db_pool_size", [["alias", "default"]], 5],
+                ["db_pool_requests_total", [["alias", "default"]], 9],
+            ]
+            with open(os.path.join(self.dir, "metrics-111.json"), "w") as fh:
+                json.dump(rows, fh)
+            mark_process_dead(111)
+            merged = collect()
+            # Пул умер вместе с воркером, а выданные им соединения остались в счётчике
+            self.assertNotIn(("db_pool_size", (("alias", "default"),)), merged)
+            self.assertEqual(
+                merged[("db_pool_requests_total", (("alias", "default"),))], 9
+            )
+
+    def test_flush_throttled(self):
+        with override_settings(
+            METRICS_MULTIPROC_DIR=self.dir, METRICS_FLUSH_INTERVAL=60
+        ):
+            path = os.path.join(self.dir, f"metrics-{os.getpid()}.json")
+            registry.inc("http_requests_total", {"route": "a"})
+            registry.flush(force=True)
+            registry.inc("http_requests_total", {"route": "a"})
+            registry.flush()
+            with open(path) as fh:
+                self.assertEqual(json.load(fh)[0][2], 1)
+
+    def test_flush_creates_dir_and_survives_write_errors(self):
+        directory = os.path.join(self.dir, "missing")
+        with override_settings(METRICS_MULTIPROC_DIR=directory):
+            registry.flush(force=True)
+        self.assertTrue(
+            os.path.exists(os.path.join(directory, f"metrics-{os.getpid()}.json"))
+        )
+
+        # Каталог не создать (на его месте файл): предупреждение в лог, без исключения
+        blocked = os.path.join(self.dir, "file")
+        open(blocked, "w").close()
+        with override_settings(METRICS_MULTIPROC_DIR=os.path.join(blocked, "metrics")):
+            with self.assertLogs("apps.metrics.registry", "WARNING"):
+                registry.flush(force=True)
+
+
+class PoolMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+
+    def sample(self, stats):
+        pool = mock.Mock()
+        pool.pop_stats.return_value = stats
+        wrapper = type(connections["default"])
+        with mock.patch.object(
+            wrapper, "pool", new_callable=mock.PropertyMock, return_value=pool
+        ):
+            sample_pools()
+
+    def test_gauges_replaced_and_counters_accumulated(self):
+        stats = {
+            "pool_size": 10,
+            "pool_available": 0,
+            "pool_max": 10,
+            "requests_waiting": 3,
+            "requests_num": 40,
+            "requests_queued": 5,
+            "requests_wait_ms": 1500,
+        }
+        self.sample(stats)
+        # pop_stats() обнуляет накопленное: во второй раз приходит только приращение
+        self.sample({**stats, "requests_waiting": 0, "requests_num": 2})
+
+        merged = collect()
+        labels = (("alias", "default"),)
+        self.assertEqual(merged[("db_pool_requests_waiting", labels)], 0)
+        self.assertEqual(merged[("db_pool_max_size", labels)], 10)
+        self.assertEqual(merged[("db_pool_requests_total", labels)], 42)
+        self.assertEqual(merged[("db_pool_requests_queued_total", labels)], 10)
+        self.assertEqual(merged[("db_pool_wait_seconds_total", labels)], 3.0)
+        self.assertNotIn(("db_pool_errors_total", labels), merged)
+        self.assertIn('db_pool_size{alias="default"} 10', render(merged))
+        self.assertIn("# TYPE db_pool_size gauge", render(merged))
+
+    def test_unused_alias_does_not_open_pool(self):
+        class Unused:
+            alias = "replica"
+            connection = None
+
+            @property
+            def pool(self):
+                raise AssertionError("pool opened for an unused alias")
+
+        used = mock.Mock(alias="default", connection=object())
+        used.pool.pop_stats.return_value = {"pool_size": 2}
+        with mock.patch.object(connections, "all", return_value=[Unused(), used]):
+            sample_pools()
+        merged = collect()
+        self.assertEqual(merged[("db_pool_size", (("alias", "default"),))], 2)
+        self.assertNotIn(("db_pool_size", (("alias", "replica"),)), merged)
+
+    def test_no_pool(self):
+        wrapper = type(connections["default"])
+        with mock.patch.object(
+            wrapper, "pool", new_callable=mock.PropertyMock, return_value=None
+        ):
+            sample_pools()
+        self.assertEqual(collect(), {})
@@ -0,0 +1,30 @@
+# Файл: apps/metrics/views.py
+
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from .pools import sample_pools
+from .registry import render
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metrics_view(request):
+    """
+    Метрики в формате Prometheus. Обычная Django-вью, не DRF: скрейп не должен
+    проходить аутентификацию JWT. MetricsMiddleware его не записывает.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if token:
+        header = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+            return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    elif not settings.DEBUG and request.META.get("REMOTE_ADDR") not in getattr(
+        settings, "METRICS_ALLOWED_IPS", ()
+    ):
+        # Маршруты и их нагрузка — не для всех: без токена только с разрешённых адресов
+        return HttpResponse(status=403)
+    sample_pools()
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
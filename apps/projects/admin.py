@@ -1,7 +1,7 @@
 # Файл: apps/projects/admin.py
 
 from django.contrib import admin
-from .models import Project, Technology, Comment, Like, ProjectMedia
+from .models import Project, Technology, Comment, Like, ProjectMedia, UploadSession
 
 
 @admin.register(Technology)
@@ -13,7 +13,15 @@ class TechnologyAdmin(admin.ModelAdmin):
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
     # ... (код без изменений)
-    list_display = ("title", "owner", "created_at", "slug")
+    list_display = (
+        "title",
+        "owner",
+        "created_at",
+        "slug",
+        "likes_count",
+        "comments_count",
+    )
+    readonly_fields = ("likes_count", "comments_count")
     list_filter = ("owner", "technologies", "tags", "created_at")
     search_fields = ("title", "description", "owner__username")
     prepopulated_fields = {"slug": ("title",)}
@@ -26,6 +34,13 @@ class ProjectMediaAdmin(admin.ModelAdmin):
     list_filter = ("project", "file_type")
 
 
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("filename", "project", "owner", "status", "received", "size", "expires_at")
+    list_filter = ("file_type", "status")
+    readonly_fields = ("received", "status", "media", "error")
+
+
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("project", "author", "text_summary", "created_at")
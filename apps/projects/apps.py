@@ -5,3 +5,6 @@ class ProjectsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.projects"  # <--- ИЗМЕНИТЬ ЗДЕСЬ
     label = "projects"  # <--- Явно указать label для Django
+
+    def ready(self):
+        from . import signals  # noqa: F401  регистрирует обработчики сигналов
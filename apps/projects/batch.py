@@ -0,0 +1,182 @@
+# Файл: apps/projects/batch.py
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from taggit.models import Tag, TaggedItem
+
+from . import cache, search
+from .models import Project, Technology
+from .serializers import ProjectBatchItemSerializer
+from .slugs import bulk_create_with_unique_slugs
+
+# Пакетное создание/обновление проектов (POST /api/projects/batch/).
+# Элемент со slug обновляет проект владельца, без slug — создаёт новый.
+# Число запросов не зависит от размера пачки: технологии, теги, проекты
+# и строки M2M читаются и пишутся пачками, всё в одной транзакции.
+
+FIELDS = ("title", "description", "project_url", "repository_url")
+
+
+def max_batch_size():
+    return getattr(settings, "PROJECT_BATCH_MAX_SIZE", 500)
+
+
+def _tag_key(name):
+    if getattr(settings, "TAGGIT_CASE_INSENSITIVE", False):
+        return name.lower()
+    return name
+
+
+def _load_tags(keys):
+    tags = Tag.objects.order_by("pk")
+    if getattr(settings, "TAGGIT_CASE_INSENSITIVE", False):
+        tags = tags.annotate(key=Lower("name")).filter(key__in=keys)
+    else:
+        tags = tags.filter(name__in=keys)
+    found = {}
+    for tag in tags:
+        found.setdefault(_tag_key(tag.name), tag)
+    return found
+
+
+def resolve_tags(names):
+    """
+    Теги по именам: один SELECT, недостающие — одним bulk_create.
+    Возвращает {ключ имени: Tag} с учётом TAGGIT_CASE_INSENSITIVE.
+    """
+    wanted = {}
+    for name in names:
+        wanted.setdefault(_tag_key(name), name)
+    if not wanted:
+        return {}
+    tags = _load_tags(wanted)
+    missing = [name for key, name in wanted.items() if key not in tags]
+    if missing:
+        # ignore_conflicts: тот же тег мог создать параллельный запрос
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=Tag().slugify(name)) for name in missing],
+            ignore_conflicts=True,
+        )
+        tags = _load_tags(wanted)
+        for name in missing:
+            if _tag_key(name) not in tags:
+                # Слаг занят тегом с другим именем — суффикс подберёт сам taggit
+                tags[_tag_key(name)] = Tag.objects.create(name=name)
+    return tags
+
+
+def validate(owner, items):
+    """
+    Проверяет пачку целиком. Возвращает (validated, existing, errors):
+    данные элементов, обновляемые проекты по slug и {индекс: ошибки}.
+    Ссылки (technology_ids, slug) проверяются одним запросом на вид, а не на элемент.
+    """
+    validated, errors = [], {}
+    for index, item in enumerate(items):
+        partial = isinstance(item, dict) and bool(item.get("slug"))
+        serializer = ProjectBatchItemSerializer(data=item, partial=partial)
+        if serializer.is_valid():
+            validated.append(serializer.validated_data)
+        else:
+            validated.append({})
+            errors[index] = serializer.errors
+
+    technology_ids = {pk for data in validated for pk in data.get("technology_ids", ())}
+    technologies = Technology.objects.in_bulk(technology_ids)
+    slugs = [data["slug"] for data in validated if data.get("slug")]
+    existing = Project.objects.filter(owner=owner).in_bulk(slugs, field_name="slug")
+
+    seen = set()
+    for index, data in enumerate(validated):
+        item_errors = {}
+        missing = sorted(set(data.get("technology_ids", ())) - technologies.keys())
+        if missing:
+            item_errors["technology_ids"] = [
+                f'Invalid pk "{pk}" - object does not exist.' for pk in missing
+            ]
+        slug = data.get("slug")
+        if slug and slug not in existing:
+            item_errors["slug"] = ["Project not found."]
+        elif slug in seen:
+            item_errors["slug"] = ["Project is updated twice in one batch."]
+        if slug:
+            seen.add(slug)
+        if item_errors:
+            errors.setdefault(index, {}).update(item_errors)
+    return validated, existing, errors
+
+
+def _bump_projects(slugs):
+    for slug in slugs:
+        cache.bump(cache.project_version_key(slug))
+    cache.bump_global()
+
+
+def _replace_relations(projects, items, updated_ids, tags):
+    """Строки M2M для technologies и tags: DELETE у обновляемых + bulk_create."""
+    through = Project.technologies.through
+    replaced = [p.pk for p, data in zip(projects, items) if "technology_ids" in data]
+    through.objects.filter(project_id__in=set(replaced) & updated_ids).delete()
+    through.objects.bulk_create(
+        [
+            through(project_id=project.pk, technology_id=pk)
+            for project, data in zip(projects, items)
+            for pk in dict.fromkeys(data.get("technology_ids", ()))
+        ]
+    )
+
+    content_type = ContentType.objects.get_for_model(Project)
+    retagged = [p.pk for p, data in zip(projects, items) if "tags" in data]
+    TaggedItem.objects.filter(
+        content_type=content_type, object_id__in=set(retagged) & updated_ids
+    ).delete()
+    TaggedItem.objects.bulk_create(
+        [
+            TaggedItem(content_type=content_type, object_id=project.pk, tag=tag)
+            for project, data in zip(projects, items)
+            for tag in {
+                tags[_tag_key(name)].pk: tags[_tag_key(name)]
+                for name in data.get("tags", ())
+            }.values()
+        ]
+    )
+
+
+def save_batch(owner, items, existing):
+    """
+    Пишет провалидированную пачку: bulk_create новых проектов (слаги —
+    одним SELECT, с повтором при гонке), bulk_update обновляемых, пачки строк M2M
+    и один UPDATE search_vector. bulk-операции не шлют сигналов, поэтому
+    поисковый индекс и версии кэша обновляются здесь же.
+    Возвращает [(project, created)] в порядке items.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        tags = resolve_tags(name for data in items for name in data.get("tags", ()))
+        projects, created, updated = [], [], []
+        for data in items:
+            fields = {name: data[name] for name in FIELDS if name in data}
+            if data.get("slug"):
+                project = existing[data["slug"]]
+                for name, value in fields.items():
+                    setattr(project, name, value)
+                project.updated_at = now
+                updated.append(project)
+            else:
+                project = Project(owner=owner, **fields)
+                created.append(project)
+            projects.append(project)
+
+        bulk_create_with_unique_slugs(created, "title")
+        if updated:
+            Project.objects.bulk_update(updated, [*FIELDS, "updated_at"])
+        _replace_relations(projects, items, {p.pk for p in updated}, tags)
+        search.update_search_vectors(
+            Project.objects.filter(pk__in=[p.pk for p in projects])
+        )
+        cache.invalidate(_bump_projects, [p.slug for p in updated])
+    created_ids = {id(project) for project in created}
+    return [(project, id(project) in created_ids) for project in projects]
@@ -0,0 +1,185 @@
+# Файл: apps/projects/benchmark.py
+
+import random
+import time
+from dataclasses import dataclass
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Project
+from .seeding import WORDS
+
+# Замеры in-process через тестовый клиент: весь стек Django/DRF (middleware,
+# аутентификация, сериализация, SQL), но без сети и сервера приложений.
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    # (targets) -> url; targets — словарь из pick_targets()
+    url: object
+    auth: bool = False
+
+
+SCENARIOS = (
+    Scenario("list", "get", lambda t: reverse("project-list")),
+    Scenario("list (auth)", "get", lambda t: reverse("project-list"), auth=True),
+    Scenario(
+        "search",
+        "get",
+        lambda t: f"{reverse('project-list')}?search={t['rng'].choice(WORDS)}",
+    ),
+    Scenario(
+        "popular",
+        "get",
+        lambda t: f"{reverse('project-list')}?ordering=-likes_count",
+    ),
+    Scenario(
+        "popular (cursor)",
+        "get",
+        lambda t: f"{reverse('project-list')}?ordering=-likes_count&cursor=",
+    ),
+    Scenario(
+        "detail",
+        "get",
+        lambda t: reverse(
+            "project-detail", kwargs={"slug": t["rng"].choice(t["sample"])}
+        ),
+    ),
+    Scenario(
+        "comments",
+        "get",
+        lambda t: reverse(
+            "project-comments-list-create", kwargs={"project_slug": t["commented"]}
+        ),
+    ),
+    Scenario(
+        "media",
+        "get",
+        lambda t: reverse("project-media-files", kwargs={"slug": t["popular"]}),
+    ),
+    Scenario(
+        "like toggle",
+        "post",
+        lambda t: reverse("project-like", kwargs={"slug": t["popular"]}),
+        auth=True,
+    ),
+)
+
+
+def percentile(values, q):
+    """Ближайший ранг: q-й перцентиль по замерам (q от 0 до 100)."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+@dataclass
+class Measurement:
+    scenario: str
+    size: int
+    timings: list
+    queries: list
+
+    def percentile(self, q):
+        return percentile(self.timings, q) * 1000
+
+    @property
+    def p50(self):
+        return self.percentile(50)
+
+    @property
+    def p95(self):
+        return self.percentile(95)
+
+    @property
+    def queries_per_request(self):
+        return max(self.queries)
+
+    def as_dict(self):
+        return {
+            "scenario": self.scenario,
+            "size": self.size,
+            "requests": len(self.timings),
+            "p50_ms": round(self.p50, 3),
+            "p95_ms": round(self.p95, 3),
+            "queries": self.queries_per_request,
+        }
+
+
+def pick_targets(seed=0, sample_size=50):
+    """Проекты для замеров: самый популярный, самый обсуждаемый, случайная выборка."""
+    rng = random.Random(seed)
+    projects = Project.objects.order_by()
+    slugs = list(projects.values_list("slug", flat=True)[: sample_size * 20])
+    if not slugs:
+        raise ValueError("Нет проектов: сначала manage.py seed_benchmark")
+    return {
+        "rng": rng,
+        "sample": rng.sample(slugs, min(sample_size, len(slugs))),
+        "popular": projects.order_by("-likes_count", "pk").values_list(
+            "slug", flat=True
+        )[0],
+        "commented": projects.order_by("-comments_count", "pk").values_list(
+            "slug", flat=True
+        )[0],
+    }
+
+
+def run(
+    size,
+    iterations=50,
+    warmup=5,
+    scenarios=SCENARIOS,
+    response_cache=False,
+    seed=0,
+    using="default",
+):
+    """Гоняет сценарии по текущей БД; возвращает список Measurement."""
+    targets = pick_targets(seed)
+    viewer = get_user_model().objects.order_by("pk").first()
+    access = str(RefreshToken.for_user(viewer).access_token)
+    anonymous = APIClient()
+    authenticated = APIClient(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    results = []
+    with override_settings(
+        ALLOWED_HOSTS=["testserver"], RESPONSE_CACHE_ENABLED=response_cache
+    ):
+        for scenario in scenarios:
+            client = authenticated if scenario.auth else anonymous
+            send = getattr(client, scenario.method)
+            measurement = Measurement(scenario.name, size, [], [])
+            for n in range(warmup + iterations):
+                url = scenario.url(targets)
+                with CaptureQueriesContext(connections[using]) as captured:
+                    start = time.perf_counter()
+                    response = send(url)
+                    elapsed = time.perf_counter() - start
+                if response.status_code >= 400:
+                    raise RuntimeError(
+                        f"{scenario.name}: {url} -> {response.status_code}"
+                    )
+                if n >= warmup:
+                    measurement.timings.append(elapsed)
+                    measurement.queries.append(len(captured))
+            results.append(measurement)
+    return results
+
+
+def format_table(measurements):
+    header = f"{'size':>8}  {'scenario':<18} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8}"
+    lines = [header, "-" * len(header)]
+    for m in measurements:
+        lines.append(
+            f"{m.size:>8}  {m.scenario:<18} {m.p50:>9.2f} {m.p95:>9.2f} "
+            f"{m.queries_per_request:>8}"
+        )
+    return "\n".join(lines)
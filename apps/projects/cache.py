@@ -0,0 +1,223 @@
+# Файл: apps/projects/cache.py
+
+import hashlib
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from apps.core.replicas import reading_from_replica
+
+GLOBAL_VERSION_KEY = "projects:v:global"
+CATALOG_VERSION_KEY = "projects:v:catalog"
+
+
+def _cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def project_version_key(slug):
+    return f"projects:v:project:{slug}"
+
+
+class CacheStats:
+    """Счётчики попаданий/промахов ответного кэша в пределах процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+stats = CacheStats()
+
+
+# --- Версии ---
+
+
+def _initial_version():
+    # Не начинаем с 1: если ключ версии вытеснят, старые ответы не оживут
+    return int(time.time() * 1000)
+
+
+def bump(key):
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+
+
+def invalidate(func, *args):
+    """
+    Сдвигает версию сразу и ещё раз после коммита: иначе параллельный читатель
+    успеет закэшировать старый снимок БД уже под новой версией.
+    """
+    func(*args)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: func(*args))
+
+
+def bump_global():
+    bump(GLOBAL_VERSION_KEY)
+
+
+def bump_catalog():
+    """Переименования технологий/тегов меняют выдачу любого проекта."""
+    bump(CATALOG_VERSION_KEY)
+    bump_global()
+
+
+def bump_project(slug):
+    """Изменение проекта: его детальная страница и все списки."""
+    bump(project_version_key(slug))
+    bump_global()
+
+
+def _versions(keys):
+    cache = _cache()
+    found = cache.get_many(keys)
+    missing = {key: _initial_version() for key in keys if key not in found}
+    for key, value in missing.items():
+        cache.add(key, value, timeout=None)
+    if missing:
+        # add() мог проиграть гонку другому процессу — перечитываем
+        found.update(cache.get_many(list(missing)))
+    return [found.get(key, missing.get(key)) for key in keys]
+
+
+# --- Ключи ответов ---
+
+
+def response_key(request, scope, version_keys):
+    versions = _versions(version_keys)
+    params = sorted(
+        (key, value) for key, values in request.query_params.lists() for value in values
+    )
+    # Хост входит в ключ: ссылки next/previous в ответе абсолютные
+    digest = hashlib.sha1(
+        repr((request.get_host(), request.path, params)).encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    version = ".".join(str(v) for v in versions)
+    return f"projects:resp:{scope}:{version}:{digest}"
+
+
+class VersionedResponseCacheMixin:
+    """
+    Кэширует анонимные GET list/retrieve. Ключ = нормализованные параметры
+    + версии (глобальная для списков, проектная и каталожная для детальной).
+    Инвалидация — инкремент версии из сигналов, без перебора ключей.
+    """
+
+    def _cacheable(self, request):
+        return (
+            getattr(settings, "RESPONSE_CACHE_ENABLED", True)
+            and request.method == "GET"
+            and not request.user.is_authenticated
+        )
+
+    def _cached_response(self, request, scope, version_keys, build):
+        if not self._cacheable(request):
+            return build()
+        cache = _cache()
+        key = response_key(request, scope, version_keys)
+        cached = cache.get(key)
+        if cached is not None:
+            return self._hit(cached)
+        stats.record(hit=False)
+        response = build()
+        if response.status_code == 200:
+            cache.set(key, (response.status_code, response.data), self._timeout())
+        response["X-Cache"] = "MISS"
+        return response
+
+    async def _acached_response(self, request, scope, version_keys, build):
+        if not self._cacheable(request):
+            return await build()
+        cache = _cache()
+        key = await sync_to_async(response_key)(request, scope, version_keys)
+        cached = await cache.aget(key)
+        if cached is not None:
+            return self._hit(cached)
+        stats.record(hit=False)
+        response = await build()
+        if response.status_code == 200:
+            await cache.aset(
+                key, (response.status_code, response.data), self._timeout()
+            )
+        response["X-Cache"] = "MISS"
+        return response
+
+    def _hit(self, cached):
+        stats.record(hit=True)
+        status_code, data = cached
+        response = Response(data, status=status_code)
+        response["X-Cache"] = "HIT"
+        return response
+
+    def _timeout(self):
+        if reading_from_replica():
+            # Реплика могла не догнать запись, сдвинувшую версию: устаревший
+            # ответ лёг бы под новый ключ на весь RESPONSE_CACHE_TIMEOUT
+            return getattr(settings, "REPLICA_RESPONSE_CACHE_TIMEOUT", 10)
+        return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+
+    def _detail_version_keys(self, kwargs):
+        slug = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        return [project_version_key(slug), CATALOG_VERSION_KEY]
+
+    def list(self, request, *args, **kwargs):
+        parent = super().list
+        return self._cached_response(
+            request,
+            "list",
+            [GLOBAL_VERSION_KEY],
+            lambda: parent(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        parent = super().retrieve
+        return self._cached_response(
+            request,
+            "detail",
+            self._detail_version_keys(kwargs),
+            lambda: parent(request, *args, **kwargs),
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        parent = super().alist
+        return await self._acached_response(
+            request,
+            "list",
+            [GLOBAL_VERSION_KEY],
+            lambda: parent(request, *args, **kwargs),
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        parent = super().aretrieve
+        return await self._acached_response(
+            request,
+            "detail",
+            self._detail_version_keys(kwargs),
+            lambda: parent(request, *args, **kwargs),
+        )
@@ -0,0 +1,76 @@
+# Файл: apps/projects/counters.py
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Comment, Like, Project
+
+
+def _count_subquery(model):
+    """Коррелированный подзапрос COUNT(*) по project_id для UPDATE ... SET."""
+    rows = (
+        model.objects.filter(project=OuterRef("pk"))
+        .order_by()
+        .values("project")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+# Внутри deferred_counters() сигналы удаления лайков и комментариев не трогают
+# счётчики и кэш: вызывающий пересчитывает их сам (flush_likes)
+_deferred = ContextVar("counters_deferred", default=False)
+
+
+@contextmanager
+def deferred_counters():
+    token = _deferred.set(True)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+
+
+def counters_deferred():
+    return _deferred.get()
+
+
+def change_counter(project_id, field, delta):
+    """
+    Атомарно сдвигает счётчик проекта на delta одним UPDATE без чтения строки.
+    updated_at двигается вместе со счётчиком: на нём держатся ETag/Last-Modified.
+    """
+    qs = Project.objects.filter(pk=project_id)
+    if delta < 0:
+        # Не уходим в минус, если счётчик уже разъехался с реальностью
+        qs = qs.filter(**{f"{field}__gte": -delta})
+    return qs.update(**{field: F(field) + delta, "updated_at": timezone.now()})
+
+
+def recount_counters(queryset=None):
+    """
+    Пересчитывает likes_count/comments_count по реальным строкам.
+    Обновляются только разъехавшиеся проекты; возвращает их количество.
+    """
+    if queryset is None:
+        queryset = Project.objects.all()
+    actual_likes = _count_subquery(Like)
+    actual_comments = _count_subquery(Comment)
+    drifted = (
+        queryset.order_by()
+        .annotate(actual_likes=actual_likes, actual_comments=actual_comments)
+        .filter(
+            ~Q(likes_count=F("actual_likes")) | ~Q(comments_count=F("actual_comments"))
+        )
+        .values("pk")
+    )
+    return Project.objects.filter(pk__in=Subquery(drifted)).update(
+        likes_count=actual_likes,
+        comments_count=actual_comments,
+        updated_at=timezone.now(),
+    )
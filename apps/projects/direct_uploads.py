@@ -0,0 +1,188 @@
+# Файл: apps/projects/direct_uploads.py
+
+import base64
+import binascii
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from rest_framework.exceptions import ValidationError
+
+from .models import ProjectMedia, project_media_upload_path
+
+try:
+    from storages.backends.s3 import S3Storage
+    from storages.utils import clean_name
+except ImportError:  # django-storages/boto3 не установлены — только локальный режим
+    S3Storage = None
+
+TOKEN_SALT = "projects.direct-upload"
+
+
+def media_storage():
+    return ProjectMedia._meta.get_field("file").storage
+
+
+def supports_direct_upload(storage=None):
+    """Прямая загрузка возможна только в S3-совместимое хранилище (S3, MinIO)."""
+    storage = storage or media_storage()
+    return S3Storage is not None and isinstance(storage, S3Storage)
+
+
+def _expires_in():
+    return getattr(settings, "DIRECT_UPLOAD_EXPIRES", 3600)
+
+
+def _object_key(storage, name):
+    # Ключ в бакете с учётом AWS_LOCATION (storage.location), как его строит
+    # сам storage. Имя без ".." и абсолютных путей: файл — только basename
+    name = clean_name(name)
+    return posixpath.join(storage.location, name) if storage.location else name
+
+
+def _fit_name(name, max_length):
+    """
+    Укорачивает имя файла под max_length поля, как storage.get_available_name
+    при обычной загрузке: обрезается основа имени, расширение остаётся.
+    """
+    truncation = len(name) - max_length
+    if truncation <= 0:
+        return name
+    dir_name, file_name = os.path.split(name)
+    file_root, file_ext = os.path.splitext(file_name)
+    file_root = file_root[:-truncation]
+    if not file_root:
+        raise ValidationError({"filename": "File name is too long."})
+    return os.path.join(dir_name, f"{file_root}{file_ext}")
+
+
+def _checksum_b64(sha256_hex):
+    """S3 принимает x-amz-checksum-sha256 в base64, клиенты присылают hex."""
+    try:
+        return base64.b64encode(binascii.unhexlify(sha256_hex)).decode()
+    except (binascii.Error, ValueError):
+        raise ValidationError({"sha256": "Expected a hex SHA-256 digest."}) from None
+
+
+def create_intent(project, user, filename, file_type, size, content_type, **extra):
+    """
+    Готовит presigned PUT на ключ из project_media_upload_path. Размер,
+    Content-Type и (если передана) SHA-256 входят в подпись, так что S3 сам
+    отвергнет чужой файл. Параметры загрузки запоминаются в подписанном токене:
+    сервер ничего не хранит до завершения.
+    """
+    storage = media_storage()
+    media = ProjectMedia(project=project, file_type=file_type)
+    # Префикс не даёт двум загрузкам одного имени перезаписать друг друга
+    name = project_media_upload_path(media, f"{uuid.uuid4().hex[:8]}-{filename}")
+    # Иначе длинное имя уйдёт в бакет и упадёт только на media.save() в complete
+    name = _fit_name(name, ProjectMedia._meta.get_field("file").max_length)
+    params = {
+        "Bucket": storage.bucket_name,
+        "Key": _object_key(storage, name),
+        "ContentType": content_type,
+        "ContentLength": size,
+    }
+    headers = {"Content-Type": content_type}
+    sha256 = extra.get("sha256", "")
+    if sha256:
+        params["ChecksumSHA256"] = headers["x-amz-checksum-sha256"] = _checksum_b64(
+            sha256
+        )
+
+    client = storage.connection.meta.client
+    url = client.generate_presigned_url(
+        "put_object", Params=params, ExpiresIn=_expires_in(), HttpMethod="PUT"
+    )
+    token = signing.dumps(
+        {
+            "project": project.pk,
+            "user": user.pk,
+            "name": name,
+            "size": size,
+            "content_type": content_type,
+            "file_type": file_type,
+            "caption": extra.get("caption", ""),
+            "sha256": sha256,
+        },
+        salt=TOKEN_SALT,
+    )
+    return {
+        "mode": "direct",
+        "method": "PUT",
+        "url": url,
+        "headers": headers,
+        "token": token,
+        "expires_in": _expires_in(),
+    }
+
+
+def read_token(token, project, user):
+    try:
+        # Небольшой запас: загрузка могла начаться за секунду до истечения ссылки
+        data = signing.loads(token, salt=TOKEN_SALT, max_age=_expires_in() + 600)
+    except signing.BadSignature:
+        raise ValidationError({"token": "Invalid or expired upload token."}) from None
+    if data["project"] != project.pk or data["user"] != user.pk:
+        raise ValidationError({"token": "Token was issued for another upload."})
+    return data
+
+
+def _object_sha256(client, bucket, key, head):
+    """
+    SHA-256 объекта в hex. S3 хранит её сам, если клиент прислал подписанный
+    x-amz-checksum-sha256. Хранилища без поддержки checksum (старые MinIO)
+    её не возвращают — тогда читаем объект потоком, это редкий запасной путь.
+    """
+    stored = head.get("ChecksumSHA256")
+    if stored:
+        return binascii.hexlify(base64.b64decode(stored)).decode()
+    digest = hashlib.sha256()
+    body = client.get_object(Bucket=bucket, Key=key)["Body"]
+    for chunk in body.iter_chunks(1024 * 1024):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def complete_intent(project, user, token):
+    """
+    Проверяет объект в бакете (HEAD: размер, тип, контрольная сумма) и создаёт
+    ProjectMedia. Возвращает (media, created); повторный вызов идемпотентен.
+    """
+    data = read_token(token, project, user)
+    existing = ProjectMedia.objects.filter(project=project, file=data["name"]).first()
+    if existing is not None:
+        return existing, False
+
+    storage = media_storage()
+    client = storage.connection.meta.client
+    key = _object_key(storage, data["name"])
+    try:
+        head = client.head_object(
+            Bucket=storage.bucket_name, Key=key, ChecksumMode="ENABLED"
+        )
+    except client.exceptions.ClientError:
+        raise ValidationError({"token": "Object has not been uploaded yet."}) from None
+
+    errors = {}
+    if head["ContentLength"] != data["size"]:
+        errors["size"] = "Uploaded object size does not match."
+    if head.get("ContentType") != data["content_type"]:
+        errors["content_type"] = "Uploaded object content type does not match."
+    if data["sha256"] and not errors:
+        if _object_sha256(client, storage.bucket_name, key, head) != data["sha256"]:
+            errors["sha256"] = "Uploaded object checksum does not match."
+    if errors:
+        # Чужой объект в нашем префиксе не оставляем
+        client.delete_object(Bucket=storage.bucket_name, Key=key)
+        raise ValidationError(errors)
+
+    media = ProjectMedia(
+        project=project, file_type=data["file_type"], caption=data["caption"]
+    )
+    media.file.name = data["name"]  # байты уже в бакете, просто ссылаемся на них
+    media.save()
+    return media, True
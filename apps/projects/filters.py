@@ -0,0 +1,28 @@
+# Файл: apps/projects/filters.py
+
+from rest_framework import filters
+
+from .search import search_projects
+
+
+class ProjectSearchFilter(filters.SearchFilter):
+    """
+    ?search= по полнотекстовому индексу проекта вместо icontains по JOIN'ам.
+    Синтаксис запроса — websearch: "точная фраза", or, -исключение.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, "").strip()
+        if not terms:
+            return queryset
+        return search_projects(queryset, terms)
+
+
+class ProjectOrderingFilter(filters.OrderingFilter):
+    """При поиске без явного ?ordering= выдача сортируется по релевантности."""
+
+    def get_ordering(self, request, queryset, view):
+        searching = request.query_params.get(ProjectSearchFilter.search_param, "")
+        if searching.strip() and not request.query_params.get(self.ordering_param):
+            return ["-search_rank", "-created_at"]
+        return super().get_ordering(request, queryset, view)
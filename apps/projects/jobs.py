@@ -0,0 +1,38 @@
+# Файл: apps/projects/jobs.py
+
+from django.utils import timezone
+
+from apps.core.images import UnreadableImage, refresh_derivatives
+from apps.jobs.registry import register
+
+from . import cache, uploads
+from .models import Project, ProjectMedia
+
+
+@register("projects.main_image_derivatives", permanent=[UnreadableImage])
+def main_image_derivatives(project_id):
+    project = Project.objects.filter(pk=project_id).first()
+    if project is None:
+        return
+    # updated_at двигаем сами: UPDATE не вызывает auto_now, а ETag держится на нём
+    if refresh_derivatives(project, "main_image", updated_at=timezone.now()):
+        cache.invalidate(cache.bump_project, project.slug)
+
+
+@register("projects.media_derivatives", permanent=[UnreadableImage])
+def media_derivatives(media_id):
+    media = ProjectMedia.objects.select_related("project").filter(pk=media_id).first()
+    if media is None or media.file_type != "image":
+        return
+    if refresh_derivatives(media, "file", updated_at=timezone.now()):
+        cache.invalidate(cache.bump, cache.project_version_key(media.project.slug))
+
+
+def _finish_upload_failed(job, error):
+    # Подробности — в Job.last_error, клиенту хватит статуса сессии
+    uploads.fail(*job.args)
+
+
+@register("projects.finish_upload", on_failure=_finish_upload_failed)
+def finish_upload(session_id):
+    uploads.finish(session_id)
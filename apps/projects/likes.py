@@ -0,0 +1,285 @@
+# Файл: apps/projects/likes.py
+
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Q
+
+from . import cache
+from .counters import deferred_counters, recount_counters
+from .models import Like, Project
+
+logger = logging.getLogger(__name__)
+
+# Буферизованные лайки: переключение пишется в быстрый буфер и сразу отвечает,
+# а flush_likes() пачками применяет накопленное к projects_like. Запись буфера —
+# (desired, base): желаемое состояние и то, что было в БД при первом переключении.
+# Разница desired - base и есть ещё не применённый сдвиг счётчика.
+#
+# base читается из БД под блокировкой строки проекта (toggle_like), а flush_likes
+# берёт те же блокировки до того, как забрать записи из буфера, и держит их до
+# коммита. Поэтому клик, пришедший во время сброса, ждёт коммита и читает уже
+# применённое состояние, а не то, что было до сброса.
+
+
+class LocalLikeBuffer:
+    """Буфер в памяти процесса: для разработки и однопроцессного деплоя."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def toggle(self, project_id, user_id, base):
+        """
+        Переключает запись. base=None — только если запись уже есть
+        (иначе None: base нужно прочитать из БД).
+        """
+        with self._lock:
+            entry = self._pending.get((project_id, user_id))
+            if entry is not None:
+                current, base = entry
+            elif base is None:
+                return None
+            else:
+                current = base
+            self._pending[(project_id, user_id)] = (not current, base)
+            return not current
+
+    def delta(self, project_id):
+        with self._lock:
+            return sum(
+                int(desired) - int(base)
+                for (pid, _), (desired, base) in self._pending.items()
+                if pid == project_id
+            )
+
+    def pending_projects(self):
+        with self._lock:
+            return sorted({project_id for project_id, _ in self._pending})
+
+    def drain(self, project_ids=None):
+        """Забирает записи (всех проектов или только project_ids)."""
+        with self._lock:
+            if project_ids is None:
+                pending, self._pending = self._pending, {}
+            else:
+                wanted = set(project_ids)
+                pending = {
+                    key: value
+                    for key, value in self._pending.items()
+                    if key[0] in wanted
+                }
+                for key in pending:
+                    del self._pending[key]
+        return [(p, u, desired, base) for (p, u), (desired, base) in pending.items()]
+
+    def restore(self, entries):
+        # Более свежие переключения, пришедшие во время сбоя, важнее
+        with self._lock:
+            for project_id, user_id, desired, base in entries:
+                self._pending.setdefault((project_id, user_id), (desired, base))
+
+    def schedule_flush(self, interval):
+        """Буфер процесса некому сбросить снаружи — сбрасываем его таймером."""
+        with self._lock:
+            if self._timer is not None and self._timer.is_alive():
+                return
+            self._timer = threading.Timer(interval, _flush_in_background, [self])
+            self._timer.daemon = True
+            self._timer.start()
+
+
+class RedisLikeBuffer:
+    """
+    Буфер в Redis, общий для всех воркеров: хэш likes:pending:<project>
+    с полями <user> = "<desired>:<base>" и множество проектов likes:dirty.
+    """
+
+    DIRTY_KEY = "likes:dirty"
+
+    # Переключение атомарно: два быстрых клика не перетрут друг друга
+    TOGGLE_SCRIPT = """
+    local entry = redis.call('HGET', KEYS[1], ARGV[1])
+    local base = ARGV[2]
+    local current = base
+    if entry then
+        current = string.sub(entry, 1, 1)
+        base = string.sub(entry, 3, 3)
+    elseif base == '' then
+        return -1
+    end
+    local desired = current == '1' and '0' or '1'
+    redis.call('HSET', KEYS[1], ARGV[1], desired .. ':' .. base)
+    redis.call('SADD', KEYS[2], ARGV[3])
+    return desired
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._toggle = client.register_script(self.TOGGLE_SCRIPT)
+
+    @staticmethod
+    def pending_key(project_id):
+        return f"likes:pending:{project_id}"
+
+    @staticmethod
+    def _parse(value):
+        value = value.decode() if isinstance(value, bytes) else value
+        return value[0] == "1", value[2] == "1"
+
+    def toggle(self, project_id, user_id, base):
+        desired = self._toggle(
+            keys=[self.pending_key(project_id), self.DIRTY_KEY],
+            args=[user_id, "" if base is None else int(base), project_id],
+        )
+        if int(desired) == -1:
+            return None  # записи нет, а base не передан
+        return int(desired) == 1
+
+    def delta(self, project_id):
+        values = self.client.hvals(self.pending_key(project_id))
+        return sum(int(d) - int(b) for d, b in map(self._parse, values))
+
+    def pending_projects(self):
+        return sorted(int(pid) for pid in self.client.smembers(self.DIRTY_KEY))
+
+    def drain(self, project_ids=None):
+        if project_ids is None:
+            project_ids = self.pending_projects()
+        entries = []
+        for project_id in project_ids:
+            if not self.client.srem(self.DIRTY_KEY, project_id):
+                continue  # уже забрал другой flush
+            key = self.pending_key(project_id)
+            # HGETALL + DEL в одной транзакции: переключения после неё
+            # попадут в новый хэш и в следующий flush
+            pipe = self.client.pipeline()
+            pipe.hgetall(key)
+            pipe.delete(key)
+            values, _ = pipe.execute()
+            for user_id, value in values.items():
+                entries.append((project_id, int(user_id), *self._parse(value)))
+        return entries
+
+    def restore(self, entries):
+        pipe = self.client.pipeline()
+        for project_id, user_id, desired, base in entries:
+            pipe.hsetnx(
+                self.pending_key(project_id), user_id, f"{int(desired)}:{int(base)}"
+            )
+            pipe.sadd(self.DIRTY_KEY, project_id)
+        pipe.execute()
+
+
+_local_buffer = LocalLikeBuffer()
+
+
+def buffer_enabled():
+    return getattr(settings, "LIKE_BUFFER_ENABLED", False)
+
+
+def get_buffer():
+    """Redis, если кэш LIKE_BUFFER_ALIAS на RedisCache, иначе буфер процесса."""
+    backend = caches[getattr(settings, "LIKE_BUFFER_ALIAS", "default")]
+    redis_cache = getattr(backend, "_cache", None)
+    if hasattr(redis_cache, "get_client"):
+        return RedisLikeBuffer(redis_cache.get_client(write=True))
+    return _local_buffer
+
+
+def toggle_like(project, user, buffer=None):
+    """Переключает лайк в буфере. Возвращает (liked, likes_count с учётом буфера)."""
+    buffer = buffer or get_buffer()
+    # Запись уже в буфере — БД не нужна. Если её нет (или её только что забрал
+    # flush), base читаем под блокировкой проекта: сброс к этому моменту закоммичен
+    liked = buffer.toggle(project.pk, user.pk, None)
+    if liked is None:
+        with transaction.atomic(using="default"):
+            _lock_projects([project.pk])
+            base = (
+                Like.objects.using("default")
+                .filter(project=project, user=user)
+                .exists()
+            )
+            liked = buffer.toggle(project.pk, user.pk, base)
+    interval = getattr(settings, "LIKE_FLUSH_INTERVAL", 5)
+    if interval and isinstance(buffer, LocalLikeBuffer):
+        buffer.schedule_flush(interval)
+    return liked, max(project.likes_count + buffer.delta(project.pk), 0)
+
+
+def _lock_projects(project_ids):
+    """SELECT ... FOR UPDATE строк проектов на primary, по порядку id."""
+    list(
+        Project.objects.using("default")
+        .select_for_update()
+        .filter(pk__in=project_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def flush_likes(buffer=None, batch_size=None):
+    """
+    Применяет буфер к БД: bulk_create(ignore_conflicts=True) для лайков
+    и пачечные DELETE для снятых. unique_together ("project", "user")
+    по-прежнему держит БД: повторная вставка просто игнорируется.
+    Всё, от блокировки проектов и изъятия записей из буфера до пересчёта
+    счётчиков, — одна транзакция на primary.
+    """
+    buffer = buffer or get_buffer()
+    batch_size = batch_size or getattr(settings, "LIKE_FLUSH_BATCH_SIZE", 500)
+    project_ids = buffer.pending_projects()
+    if not project_ids:
+        return 0
+    entries = []
+    try:
+        with transaction.atomic(using="default"):
+            _lock_projects(project_ids)
+            entries = buffer.drain(project_ids)
+            # Не изменившиеся в итоге пары (лайк и тут же снят) в БД не идут
+            changed = [entry for entry in entries if entry[2] != entry[3]]
+            if not changed:
+                return 0
+            likes = Like.objects.using("default")
+            added = [Like(project_id=p, user_id=u) for p, u, d, _ in changed if d]
+            for batch in _batches(added, batch_size):
+                likes.bulk_create(batch, ignore_conflicts=True)
+            removed = [(p, u) for p, u, d, _ in changed if not d]
+            # post_delete на каждую строку сдвигал бы счётчик и версию кэша:
+            # счётчики пересчитываются ниже одним UPDATE
+            with deferred_counters():
+                for batch in _batches(removed, batch_size):
+                    condition = Q()
+                    for project_id, user_id in batch:
+                        condition |= Q(project_id=project_id, user_id=user_id)
+                    likes.filter(condition).delete()
+            # bulk_create не шлёт post_save: счётчики сверяем пересчётом
+            touched = Project.objects.using("default").filter(
+                pk__in={p for p, *_ in changed}
+            )
+            recount_counters(touched)
+            for slug in touched.values_list("slug", flat=True):
+                cache.invalidate(cache.bump_project, slug)
+    except Exception:
+        buffer.restore(entries)
+        raise
+    return len(changed)
+
+
+def _flush_in_background(buffer):
+    try:
+        flush_likes(buffer)
+    except Exception:
+        logger.exception("Не удалось сбросить буфер лайков")
+    finally:
+        connection.close()
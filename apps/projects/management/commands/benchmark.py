@@ -0,0 +1,108 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.projects import benchmark
+from apps.projects.models import Project
+from apps.projects.seeding import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет p50/p95 и число SQL-запросов основных эндпоинтов на нескольких "
+        "объёмах данных. По умолчанию во временной тестовой БД."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1000,10000",
+            help="Число проектов через запятую; данные досеиваются до каждого.",
+        )
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--likes-per-project", type=float, default=5, help="Среднее, по Ципфу."
+        )
+        parser.add_argument("--comments-per-project", type=float, default=2)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="Только эти сценарии (можно повторять).",
+        )
+        parser.add_argument(
+            "--response-cache",
+            action="store_true",
+            help="Не отключать кэш ответов ProjectViewSet.",
+        )
+        parser.add_argument(
+            "--in-place",
+            action="store_true",
+            help="Сеять и мерить в текущей БД, а не во временной test_<имя>.",
+        )
+        parser.add_argument(
+            "--keepdb", action="store_true", help="Не удалять временную БД."
+        )
+        parser.add_argument("--json", action="store_true", help="Вывод в JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options["sizes"].split(","))
+        except ValueError as e:
+            raise CommandError("--sizes: ожидаются целые числа через запятую") from e
+        scenarios = benchmark.SCENARIOS
+        if options["scenarios"]:
+            known = {scenario.name: scenario for scenario in scenarios}
+            unknown = set(options["scenarios"]) - set(known)
+            if unknown:
+                raise CommandError(
+                    f"Неизвестные сценарии: {', '.join(sorted(unknown))}"
+                )
+            scenarios = [known[name] for name in options["scenarios"]]
+
+        creation = connections["default"].creation
+        old_name = None
+        if not options["in_place"]:
+            old_name = connections["default"].settings_dict["NAME"]
+            creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False, keepdb=options["keepdb"]
+            )
+        try:
+            results = self.measure(sizes, scenarios, options)
+        finally:
+            if old_name is not None and not options["keepdb"]:
+                creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["json"]:
+            self.stdout.write(json.dumps([m.as_dict() for m in results], indent=2))
+        else:
+            self.stdout.write(benchmark.format_table(results))
+
+    def measure(self, sizes, scenarios, options):
+        results = []
+        for size in sizes:
+            missing = size - Project.objects.count()
+            if missing > 0:
+                seed(
+                    users=max(missing // 10, 1),
+                    projects=missing,
+                    likes=int(missing * options["likes_per_project"]),
+                    comments=int(missing * options["comments_per_project"]),
+                    seed=options["seed"] + size,
+                )
+            results.extend(
+                benchmark.run(
+                    size,
+                    iterations=options["iterations"],
+                    warmup=options["warmup"],
+                    scenarios=scenarios,
+                    response_cache=options["response_cache"],
+                    seed=options["seed"],
+                )
+            )
+            if options["verbosity"] > 1:
+                self.stderr.write(f"Готово: {size} проектов")
+        return results
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.projects.uploads import clear_expired
+
+
+class Command(BaseCommand):
+    help = "Удаляет просроченные сессии загрузки частями и их временные файлы."
+
+    def handle(self, *args, **options):
+        removed = clear_expired()
+        self.stdout.write(self.style.SUCCESS(f"Удалено сессий: {removed}"))
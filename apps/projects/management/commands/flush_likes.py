@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.projects.likes import flush_likes
+
+
+class Command(BaseCommand):
+    help = "Применяет буферизованные лайки (LIKE_BUFFER_ENABLED) к базе."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Повторять каждые N секунд (0 — один проход и выход).",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            applied = flush_likes(batch_size=options["batch_size"])
+            self.stdout.write(f"Применено переключений: {applied}")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,97 @@
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.projects.benchmark import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест запущенного сервера: N параллельных клиентов с keep-alive "
+        "гоняют GET по URL заданное время; печатает RPS и p50/p95/p99."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="Например, http://127.0.0.1:8000/api/projects/")
+        parser.add_argument("--concurrency", "-c", type=int, default=16)
+        parser.add_argument("--duration", "-d", type=float, default=10, help="Секунды.")
+        parser.add_argument("--warmup", type=float, default=1, help="Секунды.")
+        parser.add_argument(
+            "--header",
+            "-H",
+            action="append",
+            default=[],
+            help='Дополнительный заголовок: "Authorization: Bearer ..."',
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise CommandError("Ожидается абсолютный http(s) URL.")
+        headers = dict(
+            (part.strip() for part in header.split(":", 1))
+            for header in options["header"]
+        )
+        path = url.path or "/"
+        if url.query:
+            path = f"{path}?{url.query}"
+
+        started = time.perf_counter()
+        measure_from = started + options["warmup"]
+        stop_at = measure_from + options["duration"]
+        timings, errors = [], []
+        lock = threading.Lock()
+
+        def client():
+            connection_class = (
+                http.client.HTTPSConnection
+                if url.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            connection = connection_class(url.hostname, url.port, timeout=30)
+            local_timings, local_errors = [], []
+            while True:
+                start = time.perf_counter()
+                if start >= stop_at:
+                    break
+                try:
+                    connection.request("GET", path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    ok = response.status < 400
+                except (OSError, http.client.HTTPException) as e:
+                    connection.close()
+                    ok, response = False, e
+                elapsed = time.perf_counter() - start
+                if start < measure_from:
+                    continue
+                if ok:
+                    local_timings.append(elapsed)
+                else:
+                    local_errors.append(getattr(response, "status", repr(response)))
+            connection.close()
+            with lock:
+                timings.extend(local_timings)
+                errors.extend(local_errors)
+
+        threads = [
+            threading.Thread(target=client) for _ in range(options["concurrency"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if not timings:
+            raise CommandError(f"Ни одного успешного ответа, ошибки: {errors[:5]}")
+        rps = len(timings) / options["duration"]
+        self.stdout.write(
+            f"{options['url']}  c={options['concurrency']}  "
+            f"запросов: {len(timings)}  ошибок: {len(errors)}  RPS: {rps:.1f}  "
+            + "  ".join(
+                f"p{q}: {percentile(timings, q) * 1000:.1f} мс" for q in (50, 95, 99)
+            )
+        )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from apps.projects.models import Project
+from apps.projects.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Пересобирает полнотекстовый search_vector у проектов пачками."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Сколько проектов пересобирать одним UPDATE.",
+        )
+        parser.add_argument(
+            "--only-missing",
+            action="store_true",
+            help="Только проекты, у которых search_vector ещё не заполнен.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        base = Project.objects.all()
+        if options["only_missing"]:
+            base = base.filter(search_vector__isnull=True)
+        updated = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                base.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            updated += update_search_vectors(Project.objects.filter(pk__in=pks))
+            last_pk = pks[-1]
+        self.stdout.write(self.style.SUCCESS(f"Проиндексировано проектов: {updated}"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from apps.projects.counters import recount_counters
+from apps.projects.models import Project
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает денормализованные likes_count/comments_count у проектов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Сколько проектов обрабатывать одним UPDATE (по диапазону id).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        fixed = 0
+        last_pk = 0
+        while True:
+            # Идём по диапазонам первичного ключа, чтобы не держать долгих блокировок
+            pks = list(
+                Project.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            fixed += recount_counters(
+                Project.objects.filter(pk__gte=pks[0], pk__lte=pks[-1])
+            )
+            last_pk = pks[-1]
+        self.stdout.write(self.style.SUCCESS(f"Исправлено проектов: {fixed}"))
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.projects.seeding import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Добавляет в БД синтетических пользователей, проекты, лайки и комментарии "
+        "(Ципф-распределение) для бенчмарков. Не запускать на боевой базе."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--projects", type=int, default=1000)
+        parser.add_argument("--likes", type=int, default=5000)
+        parser.add_argument("--comments", type=int, default=2000)
+        parser.add_argument(
+            "--media", type=int, default=1, help="Медиафайлов на проект в среднем."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Сколько строк вставлять одним INSERT.",
+        )
+
+    def handle(self, *args, **options):
+        if (
+            min(options[name] for name in ("users", "projects", "likes", "comments"))
+            < 0
+        ):
+            raise CommandError("Количества не могут быть отрицательными.")
+        started = time.perf_counter()
+        result = seed(
+            users=options["users"],
+            projects=options["projects"],
+            likes=options["likes"],
+            comments=options["comments"],
+            media_per_project=options["media"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Пользователей: {result.users}, проектов: {result.projects}, "
+                f"лайков: {result.likes}, комментариев: {result.comments}, "
+                f"медиа: {result.media} за {elapsed:.1f} с"
+            )
+        )
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Project = apps.get_model("projects", "Project")
+    Like = apps.get_model("projects", "Like")
+    Comment = apps.get_model("projects", "Comment")
+
+    def count_of(model):
+        rows = (
+            model.objects.filter(project=OuterRef("pk"))
+            .order_by()
+            .values("project")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return Coalesce(Subquery(rows), 0)
+
+    Project.objects.update(likes_count=count_of(Like), comments_count=count_of(Comment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0002_alter_projectmedia_file"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="comments_count",
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="likes_count",
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
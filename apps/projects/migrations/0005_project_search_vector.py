@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:23
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_search_vector(apps, schema_editor):
+    # Та же формула, что в apps/projects/search.py, но на исторических моделях
+    Project = apps.get_model("projects", "Project")
+    TaggedItem = apps.get_model("taggit", "TaggedItem")
+    config = getattr(settings, "PROJECT_SEARCH_CONFIG", "simple")
+
+    def names(rows, group_by, name_path):
+        return Subquery(
+            rows.order_by()
+            .values(group_by)
+            .annotate(names=StringAgg(name_path, delimiter=" "))
+            .values("names")
+        )
+
+    tags = names(
+        TaggedItem.objects.filter(
+            content_type__app_label="projects",
+            content_type__model="project",
+            object_id=OuterRef("pk"),
+        ),
+        "object_id",
+        "tag__name",
+    )
+    technologies = names(
+        Project.technologies.through.objects.filter(project=OuterRef("pk")),
+        "project",
+        "technology__name",
+    )
+    Project.objects.update(
+        search_vector=SearchVector("title", weight="A", config=config)
+        + SearchVector(tags, technologies, weight="B", config=config)
+        + SearchVector("description", weight="C", config=config)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("projects", "0004_keyset_indexes"),
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="project_search_vector_gin"
+            ),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:26
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0005_project_search_vector"),
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="project",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"], name="project_title_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="technology",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="technology_name_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        # Tag принадлежит taggit, поэтому его индекс создаём вручную
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS taggit_tag_name_trgm "
+            "ON taggit_tag USING gin (name gin_trgm_ops);",
+            "DROP INDEX IF EXISTS taggit_tag_name_trgm;",
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0006_trigram_suggest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="technology",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0007_technology_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="main_image_derivatives",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="projectmedia",
+            name="file_derivatives",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="projectmedia",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Cast, Concat, LPad
+
+
+def backfill_paths(apps, schema_editor):
+    # Все существующие комментарии — корневые: путь из одного сегмента
+    Comment = apps.get_model("projects", "Comment")
+    Comment.objects.update(
+        path=Concat(
+            LPad(Cast("id", models.CharField()), 10, Value("0")),
+            Value("/"),
+            output_field=models.CharField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0009_upload_session"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="replies",
+                to="projects.comment",
+            ),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="path",
+            field=models.CharField(
+                blank=True, db_collation="C", editable=False, max_length=255
+            ),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["project", "path"], name="comment_project_path_idx"
+            ),
+        ),
+    ]
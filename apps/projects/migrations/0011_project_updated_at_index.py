@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0010_comment_threads"),
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(fields=["updated_at"], name="project_updated_at_idx"),
+        ),
+    ]
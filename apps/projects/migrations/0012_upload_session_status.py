@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0011_project_updated_at_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadsession",
+            name="error",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="uploadsession",
+            name="media",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="projects.projectmedia",
+            ),
+        ),
+        migrations.AddField(
+            model_name="uploadsession",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("uploading", "Uploading"),
+                    ("processing", "Processing"),
+                    ("complete", "Complete"),
+                    ("failed", "Failed"),
+                ],
+                default="uploading",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -1,7 +1,12 @@
-from django.db import models  # models.Manager будет доступен через models
+import uuid
+
+from django.db import models, transaction  # models.Manager будет доступен через models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from taggit.managers import TaggableManager
-from django.utils.text import slugify
+
+from .slugs import save_with_unique_slug
 
 
 def project_main_image_upload_path(instance, filename):  # Переименовал для ясности
@@ -16,20 +21,29 @@ def project_media_upload_path(instance, filename):
 class Technology(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        # Убедимся, что даже если slug задан, он корректен (на случай прямого присвоения)
-        # В данном случае, если задан, то доверяем. Если нет, то генерируем.
-        # Для уникальности при генерации, если потребуется, можно добавить логику как в Project.
-        super().save(*args, **kwargs)  # Вызываем super() один раз в конце
+        if self.slug:
+            return super().save(*args, **kwargs)
+        # "C++" и "C" дают один slugify — подбираем свободный так же, как в Project
+        return save_with_unique_slug(
+            self, self.name, lambda: super(Technology, self).save(*args, **kwargs)
+        )
 
     def __str__(self):
         return self.name
 
     class Meta:
         verbose_name_plural = "Technologies"
+        indexes = [
+            # Триграммный индекс под автодополнение (/api/suggest/)
+            GinIndex(
+                fields=["name"],
+                opclasses=["gin_trgm_ops"],
+                name="technology_name_trgm",
+            ),
+        ]
 
 
 class Project(models.Model):
@@ -44,6 +58,8 @@ class Project(models.Model):
         null=True,
         blank=True,
     )
+    # Уменьшенные копии main_image (см. apps/core/images.py), строятся фоновой задачей
+    main_image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     project_url = models.URLField(blank=True, null=True)
     repository_url = models.URLField(blank=True, null=True)
 
@@ -52,6 +68,15 @@ class Project(models.Model):
     )
     tags = TaggableManager(blank=True)
 
+    # Денормализованные счётчики. Поддерживаются атомарными F()-обновлениями
+    # из сигналов (см. signals.py), расхождения чинит recount_project_counters.
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
+    # Полнотекстовый документ (title > tags/technologies > description).
+    # Обновляется сигналами, см. search.py и rebuild_search_index.
+    search_vector = SearchVectorField(null=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -60,41 +85,34 @@ class Project(models.Model):
     media_files: "models.Manager[ProjectMedia]"
 
     def save(self, *args, **kwargs):
-        if not self.slug:  # Генерируем слаг только если он не предоставлен
-            base_slug = slugify(self.title)
-            # Если слаг пустой после slugify (например, название было "---"), генерируем что-то
-            if not base_slug:
-                import uuid
-
-                base_slug = str(uuid.uuid4())[:8]  # Короткий UUID как крайний случай
-
-            slug_candidate = base_slug
-            counter = 1
-            # Проверяем существование слагов, исключая текущий объект, если он уже сохранен (при обновлении)
-            qs_filter = {"slug__iexact": slug_candidate}
-            # Используем self._state.adding чтобы понять, создается ли новый объект
-            if not self._state.adding and self.pk is not None:
-                qs = Project.objects.filter(**qs_filter).exclude(pk=self.pk)
-            else:
-                qs = Project.objects.filter(**qs_filter)
-
-            while qs.exists():
-                slug_candidate = f"{base_slug}-{counter}"
-                counter += 1
-                # Обновляем фильтр для следующей итерации
-                qs_filter["slug__iexact"] = slug_candidate
-                if not self._state.adding and self.pk is not None:
-                    qs = Project.objects.filter(**qs_filter).exclude(pk=self.pk)
-                else:
-                    qs = Project.objects.filter(**qs_filter)
-            self.slug = slug_candidate
-        super().save(*args, **kwargs)
+        if self.slug:  # Слаг задан явно (админка, импорт) — доверяем ему
+            return super().save(*args, **kwargs)
+        # Свободный base-N подбирается одним запросом, гонки ловит уникальный индекс
+        return save_with_unique_slug(
+            self, self.title, lambda: super(Project, self).save(*args, **kwargs)
+        )
 
     def __str__(self):
         return self.title
 
     class Meta:
         ordering = ["-created_at"]
+        # Составные индексы под keyset-пагинацию: (ключ сортировки, id).
+        # B-tree читается в обе стороны, так что одного индекса хватает на asc/desc.
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="project_created_id_idx"),
+            models.Index(fields=["likes_count", "id"], name="project_likes_id_idx"),
+            models.Index(
+                fields=["comments_count", "id"], name="project_comments_id_idx"
+            ),
+            models.Index(fields=["title", "id"], name="project_title_id_idx"),
+            # MAX(updated_at)/COUNT для ETag списка — index-only scan вместо чтения таблицы
+            models.Index(fields=["updated_at"], name="project_updated_at_idx"),
+            GinIndex(fields=["search_vector"], name="project_search_vector_gin"),
+            GinIndex(
+                fields=["title"], opclasses=["gin_trgm_ops"], name="project_title_trgm"
+            ),
+        ]
 
 
 class ProjectMedia(models.Model):
@@ -112,28 +130,114 @@ class ProjectMedia(models.Model):
     )
     file_type = models.CharField(max_length=10, choices=FILE_TYPES, default="image")
     caption = models.CharField(max_length=255, blank=True)
+    # Производные только для file_type="image"
+    file_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.caption or self.file_type} for {self.project.title}"
 
 
+class UploadSession(models.Model):
+    """
+    Возобновляемая загрузка большого файла частями (см. uploads.py).
+    Байты копятся во временном файле, received — сколько уже принято подряд.
+    """
+
+    class Status(models.TextChoices):
+        UPLOADING = "uploading", "Uploading"
+        PROCESSING = "processing", "Processing"
+        COMPLETE = "complete", "Complete"
+        FAILED = "failed", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(
+        Project, related_name="upload_sessions", on_delete=models.CASCADE
+    )
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="upload_sessions",
+        on_delete=models.CASCADE,
+    )
+    filename = models.CharField(max_length=255)
+    file_type = models.CharField(
+        max_length=10, choices=ProjectMedia.FILE_TYPES, default="video"
+    )
+    caption = models.CharField(max_length=255, blank=True)
+    size = models.PositiveBigIntegerField()
+    # Необязательная SHA-256 всего файла, сверяется при завершении
+    sha256 = models.CharField(max_length=64, blank=True)
+    received = models.PositiveBigIntegerField(default=0)
+    # complete ставит задачу projects.finish_upload, она сверяет и копирует файл
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.UPLOADING
+    )
+    media = models.ForeignKey(
+        ProjectMedia, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size}) for {self.project}"
+
+
 class Comment(models.Model):
+    # Сегмент материализованного пути: id с нулями слева, чтобы строки
+    # сортировались как числа. Путь ответа = путь родителя + свой сегмент.
+    PATH_SEGMENT_WIDTH = 10
+
     project = models.ForeignKey(
         Project, on_delete=models.CASCADE, related_name="comments"
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="comments"
     )
+    parent = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="replies",
+    )
+    # "0000000012/0000000034/": ветка целиком — один диапазон по индексу (project, path).
+    # Collation "C" — побайтовое сравнение, тогда LIKE 'prefix%' идёт по обычному B-tree.
+    path = models.CharField(
+        max_length=255, blank=True, editable=False, db_collation="C"
+    )
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding or self.path:
+            return super().save(*args, **kwargs)
+        # Сегмент — это id, а он известен только после INSERT
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            prefix = self.parent.path if self.parent_id else ""
+            self.path = f"{prefix}{self.pk:0{self.PATH_SEGMENT_WIDTH}d}/"
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
+    @property
+    def depth(self):
+        """0 — комментарий к проекту, 1 — ответ на него и т.д."""
+        return max(self.path.count("/") - 1, 0)
+
     def __str__(self):
         return f"Comment by {self.author} on {self.project}"
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["project", "created_at", "id"],
+                name="comment_project_created_idx",
+            ),
+            models.Index(fields=["project", "path"], name="comment_project_path_idx"),
+        ]
 
 
 class Like(models.Model):
@@ -0,0 +1,90 @@
+# Файл: apps/projects/search.py
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, OuterRef, Subquery, Value
+from django.utils import timezone
+from taggit.models import TaggedItem
+
+from .models import Project
+
+
+def search_config():
+    return getattr(settings, "PROJECT_SEARCH_CONFIG", "simple")
+
+
+def _names_subquery(rows, group_by, name_path):
+    """Имена связанных объектов одной строкой: string_agg(name, ' ')."""
+    return Subquery(
+        rows.order_by()
+        .values(group_by)
+        .annotate(names=StringAgg(name_path, delimiter=" "))
+        .values("names")
+    )
+
+
+def search_vector_expression(title="title", description="description", related=True):
+    """
+    Взвешенный документ проекта: заголовок (A) > теги и технологии (B) > описание (C).
+    Теги и технологии берутся коррелированными подзапросами, поэтому выражение
+    годится для одного UPDATE по любому набору проектов без JOIN'ов.
+    """
+    config = search_config()
+    vector = SearchVector(title, weight="A", config=config)
+    if related:
+        tags = _names_subquery(
+            TaggedItem.objects.filter(
+                content_type=ContentType.objects.get_for_model(Project),
+                object_id=OuterRef("pk"),
+            ),
+            "object_id",
+            "tag__name",
+        )
+        technologies = _names_subquery(
+            Project.technologies.through.objects.filter(project=OuterRef("pk")),
+            "project",
+            "technology__name",
+        )
+        vector += SearchVector(tags, technologies, weight="B", config=config)
+    return vector + SearchVector(description, weight="C", config=config)
+
+
+def search_vector_for_save(project):
+    """
+    Документ для записи в том же INSERT/UPDATE, что и сама строка проекта.
+    Заголовок и описание — значениями: в UPDATE столбцы справа от SET ещё старые,
+    а в INSERT на них нельзя ссылаться. Тегов и технологий у новой строки нет.
+    """
+    return search_vector_expression(
+        Value(project.title),
+        Value(project.description),
+        related=not project._state.adding,
+    )
+
+
+def update_search_vectors(queryset, touch=False):
+    """
+    Пересобирает search_vector для проектов из queryset одним UPDATE.
+    touch=True заодно двигает updated_at — для изменений тегов и технологий,
+    которые сами по себе строку проекта не сохраняют.
+    """
+    fields = {"search_vector": search_vector_expression()}
+    if touch:
+        fields["updated_at"] = timezone.now()
+    return queryset.order_by().update(**fields)
+
+
+def refresh_projects(project_ids, touch=False):
+    project_ids = list(project_ids)
+    if project_ids:
+        update_search_vectors(Project.objects.filter(pk__in=project_ids), touch=touch)
+
+
+def search_projects(queryset, terms):
+    """websearch_to_tsquery по GIN-индексу + ts_rank в аннотации search_rank."""
+    query = SearchQuery(terms, search_type="websearch", config=search_config())
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F("search_vector"), query)
+    )
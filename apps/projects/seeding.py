@@ -0,0 +1,281 @@
+# Файл: apps/projects/seeding.py
+
+import itertools
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+from taggit.models import TaggedItem
+
+from . import cache
+from .batch import resolve_tags
+from .counters import recount_counters
+from .models import Comment, Like, Project, ProjectMedia, Technology
+from .search import update_search_vectors
+from .slugs import assign_unique_slugs
+
+# Синтетические данные для бенчмарков (manage.py seed_benchmark): всё через
+# bulk_create пачками, сигналы не срабатывают — счётчики, search_vector и версии
+# кэша ответов досчитываются одним проходом в конце.
+
+TECHNOLOGIES = (
+    "Python", "Django", "Django REST Framework", "FastAPI", "Flask", "Celery",
+    "PostgreSQL", "Redis", "RabbitMQ", "Kafka", "Elasticsearch", "ClickHouse",
+    "Docker", "Kubernetes", "Terraform", "Nginx", "AWS", "MinIO", "Linux",
+    "JavaScript", "TypeScript", "React", "Vue", "Svelte", "Next.js", "Node.js",
+    "Go", "Rust", "Java", "Kotlin", "Swift", "C++", "C#", ".NET", "PHP",
+    "GraphQL", "gRPC", "WebSocket", "Pandas", "NumPy", "PyTorch", "TensorFlow",
+    "scikit-learn", "OpenCV", "Airflow", "Spark", "Grafana", "Prometheus",
+)  # fmt: skip
+
+TAGS = (
+    "backend", "frontend", "fullstack", "api", "cli", "bot", "telegram", "ml",
+    "data", "devops", "mobile", "game", "open-source", "pet-project", "startup",
+    "e-commerce", "fintech", "education", "health", "iot", "security",
+    "automation", "parser", "dashboard", "analytics", "saas", "microservices",
+    "realtime", "chat", "blog", "portfolio", "crm", "search", "maps", "hackathon",
+)  # fmt: skip
+
+WORDS = (
+    "сервис", "платформа", "система", "бот", "трекер", "каталог", "агрегатор",
+    "планировщик", "магазин", "маркетплейс", "парсер", "анализ", "мониторинг",
+    "учёт", "задач", "заказов", "финансов", "погоды", "курсов", "новостей",
+    "service", "platform", "tracker", "dashboard", "engine", "toolkit", "api",
+    "realtime", "smart", "open", "cloud", "mini", "fast", "simple", "data",
+)  # fmt: skip
+
+SEED_PASSWORD = "benchmark"
+MEDIA_CAPTIONS = ("Скриншот", "Главная страница", "Архитектура", "Демо", "")
+
+
+@dataclass
+class SeedResult:
+    users: int = 0
+    projects: int = 0
+    likes: int = 0
+    comments: int = 0
+    media: int = 0
+    project_ids: list = field(default_factory=list, repr=False)
+
+
+def zipf_weights(n, exponent=1.1):
+    """Накопленные веса закона Ципфа для рангов 1..n (для random.choices)."""
+    return list(itertools.accumulate(1 / rank**exponent for rank in range(1, n + 1)))
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _sentence(rng, low, high):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+class Seeder:
+    def __init__(self, seed=0, batch_size=2000, zipf_exponent=1.1):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.zipf_exponent = zipf_exponent
+        # Метка прогона в username/url: повторный посев не упрётся в уникальность
+        self.tag = uuid.uuid4().hex[:8]
+
+    def users(self, count):
+        User = get_user_model()
+        # Хэш пароля считается один раз: PBKDF2 на каждого — минуты на 100k
+        password = make_password(SEED_PASSWORD)
+        rows = [
+            User(
+                username=f"bench-{self.tag}-{n}",
+                email=f"bench-{self.tag}-{n}@example.com",
+                password=password,
+            )
+            for n in range(count)
+        ]
+        created = []
+        for chunk in _chunks(rows, self.batch_size):
+            created.extend(User.objects.bulk_create(chunk))
+        return [user.pk for user in created]
+
+    def technologies(self):
+        existing = set(Technology.objects.values_list("name", flat=True))
+        missing = [
+            Technology(name=name) for name in TECHNOLOGIES if name not in existing
+        ]
+        Technology.objects.bulk_create(
+            assign_unique_slugs(missing, "name"), ignore_conflicts=True
+        )
+        return list(
+            Technology.objects.filter(name__in=TECHNOLOGIES).values_list(
+                "pk", flat=True
+            )
+        )
+
+    def projects(self, count, owner_ids, technology_ids):
+        rng = self.rng
+        tags = list(resolve_tags(TAGS).values())
+        content_type = ContentType.objects.get_for_model(Project)
+        through = Project.technologies.through
+        now = timezone.now()
+        project_ids = []
+        for chunk in _chunks(range(count), self.batch_size):
+            rows = [
+                Project(
+                    owner_id=rng.choice(owner_ids),
+                    title=_sentence(rng, 2, 5).capitalize(),
+                    description=_sentence(rng, 20, 80),
+                    repository_url=f"https://github.com/bench/{self.tag}-{n}",
+                )
+                for n in chunk
+            ]
+            created = Project.objects.bulk_create(assign_unique_slugs(rows, "title"))
+            # created_at размазан по году: иначе у всех строк одна метка времени
+            for project in created:
+                project.created_at = now - timedelta(
+                    seconds=rng.randint(0, 365 * 86400)
+                )
+            Project.objects.bulk_update(created, ["created_at"])
+            through.objects.bulk_create(
+                [
+                    through(project_id=project.pk, technology_id=pk)
+                    for project in created
+                    for pk in rng.sample(technology_ids, rng.randint(1, 6))
+                ]
+            )
+            TaggedItem.objects.bulk_create(
+                [
+                    TaggedItem(content_type=content_type, object_id=project.pk, tag=tag)
+                    for project in created
+                    for tag in rng.sample(tags, rng.randint(0, 5))
+                ]
+            )
+            project_ids.extend(project.pk for project in created)
+        return project_ids
+
+    def _popular(self, project_ids, count):
+        """count проектов с Ципф-распределением: немногие получают почти всё."""
+        ranked = list(project_ids)
+        self.rng.shuffle(ranked)
+        weights = zipf_weights(len(ranked), self.zipf_exponent)
+        return self.rng.choices(ranked, cum_weights=weights, k=count)
+
+    def likes(self, count, project_ids, user_ids):
+        # Пара (проект, пользователь) уникальна: популярный проект упирается
+        # в число пользователей, поэтому лайков может выйти меньше count
+        pairs = {
+            (project_id, self.rng.choice(user_ids))
+            for project_id in self._popular(project_ids, count)
+        }
+        created = 0
+        for chunk in _chunks(list(pairs), self.batch_size):
+            created += len(
+                Like.objects.bulk_create(
+                    [Like(project_id=p, user_id=u) for p, u in chunk],
+                    ignore_conflicts=True,
+                )
+            )
+        return created
+
+    def comments(self, count, project_ids, user_ids, reply_share=0.3):
+        rng = self.rng
+        targets = self._popular(project_ids, count)
+        replies = int(count * reply_share)
+        roots = self._insert_comments(
+            [
+                Comment(project_id=project_id, author_id=rng.choice(user_ids))
+                for project_id in targets[replies:]
+            ],
+            rng,
+        )
+        if roots and replies:
+            self._insert_comments(
+                [
+                    Comment(
+                        project_id=parent.project_id,
+                        author_id=rng.choice(user_ids),
+                        parent=parent,
+                    )
+                    for parent in rng.choices(roots, k=replies)
+                ],
+                rng,
+            )
+        return count if roots else 0
+
+    def _insert_comments(self, rows, rng):
+        created = []
+        width = Comment.PATH_SEGMENT_WIDTH
+        for chunk in _chunks(rows, self.batch_size):
+            for comment in chunk:
+                comment.text = _sentence(rng, 3, 30)
+            inserted = Comment.objects.bulk_create(chunk)
+            # Путь строится из id, поэтому вторым проходом, как в Comment.save()
+            for comment in inserted:
+                prefix = comment.parent.path if comment.parent_id else ""
+                comment.path = f"{prefix}{comment.pk:0{width}d}/"
+            Comment.objects.bulk_update(inserted, ["path"])
+            created.extend(inserted)
+        return created
+
+    def media(self, per_project, project_ids):
+        rng = self.rng
+        rows = [
+            ProjectMedia(
+                project_id=project_id,
+                file=f"projects/media/bench/{self.tag}-{project_id}-{n}.jpg",
+                caption=rng.choice(MEDIA_CAPTIONS),
+            )
+            for project_id in project_ids
+            for n in range(rng.randint(0, per_project * 2))
+        ]
+        for chunk in _chunks(rows, self.batch_size):
+            ProjectMedia.objects.bulk_create(chunk)
+        return len(rows)
+
+    def finalize(self, project_ids):
+        """То, что обычно делают сигналы: счётчики, search_vector, версии кэша."""
+        for chunk in _chunks(sorted(project_ids), self.batch_size):
+            page = Project.objects.filter(pk__gte=chunk[0], pk__lte=chunk[-1])
+            recount_counters(page)
+            update_search_vectors(page)
+        cache.bump_catalog()
+
+
+def seed(
+    users=100,
+    projects=1000,
+    likes=5000,
+    comments=2000,
+    media_per_project=1,
+    seed=0,
+    batch_size=2000,
+):
+    """Добавляет синтетические данные к тем, что уже есть в БД."""
+    seeder = Seeder(seed=seed, batch_size=batch_size)
+    result = SeedResult()
+    with transaction.atomic():
+        user_ids = seeder.users(users)
+        result.users = len(user_ids)
+        # Лайки и комментарии ставят и уже существующие пользователи
+        user_ids = user_ids or list(
+            get_user_model().objects.values_list("pk", flat=True)
+        )
+        if not user_ids or not projects:
+            return result
+        technology_ids = seeder.technologies()
+        project_ids = seeder.projects(projects, user_ids, technology_ids)
+        result.projects = len(project_ids)
+        result.project_ids = project_ids
+        if likes:
+            result.likes = seeder.likes(likes, project_ids, user_ids)
+        if comments:
+            result.comments = seeder.comments(comments, project_ids, user_ids)
+        if media_per_project:
+            result.media = seeder.media(media_per_project, project_ids)
+        seeder.finalize(project_ids)
+    return result
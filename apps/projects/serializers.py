@@ -1,7 +1,12 @@
+import os
+import re
+from django.conf import settings
 from rest_framework import serializers
-from .models import Project, Technology, Comment, Like, ProjectMedia
+from .models import Project, Technology, Comment, Like, ProjectMedia, UploadSession
 from taggit.serializers import (TagListSerializerField, TaggitSerializer)
 from apps.users.serializers import UserSerializer # Чтобы видеть информацию о пользователе
+from apps.core.images import is_stale, pick
+from apps.core.serializers import SrcsetField, media_url
 
 
 class TechnologySerializer(serializers.ModelSerializer):
@@ -11,12 +16,52 @@ class TechnologySerializer(serializers.ModelSerializer):
 
 
 class ProjectMediaSerializer(serializers.ModelSerializer):
+    file_srcset = SrcsetField('file')
+
     class Meta:
         model = ProjectMedia
-        fields = ['id', 'project', 'file', 'file_type', 'caption', 'uploaded_at']
+        fields = ['id', 'project', 'file', 'file_srcset', 'file_type', 'caption', 'uploaded_at']
         read_only_fields = ['project'] # Устанавливается во view при создании
 
 
+class UploadSessionSerializer(serializers.ModelSerializer):
+    offset = serializers.ReadOnlyField(source='received') # С какого байта слать следующую часть
+    max_chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'file_type', 'caption', 'size', 'sha256', 'offset', 'max_chunk_size', 'status', 'media', 'error', 'expires_at']
+        read_only_fields = ['id', 'status', 'media', 'error', 'expires_at']
+
+    def get_max_chunk_size(self, obj):
+        return settings.UPLOAD_CHUNK_MAX_SIZE
+
+    def validate_filename(self, value):
+        # Только имя файла: путь внутри storage строит project_media_upload_path
+        name = os.path.basename(value.replace('\\', '/'))
+        if not name:
+            raise serializers.ValidationError("Filename is required.")
+        return name
+
+    def validate_size(self, value):
+        if value < 1 or value > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"Size must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes.")
+        return value
+
+    def validate_sha256(self, value):
+        if value and not re.fullmatch(r'[0-9a-fA-F]{64}', value):
+            raise serializers.ValidationError("Expected a hex SHA-256 digest.")
+        return value.lower()
+
+
+class UploadIntentSerializer(UploadSessionSerializer):
+    # Подписывается в presigned URL: S3 не примет объект с другим типом
+    content_type = serializers.CharField(max_length=255, default='application/octet-stream')
+
+    class Meta(UploadSessionSerializer.Meta):
+        fields = ['filename', 'file_type', 'caption', 'size', 'sha256', 'content_type']
+
+
 class ProjectSerializer(TaggitSerializer, serializers.ModelSerializer):
     # owner = UserSerializer(read_only=True) # Показывает детальную информацию об авторе (только для чтения)
     owner_username = serializers.ReadOnlyField(source='owner.username') # Проще - только имя пользователя
@@ -27,9 +72,11 @@ class ProjectSerializer(TaggitSerializer, serializers.ModelSerializer):
     technology_ids = serializers.PrimaryKeyRelatedField(
         queryset=Technology.objects.all(), source='technologies', many=True, write_only=True, required=False
     )
-    
-    comments_count = serializers.IntegerField(source='comments.count', read_only=True)
-    likes_count = serializers.IntegerField(source='likes.count', read_only=True)
+    main_image_srcset = SrcsetField('main_image') # WebP/JPEG копии разных ширин
+    # Относительно зрителя: is_liked — аннотация Exists из ProjectViewSet.get_queryset,
+    # is_owner — сравнение owner_id; ни то ни другое не делает запроса на строку
+    is_liked = serializers.SerializerMethodField()
+    is_owner = serializers.SerializerMethodField()
     
     # Если хотим показать вложенные media_files при чтении
     # media_files = ProjectMediaSerializer(many=True, read_only=True) 
@@ -37,14 +84,33 @@ class ProjectSerializer(TaggitSerializer, serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = [
-            'id', 'slug', 'title', 'description', 'main_image', 'project_url', 'repository_url',
+            'id', 'slug', 'title', 'description', 'main_image', 'main_image_srcset', 'project_url', 'repository_url',
             'owner_username', 'owner_id', 'tags', 'technologies', 'technology_ids',
-            'created_at', 'updated_at', 'comments_count', 'likes_count'
+            'created_at', 'updated_at', 'comments_count', 'likes_count', 'is_liked', 'is_owner'
             # 'media_files'
         ]
         read_only_fields = ('slug', 'owner_username', 'owner_id', 'created_at', 'updated_at', 'comments_count', 'likes_count')
         # `main_image` не будет required при PATCH, но required при POST (DRF по умолчанию так и делает)
 
+    def get_is_liked(self, obj):
+        # Нет аннотации — аноним или только что созданный проект
+        return bool(getattr(obj, 'is_liked', False))
+
+    def get_is_owner(self, obj):
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_authenticated and obj.owner_id == user.pk)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # В списках вместо оригинала отдаём копию под ширину карточки (thumbnail_width из view)
+        width = self.context.get('thumbnail_width')
+        if width and data.get('main_image') and not is_stale(instance, 'main_image'):
+            key = pick(instance.main_image_derivatives, width)
+            if key:
+                data['main_image'] = media_url(instance.main_image.storage, key, self.context.get('request'))
+        return data
+
     def create(self, validated_data):
         # Убедимся, что 'technologies' корректно обработан (из technology_ids)
         if 'technologies' in validated_data:
@@ -65,14 +131,42 @@ class ProjectSerializer(TaggitSerializer, serializers.ModelSerializer):
         return instance
 
 
+class ProjectBatchItemSerializer(serializers.ModelSerializer):
+    # Только проверка полей элемента пачки; запись и проверку ссылок делает batch.py,
+    # поэтому здесь нет PrimaryKeyRelatedField и UniqueValidator (запросов на элемент)
+    slug = serializers.SlugField(max_length=220, required=False) # Есть — обновляем проект, нет — создаём
+    tags = TagListSerializerField(required=False)
+    technology_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+
+    class Meta:
+        model = Project
+        fields = ['slug', 'title', 'description', 'project_url', 'repository_url', 'tags', 'technology_ids']
+
+
 class CommentSerializer(serializers.ModelSerializer):
-    author_username = serializers.ReadOnlyField(source='author.username')
+    author_username = serializers.ReadOnlyField(source='author.username') # author подтягивается select_related во view
+    depth = serializers.ReadOnlyField()
 
     class Meta:
         model = Comment
-        fields = ['id', 'project', 'author_username', 'text', 'created_at', 'updated_at']
+        fields = ['id', 'project', 'parent', 'depth', 'author_username', 'text', 'created_at', 'updated_at']
         read_only_fields = ['author_username', 'project', 'created_at', 'updated_at']
 
+    def validate_parent(self, parent):
+        # project кладёт в context CommentListCreateView
+        project = self.context.get('project')
+        if parent is not None:
+            if project is not None and parent.project_id != project.pk:
+                raise serializers.ValidationError("Parent comment belongs to another project.")
+            if parent.depth + 1 >= settings.COMMENT_MAX_DEPTH:
+                raise serializers.ValidationError("Reply is nested too deep.")
+        return parent
+
+    def update(self, instance, validated_data):
+        # Ответ нельзя перевесить в другую ветку: path уже посчитан
+        validated_data.pop('parent', None)
+        return super().update(instance, validated_data)
+
 
 class LikeSerializer(serializers.ModelSerializer):
     user_username = serializers.ReadOnlyField(source='user.username')
@@ -0,0 +1,243 @@
+# Файл: apps/projects/signals.py
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from taggit.models import Tag, TaggedItem
+
+from apps.core.images import is_stale
+from apps.jobs.queue import enqueue
+
+from . import cache, search
+from .counters import change_counter, counters_deferred
+from .models import Comment, Like, Project, ProjectMedia, Technology
+
+
+def _deleted_with_project(origin):
+    """Строка удаляется каскадом вместе с самим проектом — счётчик трогать незачем."""
+    if isinstance(origin, Project):
+        return True
+    return isinstance(origin, QuerySet) and origin.model is Project
+
+
+@receiver(post_save, sender=Like)
+def like_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(instance.project_id, "likes_count", 1)
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_project(origin) and not counters_deferred():
+        change_counter(instance.project_id, "likes_count", -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(instance.project_id, "comments_count", 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_project(origin):
+        change_counter(instance.project_id, "comments_count", -1)
+
+
+# --- Полнотекстовый индекс ---
+
+_M2M_ACTIONS = ("post_add", "post_remove", "post_clear")
+_SEARCH_FIELDS = {"title", "description"}
+
+
+@receiver(pre_save, sender=Project)
+def project_search_vector(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Полный save() пишет документ вместе со строкой — без второго UPDATE
+    if not raw and update_fields is None:
+        instance.search_vector = search.search_vector_for_save(instance)
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    # save(update_fields=[...]) без search_vector: пересобираем отдельно
+    if not raw and update_fields and _SEARCH_FIELDS & set(update_fields):
+        search.refresh_projects([instance.pk])
+
+
+@receiver(m2m_changed, sender=Project.technologies.through)
+def project_technologies_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # technology.projects.clear(): после очистки список проектов уже не получить
+        instance._search_cleared_ids = list(
+            instance.projects.values_list("pk", flat=True)
+        )
+        return
+    if action not in _M2M_ACTIONS:
+        return
+    if not reverse:
+        search.refresh_projects([instance.pk], touch=True)
+    elif action == "post_clear":
+        search.refresh_projects(
+            getattr(instance, "_search_cleared_ids", ()), touch=True
+        )
+    else:
+        search.refresh_projects(pk_set or (), touch=True)
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def project_tags_changed(sender, instance, action, **kwargs):
+    if action in _M2M_ACTIONS and isinstance(instance, Project):
+        search.refresh_projects([instance.pk], touch=True)
+
+
+@receiver(post_save, sender=Technology)
+def technology_saved(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        search.refresh_projects(
+            instance.projects.values_list("pk", flat=True), touch=True
+        )
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    project_ids = Project.objects.filter(tags=instance).values_list("pk", flat=True)
+    search.refresh_projects(project_ids, touch=True)
+
+
+@receiver(pre_delete, sender=Technology)
+@receiver(pre_delete, sender=Tag)
+def catalog_item_deleting(sender, instance, **kwargs):
+    # Строки связей удаляются каскадом без m2m_changed: проекты запоминаем заранее
+    projects = (
+        instance.projects.all()
+        if isinstance(instance, Technology)
+        else Project.objects.filter(tags=instance)
+    )
+    instance._search_project_ids = list(projects.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Technology)
+@receiver(post_delete, sender=Tag)
+def catalog_item_deleted(sender, instance, **kwargs):
+    search.refresh_projects(getattr(instance, "_search_project_ids", ()), touch=True)
+
+
+# --- Производные изображений ---
+
+
+@receiver(post_save, sender=Project)
+def project_image_changed(sender, instance, raw=False, **kwargs):
+    if not raw and is_stale(instance, "main_image"):
+        enqueue("projects.main_image_derivatives", args=[instance.pk], unique=True)
+
+
+@receiver(post_save, sender=ProjectMedia)
+def media_image_changed(sender, instance, raw=False, **kwargs):
+    if not raw and instance.file_type == "image" and is_stale(instance, "file"):
+        enqueue("projects.media_derivatives", args=[instance.pk], unique=True)
+
+
+# --- Версии ответного кэша ---
+
+
+@receiver(pre_save, sender=Project)
+def project_remember_slug(sender, instance, raw=False, **kwargs):
+    # Слаг меняется только из админки; старый адрес тоже надо инвалидировать
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_slug = (
+        Project.objects.filter(pk=instance.pk)
+        .exclude(slug=instance.slug)
+        .values_list("slug", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_changed_cache(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    cache.invalidate(cache.bump_project, instance.slug)
+    previous_slug = getattr(instance, "_previous_slug", None)
+    if previous_slug:
+        cache.invalidate(cache.bump_project, previous_slug)
+
+
+def _project_slug(instance):
+    """Слаг проекта строки: из уже загруженного project или одним SELECT slug."""
+    if type(instance).project.is_cached(instance):
+        return instance.project.slug
+    return (
+        Project.objects.filter(pk=instance.project_id)
+        .values_list("slug", flat=True)
+        .first()
+    )
+
+
+def _bump_counted_project(instance):
+    # Без ответного кэша версии не нужны — и лишний запрос за слагом тоже
+    if not getattr(settings, "RESPONSE_CACHE_ENABLED", True):
+        return
+    slug = _project_slug(instance)
+    if slug:
+        # Списки тоже: likes_count/comments_count в них и ?ordering=-likes_count
+        cache.invalidate(cache.bump_project, slug)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+def counted_row_created_cache(sender, instance, created, raw=False, **kwargs):
+    # Правка текста комментария не видна в выдаче проекта — важны только счётчики
+    if created and not raw:
+        _bump_counted_project(instance)
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def counted_row_deleted_cache(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_project(origin) and not counters_deferred():
+        _bump_counted_project(instance)
+
+
+@receiver(post_save, sender=ProjectMedia)
+@receiver(post_delete, sender=ProjectMedia)
+def media_changed_cache(sender, instance, origin=None, raw=False, **kwargs):
+    if raw or _deleted_with_project(origin):
+        return
+    if not getattr(settings, "RESPONSE_CACHE_ENABLED", True):
+        return
+    slug = _project_slug(instance)
+    if slug:
+        # Медиа не попадают в списки, поэтому глобальную версию не трогаем
+        cache.invalidate(cache.bump, cache.project_version_key(slug))
+
+
+@receiver(m2m_changed, sender=Project.technologies.through)
+@receiver(m2m_changed, sender=TaggedItem)
+def project_relations_changed_cache(sender, instance, action, reverse, **kwargs):
+    if action not in _M2M_ACTIONS:
+        return
+    if isinstance(instance, Project):
+        cache.invalidate(cache.bump_project, instance.slug)
+    elif isinstance(instance, Technology):
+        # technology.projects.add(...): затронутых проектов может быть много
+        cache.invalidate(cache.bump_catalog)
+
+
+@receiver(post_save, sender=Technology)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Technology)
+@receiver(post_delete, sender=Tag)
+def catalog_changed_cache(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        cache.invalidate(cache.bump_catalog)
@@ -0,0 +1,132 @@
+# Файл: apps/projects/slugs.py
+
+import re
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Сколько раз перевыбирать слаг, если параллельная вставка заняла его первой
+MAX_ATTEMPTS = 5
+
+
+def base_slug(text, max_length):
+    slug = slugify(text)[:max_length].strip("-")
+    # Если слаг пустой после slugify (например, название было "---"), генерируем что-то
+    return slug or uuid.uuid4().hex[:8]
+
+
+def _fit(base, suffix, max_length):
+    """base-N, укороченный так, чтобы влезть в max_length поля."""
+    if not suffix:
+        return base
+    tail = f"-{suffix}"
+    return base[: max_length - len(tail)].rstrip("-") + tail
+
+
+def _pattern(base):
+    return re.compile(rf"^{re.escape(base)}(?:-(\d+))?$")
+
+
+def taken_slugs(model, bases, exclude_pk=None):
+    """
+    Все занятые слаги вида base и base-N для набора bases — одним запросом.
+    startswith идёт по индексу varchar_pattern_ops, который Django
+    создаёт для уникального SlugField в PostgreSQL, а regex внутри этого
+    диапазона отсекает чужие слаги (portfolio-site для portfolio) ещё в БД.
+    """
+    condition = Q()
+    for base in set(bases):
+        condition |= Q(slug=base) | Q(
+            slug__startswith=f"{base}-", slug__regex=rf"^{re.escape(base)}-[0-9]+$"
+        )
+    qs = model._default_manager.filter(condition)
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    return set(qs.values_list("slug", flat=True))
+
+
+def next_free(base, taken, max_length):
+    """base, если свободен, иначе base-(наибольший занятый суффикс + 1)."""
+    if base not in taken:
+        return base
+    pattern = _pattern(base)
+    suffixes = [
+        int(match.group(1) or 0) for match in map(pattern.match, taken) if match
+    ]
+    suffix = max(suffixes) + 1
+    candidate = _fit(base, suffix, max_length)
+    while candidate in taken:  # только если base пришлось укоротить
+        suffix += 1
+        candidate = _fit(base, suffix, max_length)
+    return candidate
+
+
+def save_with_unique_slug(instance, source, save):
+    """
+    Подбирает свободный слаг одним SELECT'ом и сохраняет через save().
+    Вместо проверки «а не занято ли» полагаемся на уникальный индекс:
+    при IntegrityError из-за гонки перечитываем занятые слаги и пробуем снова.
+    """
+    model = type(instance)
+    max_length = model._meta.get_field("slug").max_length
+    base = base_slug(source, max_length)
+    exclude_pk = None if instance._state.adding else instance.pk
+    for attempt in range(MAX_ATTEMPTS):
+        instance.slug = next_free(
+            base, taken_slugs(model, [base], exclude_pk), max_length
+        )
+        try:
+            # Savepoint: неудачная вставка не должна ломать внешнюю транзакцию
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            conflict = instance.slug in taken_slugs(model, [instance.slug], exclude_pk)
+            if not conflict or attempt == MAX_ATTEMPTS - 1:
+                raise
+
+
+def assign_unique_slugs(instances, source_attr):
+    """
+    Пакетный вариант для bulk_create: слаги для всех объектов без слага
+    подбираются по одному SELECT'у на пачку, с учётом совпадений внутри пачки.
+    """
+    pending = [obj for obj in instances if not obj.slug]
+    if not pending:
+        return instances
+    model = type(pending[0])
+    max_length = model._meta.get_field("slug").max_length
+    bases = {
+        id(obj): base_slug(getattr(obj, source_attr), max_length) for obj in pending
+    }
+    taken = taken_slugs(model, set(bases.values()))
+    taken.update(obj.slug for obj in instances if obj.slug)
+    for obj in pending:
+        obj.slug = next_free(bases[id(obj)], taken, max_length)
+        taken.add(obj.slug)
+    return instances
+
+
+def bulk_create_with_unique_slugs(instances, source_attr):
+    """
+    bulk_create со слагами от assign_unique_slugs. Как и save_with_unique_slug,
+    полагается на уникальный индекс: если параллельная вставка заняла слаг,
+    пачка откатывается до savepoint, слаги подбираются заново.
+    """
+    if not instances:
+        return instances
+    pending = [obj for obj in instances if not obj.slug]
+    model = type(instances[0])
+    for attempt in range(MAX_ATTEMPTS):
+        assign_unique_slugs(instances, source_attr)
+        try:
+            with transaction.atomic():
+                return model._default_manager.bulk_create(instances)
+        except IntegrityError:
+            slugs = {obj.slug for obj in pending}
+            conflict = slugs & taken_slugs(model, slugs)
+            if not conflict or attempt == MAX_ATTEMPTS - 1:
+                raise
+            for obj in pending:
+                obj.slug = ""
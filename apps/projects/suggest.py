@@ -0,0 +1,100 @@
+# Файл: apps/projects/suggest.py
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Case, F, FloatField, Value, When
+from taggit.models import Tag
+
+from .models import Project, Technology
+
+
+class PrefixCache:
+    """Небольшой потокобезопасный LRU с TTL для горячих префиксов автодополнения."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+prefix_cache = PrefixCache(
+    maxsize=getattr(settings, "SUGGEST_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "SUGGEST_CACHE_TTL", 30),
+)
+
+
+def normalize_query(q):
+    return " ".join(q.lower().split())
+
+
+def _candidates(queryset, kind, label_field, q, limit):
+    """
+    Кандидаты одного типа по word_similarity (name %> q) через GIN-индекс
+    gin_trgm_ops. Префикс слова длиной от двух символов проходит порог всегда,
+    опечатки — если похожи достаточно. Совпадение с начала строки выше.
+    """
+    return (
+        queryset.filter(**{f"{label_field}__trigram_word_similar": q})
+        .annotate(
+            kind=Value(kind),
+            text=F(label_field),
+            key=F("slug"),
+            score=Case(
+                When(**{f"{label_field}__istartswith": q}, then=Value(1.0)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+            + TrigramWordSimilarity(q, label_field),
+        )
+        .order_by("-score", label_field)
+        .values_list("kind", "text", "key", "score")[:limit]
+    )
+
+
+def suggest(q, limit):
+    """Top-N подсказок по технологиям, тегам и заголовкам проектов одним UNION ALL."""
+    q = normalize_query(q)
+    if len(q) < getattr(settings, "SUGGEST_MIN_LENGTH", 2):
+        return []
+    cache_key = (q, limit)
+    cached = prefix_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    technologies = _candidates(Technology.objects.all(), "technology", "name", q, limit)
+    tags = _candidates(Tag.objects.all(), "tag", "name", q, limit)
+    projects = _candidates(Project.objects.all(), "project", "title", q, limit)
+    rows = technologies.union(tags, projects, all=True).order_by("-score", "text")
+    results = [
+        {"type": kind, "text": text, "slug": key} for kind, text, key, _ in rows[:limit]
+    ]
+    prefix_cache.set(cache_key, results)
+    return results
@@ -1,16 +1,83 @@
 # Файл: apps/projects/tests.py
 
-from django.urls import reverse
+import base64
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import warnings
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import OperationalError, connection, connections, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils import timezone
+from PIL import Image
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.routers import DefaultRouter
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from taggit.models import Tag
+
+try:
+    import boto3
+    import requests
+    from moto import mock_aws
+except ImportError:  # moto ставится только для разработки
+    mock_aws = None
 
 
+from apps.core.querycheck import explain, is_explainable, router_get_routes, seq_scans
+from apps.core.replicas import ReplicaRouter, health, read_alias
+from apps.jobs.models import Job
+from apps.jobs.queue import run_pending
 from apps.users.models import CustomUser
-from .models import Project, Comment
+from apps.users.urls import router as users_router
+from . import uploads
+from .benchmark import Measurement
+from .cache import stats as cache_stats
+from .likes import flush_likes, get_buffer
+from .models import Project, Comment, Like, ProjectMedia, Technology, UploadSession
+from .seeding import seed
+from .slugs import assign_unique_slugs, taken_slugs
+from .suggest import prefix_cache
+from .urls import router as projects_router
+from .views import CommentListCreateView, ProjectViewSet, TechnologyViewSet
 
 # Явно указываем, что User - это наш CustomUser
 User = CustomUser
 
+# Загружаемые в тестах файлы не должны попадать в настоящий MEDIA_ROOT
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(prefix="portfolio-tests-")
+
+
+def tearDownModule():
+    shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+    # Пул реплики (settings.TESTING) держит соединения с тестовой БД,
+    # раннер его не закрывает
+    if "replica" in connections.settings:
+        replica = connections["replica"]
+        replica.close()
+        if getattr(replica, "pool", None) is not None:
+            replica.close_pool()
+
+
+def make_image(name="photo.png", size=(1600, 900), mode="RGBA"):
+    buffer = BytesIO()
+    Image.new(mode, size, (200, 30, 30, 255)[: len(mode)]).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
 
 class ProjectAPITests(APITestCase):
     def setUp(self):
@@ -113,3 +180,1837 @@ class ProjectAPITests(APITestCase):
         self.assertEqual(Like.objects.count(), 0)
 
         # Удаляем старые тесты test_like_project и test_unlike_project, так как этот их заменяет.
+
+
+class ProjectCountersTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.fan = User.objects.create_user(
+            username="fan", password="password123", email="fan@test.com"
+        )
+        self.project = Project.objects.create(
+            owner=self.owner, title="Popular", description="Popular project."
+        )
+        self.quiet = Project.objects.create(
+            owner=self.owner, title="Quiet", description="Nobody likes it."
+        )
+
+    def test_like_toggle_updates_counter(self):
+        """Лайк и анлайк атомарно меняют likes_count."""
+        self.client.force_authenticate(user=self.fan)
+        url = reverse("project-like", kwargs={"slug": self.project.slug})
+
+        response = self.client.post(url)
+        self.assertEqual(response.data["likes_count"], 1)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.likes_count, 1)
+
+        self.client.post(url)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.likes_count, 0)
+
+    def test_comment_counter_follows_create_delete_and_cascade(self):
+        """comments_count учитывает создание, удаление и каскад от пользователя."""
+        self.client.force_authenticate(user=self.fan)
+        url = reverse(
+            "project-comments-list-create", kwargs={"project_slug": self.project.slug}
+        )
+        self.client.post(url, {"text": "first"}, format="json")
+        self.client.post(url, {"text": "second"}, format="json")
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.comments_count, 2)
+
+        Comment.objects.filter(text="first").get().delete()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.comments_count, 1)
+
+        Like.objects.create(project=self.project, user=self.fan)
+        self.fan.delete()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.comments_count, 0)
+        self.assertEqual(self.project.likes_count, 0)
+
+    def test_ordering_by_likes_count(self):
+        """Сортировка по популярности идёт по хранимому столбцу."""
+        Like.objects.create(project=self.project, user=self.fan)
+        response = self.client.get(
+            reverse("project-list"), {"ordering": "-likes_count"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        slugs = [item["slug"] for item in response.data["results"]]
+        self.assertEqual(slugs, [self.project.slug, self.quiet.slug])
+        self.assertEqual(response.data["results"][0]["likes_count"], 1)
+
+    def test_recount_command_repairs_drift(self):
+        """recount_project_counters чинит разъехавшиеся счётчики."""
+        Like.objects.create(project=self.project, user=self.fan)
+        Project.objects.filter(pk=self.project.pk).update(likes_count=42)
+        Project.objects.filter(pk=self.quiet.pk).update(comments_count=7)
+
+        call_command("recount_project_counters", batch_size=1, stdout=StringIO())
+
+        self.project.refresh_from_db()
+        self.quiet.refresh_from_db()
+        self.assertEqual(self.project.likes_count, 1)
+        self.assertEqual(self.quiet.comments_count, 0)
+
+
+class ProjectQuerysetTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.fans = [
+            User.objects.create_user(
+                username=f"fan{i}", password="password123", email=f"fan{i}@test.com"
+            )
+            for i in range(3)
+        ]
+        for i in range(5):
+            project = Project.objects.create(
+                owner=self.owner, title=f"Project {i}", description="..."
+            )
+            project.tags.add("django", f"tag{i}")
+            for fan in self.fans:
+                Like.objects.create(project=project, user=fan)
+                Comment.objects.create(project=project, author=fan, text="nice")
+
+    def test_list_does_not_load_comments_or_likes(self):
+        """Список: валидаторы ETag, COUNT, проекты с владельцем, теги, технологии."""
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("project-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first = response.data["results"][0]
+        self.assertEqual(first["likes_count"], 3)
+        self.assertEqual(first["comments_count"], 3)
+        self.assertIn("django", first["tags"])
+        self.assertFalse(first["is_liked"])
+        self.assertFalse(first["is_owner"])
+
+    def test_viewer_flags_do_not_add_queries(self):
+        """is_liked считается EXISTS в том же SELECT, is_owner — без запросов."""
+        fan = self.fans[0]
+        Like.objects.filter(user=fan, project__title="Project 0").delete()
+        self.client.force_authenticate(fan)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("project-list"))
+        liked = {p["title"]: p["is_liked"] for p in response.data["results"]}
+        self.assertFalse(liked.pop("Project 0"))
+        self.assertTrue(all(liked.values()))
+        self.assertFalse(any(p["is_owner"] for p in response.data["results"]))
+
+        self.client.force_authenticate(self.owner)
+        project = Project.objects.get(title="Project 1")
+        response = self.client.get(
+            reverse("project-detail", kwargs={"slug": project.slug})
+        )
+        self.assertTrue(response.data["is_owner"])
+        self.assertFalse(response.data["is_liked"])
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        # 23 проекта = три страницы по 10; заголовки с повторами для тай-брейка по id
+        for i in range(23):
+            Project.objects.create(
+                owner=self.owner, title=f"Title {i % 4}", description="..."
+            )
+        self.url = reverse("project-list")
+
+    def walk(self, params):
+        slugs, pages = [], []
+        response = self.client.get(self.url, {**params, "cursor": ""})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            pages.append(response.data)
+            slugs.extend(item["slug"] for item in response.data["results"])
+            if not response.data["next"]:
+                return slugs, pages
+            response = self.client.get(response.data["next"])
+
+    def test_cursor_walk_matches_default_ordering(self):
+        """Курсор проходит все проекты в порядке (-created_at, -id) без дублей."""
+        slugs, pages = self.walk({})
+        expected = list(
+            Project.objects.order_by("-created_at", "-id").values_list(
+                "slug", flat=True
+            )
+        )
+        self.assertEqual(slugs, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]["previous"])
+
+        previous = self.client.get(pages[1]["previous"])
+        self.assertEqual(previous.data["results"], pages[0]["results"])
+
+    def test_cursor_respects_ordering_filter(self):
+        """Keyset работает поверх выбранного OrderingFilter поля."""
+        slugs, _ = self.walk({"ordering": "title"})
+        expected = list(
+            Project.objects.order_by("title", "id").values_list("slug", flat=True)
+        )
+        self.assertEqual(slugs, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get(self.url, {"page": 3})
+        self.assertEqual(response.data["count"], 23)
+        self.assertEqual(len(response.data["results"]), 3)
+
+
+class ProjectSearchTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.django_tech = Technology.objects.create(name="Django")
+        self.in_title = Project.objects.create(
+            owner=self.owner, title="Django blog", description="A blog engine."
+        )
+        self.in_tags = Project.objects.create(
+            owner=self.owner, title="Shop", description="An online shop."
+        )
+        self.in_tags.tags.add("django", "ecommerce")
+        self.in_description = Project.objects.create(
+            owner=self.owner, title="Notes", description="Notes app built on django."
+        )
+        self.unrelated = Project.objects.create(
+            owner=self.owner, title="Game", description="A platformer in Rust."
+        )
+        self.url = reverse("project-list")
+
+    def search(self, terms, **params):
+        response = self.client.get(self.url, {"search": terms, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["slug"] for item in response.data["results"]]
+
+    def test_results_ranked_by_field_weight(self):
+        """title важнее тегов, теги важнее описания; без дублей от JOIN'ов."""
+        self.assertEqual(
+            self.search("django"),
+            [self.in_title.slug, self.in_tags.slug, self.in_description.slug],
+        )
+
+    def test_vector_follows_technologies_and_tag_changes(self):
+        """Индекс обновляется при изменении технологий и тегов проекта."""
+        self.assertEqual(self.search("rust"), [self.unrelated.slug])
+        self.assertEqual(self.search("ecommerce"), [self.in_tags.slug])
+
+        self.unrelated.technologies.add(self.django_tech)
+        self.django_tech.name = "Bevy"
+        self.django_tech.save()
+        self.assertEqual(self.search("bevy"), [self.unrelated.slug])
+
+        self.in_tags.tags.remove("ecommerce")
+        self.assertEqual(self.search("ecommerce"), [])
+
+    def test_vector_follows_deleted_technologies_and_tags(self):
+        """Связи удаляются каскадом без m2m_changed — документ всё равно пересобирается."""
+        self.unrelated.technologies.add(self.django_tech)
+        self.assertIn(self.unrelated.slug, self.search("django"))
+        self.django_tech.delete()
+        self.assertNotIn(self.unrelated.slug, self.search("django"))
+
+        Tag.objects.get(name="ecommerce").delete()
+        self.assertEqual(self.search("ecommerce"), [])
+
+    def test_save_writes_vector_with_the_row(self):
+        self.unrelated.title = "Roguelike"
+        with CaptureQueriesContext(connection) as captured:
+            self.unrelated.save()
+        updates = [q for q in captured if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.search("roguelike"), [self.unrelated.slug])
+        # Тег, добавленный раньше, не теряется при обычном save()
+        self.in_tags.description = "Changed"
+        self.in_tags.save()
+        self.assertEqual(self.search("ecommerce"), [self.in_tags.slug])
+
+    def test_websearch_syntax_and_explicit_ordering(self):
+        self.assertEqual(
+            self.search("django -blog", ordering="title"),
+            [
+                self.in_description.slug,
+                self.in_tags.slug,
+            ],
+        )
+
+    def test_ranked_search_ignores_cursor(self):
+        """По рангу keyset неприменим: ?cursor= даёт обычные страницы."""
+        response = self.client.get(self.url, {"search": "django", "cursor": ""})
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            [item["slug"] for item in response.data["results"]],
+            [self.in_title.slug, self.in_tags.slug, self.in_description.slug],
+        )
+
+    def test_rebuild_command(self):
+        Project.objects.update(search_vector=None)
+        call_command("rebuild_search_index", batch_size=2, stdout=StringIO())
+        self.assertEqual(self.search("platformer"), [self.unrelated.slug])
+
+
+class SuggestTests(APITestCase):
+    def setUp(self):
+        prefix_cache.clear()
+        owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        Technology.objects.create(name="Django")
+        Technology.objects.create(name="Docker")
+        project = Project.objects.create(
+            owner=owner, title="Django REST starter", description="..."
+        )
+        project.tags.add("django-rest")
+        Project.objects.create(owner=owner, title="Rust game", description="...")
+        self.url = reverse("suggest")
+
+    def test_mixed_suggestions_in_one_query(self):
+        """Подсказки всех трёх типов приходят одним запросом к БД."""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"q": "djan"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        found = {(item["type"], item["text"]) for item in response.data["results"]}
+        self.assertEqual(
+            found,
+            {
+                ("technology", "Django"),
+                ("tag", "django-rest"),
+                ("project", "Django REST starter"),
+            },
+        )
+
+    def test_typo_tolerance_and_limit(self):
+        response = self.client.get(self.url, {"q": "dockr"})
+        texts = [item["text"] for item in response.data["results"]]
+        self.assertIn("Docker", texts)
+
+        response = self.client.get(self.url, {"q": "dj", "limit": 2})
+        self.assertEqual(len(response.data["results"]), 2)
+
+        response = self.client.get(self.url, {"q": "d"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_hot_prefix_served_from_memory(self):
+        self.client.get(self.url, {"q": "Rust"})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"q": "  rust "})
+        self.assertEqual(response.data["results"][0]["text"], "Rust game")
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        cache_stats.reset()
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.fan = User.objects.create_user(
+            username="fan", password="password123", email="fan@test.com"
+        )
+        self.project = Project.objects.create(
+            owner=self.owner, title="Cached", description="..."
+        )
+        self.other = Project.objects.create(
+            owner=self.owner, title="Other", description="..."
+        )
+        self.list_url = reverse("project-list")
+        self.detail_url = reverse("project-detail", kwargs={"slug": self.project.slug})
+
+    def test_anonymous_list_served_from_cache(self):
+        """Повторный анонимный GET не строит выдачу: остаётся только запрос валидаторов."""
+        self.assertEqual(self.client.get(self.list_url)["X-Cache"], "MISS")
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(cache_stats.snapshot(), {"hits": 1, "misses": 1})
+
+    def test_query_params_are_normalized(self):
+        self.client.get(self.list_url, {"ordering": "title", "page": 1})
+        response = self.client.get(f"{self.list_url}?page=1&ordering=title")
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_like_invalidates_list_and_detail(self):
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+
+        Like.objects.create(project=self.project, user=self.fan)
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["likes_count"], 1)
+        response = self.client.get(self.list_url, {"ordering": "-likes_count"})
+        self.assertEqual(response.data["results"][0]["likes_count"], 1)
+
+    def test_counted_rows_read_only_the_slug(self):
+        def project_selects(**settings):
+            with self.settings(**settings), CaptureQueriesContext(connection) as q:
+                like = Like.objects.create(project_id=self.project.pk, user=self.fan)
+                like.delete()
+            return [x["sql"] for x in q if x["sql"].startswith("SELECT")]
+
+        selects = project_selects()
+        self.assertEqual(len(selects), 2)
+        self.assertTrue(all('SELECT "projects_project"."slug"' in s for s in selects))
+        # Без ответного кэша версии не сдвигаются и слаг не нужен
+        self.assertEqual(project_selects(RESPONSE_CACHE_ENABLED=False), [])
+
+    def test_media_bumps_only_its_project(self):
+        other_detail = reverse("project-detail", kwargs={"slug": self.other.slug})
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+        self.client.get(other_detail)
+
+        ProjectMedia.objects.create(
+            project=self.project,
+            file=SimpleUploadedFile("notes.txt", b"data"),
+            file_type="other",
+        )
+
+        self.assertEqual(self.client.get(self.detail_url)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(other_detail)["X-Cache"], "HIT")
+        self.assertEqual(self.client.get(self.list_url)["X-Cache"], "HIT")
+
+    def test_tag_change_and_authenticated_requests(self):
+        self.client.get(self.detail_url)
+        self.project.tags.add("fresh")
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["tags"], ["fresh"])
+
+        self.client.force_authenticate(user=self.fan)
+        response = self.client.get(self.detail_url)
+        self.assertNotIn("X-Cache", response)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False, MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.fan = User.objects.create_user(
+            username="fan", password="password123", email="fan@test.com"
+        )
+        self.project = Project.objects.create(
+            owner=self.owner, title="Conditional", description="..."
+        )
+        self.technology = Technology.objects.create(name="Django")
+        self.list_url = reverse("project-list")
+        self.detail_url = reverse("project-detail", kwargs={"slug": self.project.slug})
+
+    def assertNotModified(self, url, etag):
+        # 304 отдаётся по одному запросу валидаторов, без сериализации
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_not_modified_on_all_endpoints(self):
+        Comment.objects.create(project=self.project, author=self.fan, text="Hi")
+        ProjectMedia.objects.create(
+            project=self.project,
+            file=SimpleUploadedFile("notes.txt", b"data"),
+            file_type="other",
+        )
+        urls = [
+            self.list_url,
+            self.detail_url,
+            reverse("project-media-files", kwargs={"slug": self.project.slug}),
+            reverse(
+                "project-comments-list-create",
+                kwargs={"project_slug": self.project.slug},
+            ),
+            reverse("technology-list"),
+            reverse("technology-detail", kwargs={"pk": self.technology.pk}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertNotModified(url, response["ETag"])
+
+    def test_last_modified_only_on_single_objects(self):
+        """MAX(updated_at) списка не двигается при удалении — у списков только ETag."""
+        detail = self.client.get(self.detail_url)
+        self.assertIn("Last-Modified", detail)
+        technology = reverse("technology-detail", kwargs={"pk": self.technology.pk})
+        self.assertIn("Last-Modified", self.client.get(technology))
+
+        other = Project.objects.create(owner=self.owner, title="Other", description="")
+        response = self.client.get(self.list_url)
+        self.assertNotIn("Last-Modified", response)
+        other.delete()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+
+    def test_malformed_technology_pk_is_404(self):
+        url = reverse("technology-list") + "abc/"
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.detail_url)
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_like_and_tags_change_etag(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        Like.objects.create(project=self.project, user=self.fan)
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["likes_count"], 1)
+
+        etag = response["ETag"]
+        self.project.tags.add("fresh")
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_technology_rename_changes_project_list_etag(self):
+        self.project.technologies.add(self.technology)
+        etag = self.client.get(self.list_url)["ETag"]
+        self.technology.name = "Django REST"
+        self.technology.save()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_viewer_and_params(self):
+        anonymous = self.client.get(self.list_url)["ETag"]
+        self.assertNotEqual(
+            self.client.get(self.list_url, {"ordering": "title"})["ETag"], anonymous
+        )
+        self.client.force_authenticate(user=self.fan)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Authorization", response["Vary"])
+
+
+@override_settings(
+    IMAGE_DERIVATIVE_WIDTHS=(320, 640, 1280),
+    IMAGE_LIST_WIDTH=640,
+    RESPONSE_CACHE_ENABLED=False,
+)
+class ImageDerivativeTests(APITestCase):
+    def setUp(self):
+        # Своя папка на тест: иначе storage допишет суффикс к повторному photo.png
+        self.media_root = tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.project = Project.objects.create(
+            owner=self.owner,
+            title="Gallery",
+            description="...",
+            main_image=make_image(),
+        )
+        self.detail_url = reverse("project-detail", kwargs={"slug": self.project.slug})
+
+    def test_generated_off_request_path(self):
+        job = Job.objects.get(name="projects.main_image_derivatives")
+        self.assertEqual(job.args, [self.project.pk])
+        # До выполнения задачи отдаём только оригинал
+        self.assertEqual(self.client.get(self.detail_url).data["main_image_srcset"], {})
+
+        run_pending()
+        self.project.refresh_from_db()
+        derivatives = self.project.main_image_derivatives
+        self.assertEqual(derivatives["source"], self.project.main_image.name)
+        self.assertEqual(
+            derivatives["webp"]["640"],
+            "projects/gallery/images/main/derivatives/photo-640w.webp",
+        )
+        with default_storage.open(derivatives["jpeg"]["320"]) as fh:
+            self.assertEqual(Image.open(fh).size, (320, 180))
+
+        srcset = self.client.get(self.detail_url).data["main_image_srcset"]
+        self.assertEqual(set(srcset), {"webp", "jpeg"})
+        self.assertTrue(srcset["webp"].endswith("photo-1280w.webp 1280w"))
+
+    def test_list_ships_thumbnail(self):
+        run_pending()
+        item = self.client.get(reverse("project-list")).data["results"][0]
+        self.assertTrue(item["main_image"].endswith("derivatives/photo-640w.jpg"))
+        detail = self.client.get(self.detail_url).data
+        self.assertTrue(detail["main_image"].endswith("main/photo.png"))
+
+    def test_new_image_replaces_old_derivatives(self):
+        run_pending()
+        self.project.refresh_from_db()
+        old_key = self.project.main_image_derivatives["webp"]["320"]
+
+        self.project.main_image = make_image("cover.png", size=(500, 500))
+        self.project.save()
+        run_pending()
+        self.project.refresh_from_db()
+        derivatives = self.project.main_image_derivatives
+        # Не увеличиваем: 640 и 1280 шире оригинала
+        self.assertEqual(set(derivatives["webp"]), {"320"})
+        self.assertFalse(default_storage.exists(old_key))
+        self.assertTrue(
+            os.path.exists(os.path.join(self.media_root, derivatives["jpeg"]["320"]))
+        )
+
+    def test_media_images_only(self):
+        Job.objects.all().delete()
+        image = ProjectMedia.objects.create(
+            project=self.project, file=make_image("shot.png"), file_type="image"
+        )
+        ProjectMedia.objects.create(
+            project=self.project,
+            file=SimpleUploadedFile("notes.txt", b"data"),
+            file_type="other",
+        )
+        self.assertEqual(run_pending(), 1)
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get(
+            reverse("project-media-files", kwargs={"slug": self.project.slug})
+        )
+        by_id = {item["id"]: item for item in response.data}
+        self.assertIn("shot-320w.webp 320w", by_id[image.pk]["file_srcset"]["webp"])
+        self.assertEqual(len([i for i in response.data if i["file_srcset"]]), 1)
+
+    def test_repeated_saves_queue_one_job(self):
+        for caption in ("a", "b", "c"):
+            self.project.description = caption
+            self.project.save()
+        jobs = Job.objects.filter(name="projects.main_image_derivatives")
+        self.assertEqual(jobs.count(), 1)
+
+    def test_unreadable_image_fails_once(self):
+        Job.objects.all().delete()
+        ProjectMedia.objects.create(
+            project=self.project,
+            file=SimpleUploadedFile("fake.png", b"not an image"),
+            file_type="image",
+        )
+        run_pending()
+        job = Job.objects.get(name="projects.media_derivatives")
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 1))
+        self.assertIn("UnidentifiedImageError", job.last_error)
+
+    def test_truncated_image_fails_once(self):
+        Job.objects.all().delete()
+        data = make_image(size=(400, 300)).read()
+        ProjectMedia.objects.create(
+            project=self.project,
+            file=SimpleUploadedFile("cut.png", data[: len(data) // 2]),
+            file_type="image",
+        )
+        run_pending()
+        job = Job.objects.get(name="projects.media_derivatives")
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 1))
+        self.assertIn("UnreadableImage", job.last_error)
+
+
+class ChunkedUploadTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT)
+        self.enterContext(
+            override_settings(
+                MEDIA_ROOT=self.media_root,
+                UPLOAD_TEMP_DIR=tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT),
+                UPLOAD_CHUNK_MAX_SIZE=8,
+            )
+        )
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.project = Project.objects.create(
+            owner=self.owner, title="Big files", description="..."
+        )
+        self.payload = b"0123456789abcdefXYZ"
+        self.client.force_authenticate(user=self.owner)
+
+    def start(self, **extra):
+        data = {"filename": "../demo.mp4", "file_type": "video", "size": 19}
+        data.update(extra)
+        response = self.client.post(
+            reverse("project-start-upload", kwargs={"slug": self.project.slug}),
+            data,
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["offset"], 0)
+        return response.data["id"]
+
+    def url(self, upload_id, name="project-upload-session"):
+        return reverse(name, kwargs={"slug": self.project.slug, "upload_id": upload_id})
+
+    def put(self, upload_id, first, chunk, checksum=None):
+        headers = {
+            "HTTP_CONTENT_RANGE": f"bytes {first}-{first + len(chunk) - 1}/19",
+            "HTTP_X_CHUNK_SHA256": checksum or hashlib.sha256(chunk).hexdigest(),
+        }
+        return self.client.put(
+            self.url(upload_id),
+            chunk,
+            content_type="application/octet-stream",
+            **headers,
+        )
+
+    def test_resumable_upload(self):
+        upload_id = self.start(sha256=hashlib.sha256(self.payload).hexdigest())
+        self.assertEqual(self.put(upload_id, 0, self.payload[:8]).data["offset"], 8)
+
+        # Повтор уже принятой части (обрыв связи): 409 и текущий offset
+        response = self.put(upload_id, 0, self.payload[:8])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["offset"], 8)
+        self.assertEqual(self.client.get(self.url(upload_id)).data["offset"], 8)
+
+        self.put(upload_id, 8, self.payload[8:16])
+        self.put(upload_id, 16, self.payload[16:])
+        response = self.client.post(self.url(upload_id, "project-complete-upload"))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "processing")
+        # Повторный complete не ставит вторую задачу
+        self.client.post(self.url(upload_id, "project-complete-upload"))
+        self.assertEqual(Job.objects.filter(name="projects.finish_upload").count(), 1)
+        self.assertFalse(ProjectMedia.objects.exists())
+
+        run_pending()
+        media = ProjectMedia.objects.get(project=self.project)
+        self.assertTrue(media.file.name.endswith("media/video/demo.mp4"))
+        with media.file.open("rb") as fh:
+            self.assertEqual(fh.read(), self.payload)
+        response = self.client.get(self.url(upload_id))
+        self.assertEqual(response.data["status"], "complete")
+        self.assertEqual(response.data["media"], media.pk)
+        session = UploadSession.objects.get()
+        self.assertFalse(os.path.exists(uploads.temp_path(session)))
+
+    def test_exhausted_finish_job_fails_session(self):
+        upload_id = self.start()
+        for first in (0, 8, 16):
+            self.put(upload_id, first, self.payload[first : first + 8])
+        self.client.post(self.url(upload_id, "project-complete-upload"))
+        Job.objects.filter(name="projects.finish_upload").update(max_attempts=1)
+
+        down = OSError("storage is down")
+        with mock.patch.object(uploads, "_store", side_effect=down):
+            run_pending()
+        job = Job.objects.get(name="projects.finish_upload")
+        self.assertEqual(job.status, Job.Status.FAILED)
+        response = self.client.get(self.url(upload_id))
+        self.assertEqual(response.data["status"], "failed")
+        self.assertEqual(response.data["error"], "Could not store the uploaded file.")
+        session = UploadSession.objects.get()
+        self.assertFalse(os.path.exists(uploads.temp_path(session)))
+
+    def test_finish_runs_once(self):
+        upload_id = self.start()
+        for first in (0, 8, 16):
+            self.put(upload_id, first, self.payload[first : first + 8])
+        self.client.post(self.url(upload_id, "project-complete-upload"))
+        read = uploads.HashingReader.read
+
+        def finished_elsewhere(reader, size=-1):
+            # Другой запуск той же задачи успел завершить сессию посреди копии
+            UploadSession.objects.filter(pk=upload_id).update(
+                status=UploadSession.Status.COMPLETE
+            )
+            return read(reader, size)
+
+        with mock.patch.object(uploads.HashingReader, "read", finished_elsewhere):
+            self.assertIsNone(uploads.finish(upload_id))
+        self.assertFalse(ProjectMedia.objects.exists())
+        stored = [name for _, _, names in os.walk(self.media_root) for name in names]
+        self.assertEqual(stored, [])
+        # Повторная задача по завершённой сессии ничего не делает
+        self.assertIsNone(uploads.finish(upload_id))
+
+    def test_bad_chunk_is_rejected(self):
+        upload_id = self.start()
+        response = self.put(upload_id, 0, self.payload[:8], checksum="0" * 64)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.put(upload_id, 0, self.payload[:9])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url(upload_id)).data["offset"], 0)
+
+        response = self.client.post(self.url(upload_id, "project-complete-upload"))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_whole_file_checksum_and_access(self):
+        upload_id = self.start(sha256="f" * 64)
+        for first in (0, 8, 16):
+            self.put(upload_id, first, self.payload[first : first + 8])
+        response = self.client.post(self.url(upload_id, "project-complete-upload"))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        run_pending()
+        response = self.client.get(self.url(upload_id))
+        self.assertEqual(response.data["status"], "failed")
+        self.assertEqual(response.data["media"], None)
+        self.assertFalse(ProjectMedia.objects.exists())
+        # Скопированный в storage файл с неверной суммой удалён
+        stored = [name for _, _, names in os.walk(self.media_root) for name in names]
+        self.assertEqual(stored, [])
+
+        stranger = User.objects.create_user(
+            username="stranger", password="password123", email="s@test.com"
+        )
+        self.client.force_authenticate(user=stranger)
+        self.assertEqual(
+            self.client.get(self.url(upload_id)).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        response = self.client.post(
+            reverse("project-start-upload", kwargs={"slug": self.project.slug}),
+            {"filename": "x.zip", "file_type": "archive", "size": 3},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+S3_STORAGES = {
+    "default": {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": {"bucket_name": "portfolio-test", "location": "media"},
+    },
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+@skipIf(mock_aws is None, "moto не установлен")
+class DirectUploadTests(APITestCase):
+    def setUp(self):
+        for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+            os.environ.setdefault(name, "testing")
+        self.enterContext(mock_aws())
+        self.enterContext(
+            override_settings(
+                STORAGES=S3_STORAGES,
+                AWS_STORAGE_BUCKET_NAME="portfolio-test",
+                AWS_S3_REGION_NAME="us-east-1",
+                AWS_S3_ENDPOINT_URL=None,
+                AWS_ACCESS_KEY_ID="testing",
+                AWS_SECRET_ACCESS_KEY="testing",
+            )
+        )
+        boto3.client("s3", region_name="us-east-1").create_bucket(
+            Bucket="portfolio-test"
+        )
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.project = Project.objects.create(
+            owner=self.owner, title="Direct", description="..."
+        )
+        self.payload = b"archive-bytes" * 100
+        self.client.force_authenticate(user=self.owner)
+
+    def intent(self, **extra):
+        data = {
+            "filename": "build.zip",
+            "file_type": "archive",
+            "size": len(self.payload),
+            "content_type": "application/zip",
+            "sha256": hashlib.sha256(self.payload).hexdigest(),
+        }
+        data.update(extra)
+        response = self.client.post(
+            reverse("project-upload-intent", kwargs={"slug": self.project.slug}),
+            data,
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["mode"], "direct")
+        return response.data
+
+    def complete(self, token):
+        return self.client.post(
+            reverse(
+                "project-complete-upload-intent", kwargs={"slug": self.project.slug}
+            ),
+            {"token": token},
+            format="json",
+        )
+
+    def test_presigned_put_and_complete(self):
+        intent = self.intent()
+        self.assertIn("/media/projects/direct/media/archive/", intent["url"])
+        # Объекта ещё нет
+        self.assertEqual(
+            self.complete(intent["token"]).status_code, status.HTTP_400_BAD_REQUEST
+        )
+
+        upload = requests.put(
+            intent["url"], data=self.payload, headers=intent["headers"]
+        )
+        self.assertEqual(upload.status_code, 200)
+
+        response = self.complete(intent["token"])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        media = ProjectMedia.objects.get(project=self.project)
+        self.assertTrue(media.file.name.endswith("-build.zip"))
+        self.assertEqual(media.file.size, len(self.payload))
+        # Повтор не создаёт второй записи
+        self.assertEqual(self.complete(intent["token"]).status_code, status.HTTP_200_OK)
+        self.assertEqual(ProjectMedia.objects.count(), 1)
+
+    def test_long_filename_fits_file_field(self):
+        max_length = ProjectMedia._meta.get_field("file").max_length
+        intent = self.intent(filename="a" * 200 + ".zip")
+        upload = requests.put(
+            intent["url"], data=self.payload, headers=intent["headers"]
+        )
+        self.assertEqual(upload.status_code, 200)
+
+        response = self.complete(intent["token"])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        media = ProjectMedia.objects.get(project=self.project)
+        self.assertEqual(len(media.file.name), max_length)
+        self.assertTrue(media.file.name.endswith("aaa.zip"))
+
+    def test_mismatched_object_is_rejected_and_removed(self):
+        intent = self.intent(sha256="", size=5)
+        key = requests.utils.urlparse(intent["url"]).path.lstrip("/")
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.put_object(
+            Bucket="portfolio-test", Key=key, Body=b"123456", ContentType="text/plain"
+        )
+
+        response = self.complete(intent["token"])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {"size", "content_type"})
+        self.assertEqual(s3.list_objects_v2(Bucket="portfolio-test")["KeyCount"], 0)
+
+    def test_token_is_bound_to_project(self):
+        intent = self.intent()
+        other = Project.objects.create(owner=self.owner, title="Other", description="")
+        response = self.client.post(
+            reverse("project-complete-upload-intent", kwargs={"slug": other.slug}),
+            {"token": intent["token"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.complete(intent["token"][:-2] + "xx")
+        self.assertIn("token", response.data)
+
+    def test_checksum_is_base64_in_signature(self):
+        intent = self.intent()
+        digest = base64.b64encode(hashlib.sha256(self.payload).digest()).decode()
+        self.assertEqual(intent["headers"]["x-amz-checksum-sha256"], digest)
+
+
+class DirectUploadFallbackTests(APITestCase):
+    def test_filesystem_storage_falls_back_to_chunked_session(self):
+        owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        project = Project.objects.create(owner=owner, title="Local", description="")
+        self.client.force_authenticate(user=owner)
+        with self.settings(UPLOAD_TEMP_DIR=tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT)):
+            response = self.client.post(
+                reverse("project-upload-intent", kwargs={"slug": project.slug}),
+                {"filename": "a.mp4", "file_type": "video", "size": 10},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["mode"], "chunked")
+        self.assertEqual(response.data["upload"]["offset"], 0)
+        self.assertTrue(UploadSession.objects.filter(project=project).exists())
+
+
+@override_settings(LIKE_BUFFER_ENABLED=True, LIKE_FLUSH_INTERVAL=0)
+class LikeBufferTests(APITestCase):
+    def setUp(self):
+        get_buffer().drain()
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.fans = [
+            User.objects.create_user(
+                username=f"fan{i}", password="password123", email=f"fan{i}@test.com"
+            )
+            for i in range(3)
+        ]
+        self.project = Project.objects.create(
+            owner=self.owner, title="Trending", description="..."
+        )
+        self.url = reverse("project-like", kwargs={"slug": self.project.slug})
+
+    def like(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.post(self.url)
+
+    def test_burst_is_applied_in_one_flush(self):
+        counts = [self.like(fan).data["likes_count"] for fan in self.fans]
+        self.assertEqual(counts, [1, 2, 3])
+        self.assertFalse(Like.objects.exists())
+
+        # Блокировка проекта, один INSERT на пачку, один UPDATE счётчиков,
+        # слаги для кэша (+ SAVEPOINT)
+        with self.assertNumQueries(6):
+            self.assertEqual(flush_likes(), 3)
+        self.project.refresh_from_db()
+        self.assertEqual(Like.objects.filter(project=self.project).count(), 3)
+        self.assertEqual(self.project.likes_count, 3)
+
+    def test_unlike_burst_is_one_delete(self):
+        for fan in self.fans:
+            Like.objects.create(project=self.project, user=fan)
+        for fan in self.fans:
+            self.like(fan)
+
+        # Блокировка проекта, SELECT + DELETE на пачку без UPDATE счётчика
+        # на строку, один UPDATE счётчиков, слаги (+ SAVEPOINT)
+        with self.assertNumQueries(7):
+            self.assertEqual(flush_likes(), 3)
+        self.project.refresh_from_db()
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(self.project.likes_count, 0)
+
+    def test_toggle_back_and_forth_never_hits_table(self):
+        self.assertEqual(self.like(self.fans[0]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            self.like(self.fans[0]).status_code, status.HTTP_204_NO_CONTENT
+        )
+        self.assertEqual(flush_likes(), 0)
+        self.assertFalse(Like.objects.exists())
+
+    def test_toggle_after_flush_reads_applied_state(self):
+        self.assertEqual(self.like(self.fans[0]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(flush_likes(), 1)
+        self.assertTrue(Like.objects.filter(user=self.fans[0]).exists())
+        # Записи в буфере больше нет: base читается из БД, где лайк уже есть
+        self.assertEqual(
+            self.like(self.fans[0]).status_code, status.HTTP_204_NO_CONTENT
+        )
+        self.assertEqual(flush_likes(), 1)
+        self.assertFalse(Like.objects.exists())
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.likes_count, 0)
+
+    def test_unlike_existing_and_unique_pairs(self):
+        Like.objects.create(project=self.project, user=self.fans[0])
+        self.assertEqual(
+            self.like(self.fans[0]).status_code, status.HTTP_204_NO_CONTENT
+        )
+        flush_likes()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.likes_count, 0)
+        self.assertFalse(Like.objects.exists())
+
+        # Устаревший base (лайк уже появился в БД) не ломает unique_together
+        Like.objects.create(project=self.project, user=self.fans[1])
+        get_buffer().restore([(self.project.pk, self.fans[1].pk, True, False)])
+        self.assertEqual(flush_likes(), 1)
+        self.assertEqual(Like.objects.filter(user=self.fans[1]).count(), 1)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.likes_count, 1)
+
+
+class SlugAllocationTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+
+    def create(self, title="Portfolio", **extra):
+        return Project.objects.create(
+            owner=self.owner, title=title, description="...", **extra
+        )
+
+    def test_one_lookup_per_save(self):
+        for _ in range(5):
+            self.create()
+        self.create("Portfolio site")
+        with CaptureQueriesContext(connection) as ctx:
+            project = self.create()
+        self.assertEqual(project.slug, "portfolio-5")
+        lookups = [q for q in ctx.captured_queries if "LIKE" in q["sql"]]
+        self.assertEqual(len(lookups), 1)
+
+    def test_next_suffix_after_gap_and_explicit_slug(self):
+        self.create(slug="portfolio-7")
+        self.assertEqual(self.create().slug, "portfolio")
+        self.assertEqual(self.create().slug, "portfolio-8")
+        self.assertEqual(len(self.create("---").slug), 8)
+
+    def test_retries_when_concurrent_insert_wins(self):
+        self.create()
+        calls = []
+
+        def stale_first(*args, **kwargs):
+            # Первый подбор «не видит» уже вставленный слаг — как при гонке
+            calls.append(args)
+            return set() if len(calls) == 1 else taken_slugs(*args, **kwargs)
+
+        with mock.patch("apps.projects.slugs.taken_slugs", side_effect=stale_first):
+            project = self.create()
+        self.assertEqual(project.slug, "portfolio-1")
+        self.assertEqual(len(calls), 3)
+
+    def test_lookup_skips_longer_slugs_in_sql(self):
+        for slug in ("portfolio", "portfolio-2", "portfolio-site", "portfolio-2b"):
+            self.create(slug=slug)
+        self.create(slug="portfolios")
+        with CaptureQueriesContext(connection) as ctx:
+            taken = taken_slugs(Project, ["portfolio"])
+        self.assertEqual(taken, {"portfolio", "portfolio-2"})
+        # Отбор целиком в SQL: чужие слаги с тем же началом не читаются
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(taken_slugs(Project, ["portfolio-s"]), set())
+
+    def test_bulk_variant_and_technologies(self):
+        self.create()
+        projects = assign_unique_slugs(
+            [
+                Project(owner=self.owner, title=title, description="")
+                for title in ("Portfolio", "Portfolio", "Blog")
+            ],
+            "title",
+        )
+        Project.objects.bulk_create(projects)
+        self.assertEqual(
+            [p.slug for p in projects], ["portfolio-1", "portfolio-2", "blog"]
+        )
+
+        self.assertEqual(Technology.objects.create(name="C").slug, "c")
+        self.assertEqual(Technology.objects.create(name="C++").slug, "c-1")
+
+
+class ProjectBatchTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.client.force_authenticate(self.owner)
+        self.url = reverse("project-batch")
+        self.django = Technology.objects.create(name="Django")
+        self.react = Technology.objects.create(name="React")
+
+    def items(self, count, **extra):
+        return [
+            {
+                "title": "Portfolio",
+                "description": f"Project {i}",
+                "tags": ["python", "Web"],
+                "technology_ids": [self.django.pk, self.react.pk],
+                **extra,
+            }
+            for i in range(count)
+        ]
+
+    def post(self, items):
+        return self.client.post(self.url, {"projects": items}, format="json")
+
+    def test_creates_projects_with_relations(self):
+        response = self.post(self.items(3))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(
+            [r["slug"] for r in results], ["portfolio", "portfolio-1", "portfolio-2"]
+        )
+        self.assertTrue(all(r["status"] == "created" for r in results))
+
+        project = Project.objects.get(slug="portfolio-2")
+        self.assertEqual(project.owner, self.owner)
+        self.assertEqual(set(project.tags.names()), {"python", "Web"})
+        self.assertEqual(project.technologies.count(), 2)
+        self.assertIsNotNone(project.search_vector)
+        search = self.client.get(reverse("project-list"), {"search": "react"})
+        self.assertEqual(search.data["count"], 3)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        self.post(self.items(1))  # теги уже есть, дальше только SELECT
+        with CaptureQueriesContext(connection) as small:
+            self.post(self.items(2))
+        with CaptureQueriesContext(connection) as large:
+            self.post(self.items(40))
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(Project.objects.count(), 43)
+
+    def test_slug_race_is_retried(self):
+        Project.objects.create(owner=self.owner, title="Portfolio", description="")
+        calls = []
+
+        def stale_first(*args, **kwargs):
+            # Первый подбор «не видит» параллельно вставленный слаг
+            calls.append(args)
+            return set() if len(calls) == 1 else taken_slugs(*args, **kwargs)
+
+        with mock.patch("apps.projects.slugs.taken_slugs", side_effect=stale_first):
+            response = self.post(self.items(2))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r["slug"] for r in response.data["results"]],
+            ["portfolio-1", "portfolio-2"],
+        )
+        self.assertEqual(Project.objects.count(), 3)
+
+    def test_updates_own_projects_and_replaces_relations(self):
+        project = Project.objects.create(
+            owner=self.owner, title="Old", description="..."
+        )
+        project.tags.add("legacy")
+        project.technologies.add(self.react)
+        response = self.post(
+            [
+                {"slug": project.slug, "title": "New", "tags": ["fresh"]},
+                {"title": "Other", "description": "..."},
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r["status"] for r in response.data["results"]], ["updated", "created"]
+        )
+        project.refresh_from_db()
+        self.assertEqual(project.title, "New")
+        self.assertEqual(project.slug, "old")  # слаг при обновлении не меняется
+        self.assertEqual(list(project.tags.names()), ["fresh"])
+        # technology_ids не переданы — технологии не трогаем
+        self.assertEqual(list(project.technologies.all()), [self.react])
+
+    def test_invalid_item_rolls_back_whole_batch(self):
+        stranger = User.objects.create_user(
+            username="stranger", password="password123", email="s@test.com"
+        )
+        foreign = Project.objects.create(
+            owner=stranger, title="Foreign", description="..."
+        )
+        items = self.items(1) + [
+            {"title": "", "description": "..."},
+            {"title": "X", "description": "...", "technology_ids": [999999]},
+            {"slug": foreign.slug, "title": "Hijacked"},
+        ]
+        response = self.post(items)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = {r["index"]: r["errors"] for r in response.data["results"]}
+        self.assertEqual(set(errors), {1, 2, 3})
+        self.assertIn("title", errors[1])
+        self.assertIn("technology_ids", errors[2])
+        self.assertIn("slug", errors[3])
+        self.assertEqual(Project.objects.count(), 1)
+
+    @override_settings(PROJECT_BATCH_MAX_SIZE=2)
+    def test_batch_size_limit(self):
+        response = self.post(self.items(3))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("projects", response.data)
+
+
+class CommentThreadTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.project = Project.objects.create(
+            owner=self.owner, title="Threads", description="..."
+        )
+        self.other = Project.objects.create(
+            owner=self.owner, title="Other", description="..."
+        )
+        self.client.force_authenticate(self.owner)
+        self.url = reverse(
+            "project-comments-list-create", kwargs={"project_slug": self.project.slug}
+        )
+
+    def reply(self, text, parent=None, url=None):
+        data = {"text": text, "parent": parent}
+        response = self.client.post(url or self.url, data, format="json")
+        return response
+
+    def thread(self, comment_id):
+        return reverse(
+            "project-comment-thread",
+            kwargs={"project_slug": self.project.slug, "comment_pk": comment_id},
+        )
+
+    def test_replies_form_subtree_fetched_in_one_range_query(self):
+        root = self.reply("root").data
+        other_root = self.reply("other root").data
+        first = self.reply("first", root["id"]).data
+        self.reply("nested", first["id"])
+        self.reply("second", root["id"])
+        self.reply("elsewhere", other_root["id"])
+        self.assertEqual(first["depth"], 1)
+
+        # Проект, корень ветки, COUNT и сама ветка с авторами
+        with self.assertNumQueries(4):
+            response = self.client.get(self.thread(root["id"]))
+        self.assertEqual(
+            [(c["text"], c["depth"]) for c in response.data["results"]],
+            [("root", 0), ("first", 1), ("nested", 2), ("second", 1)],
+        )
+
+        response = self.client.get(self.url, {"roots": ""})
+        self.assertEqual(
+            [c["text"] for c in response.data["results"]], ["other root", "root"]
+        )
+
+    def test_list_joins_authors_and_pages_by_cursor(self):
+        for i in range(12):
+            author = User.objects.create_user(
+                username=f"author{i}", password="password123", email=f"a{i}@test.com"
+            )
+            Comment.objects.create(project=self.project, author=author, text=str(i))
+        # Валидаторы ETag, проект, страница с авторами — без запроса на комментарий
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {"cursor": ""})
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertEqual(response.data["results"][0]["author_username"], "author11")
+        response = self.client.get(response.data["next"])
+        self.assertEqual([c["text"] for c in response.data["results"]], ["1", "0"])
+
+    def test_reply_validation_and_cascade(self):
+        foreign = Comment.objects.create(
+            project=self.other, author=self.owner, text="foreign"
+        )
+        response = self.reply("cross-project", foreign.pk)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("parent", response.data)
+
+        root = self.reply("root").data
+        reply = self.reply("reply", root["id"]).data
+        with override_settings(COMMENT_MAX_DEPTH=2):
+            response = self.reply("too deep", reply["id"])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        detail = reverse(
+            "project-comment-detail",
+            kwargs={"project_slug": self.project.slug, "comment_pk": reply["id"]},
+        )
+        response = self.client.patch(
+            detail, {"text": "edited", "parent": None}, format="json"
+        )
+        self.assertEqual(response.data["parent"], root["id"])
+
+        Comment.objects.get(pk=root["id"]).delete()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.comments_count, 0)
+
+    def test_unknown_project_is_404(self):
+        url = reverse(
+            "project-comments-list-create", kwargs={"project_slug": "missing"}
+        )
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SeedBenchmarkTests(APITestCase):
+    def test_seed_builds_consistent_data(self):
+        result = seed(users=5, projects=30, likes=120, comments=40, seed=1)
+
+        self.assertEqual(result.projects, 30)
+        self.assertEqual(Project.objects.count(), 30)
+        self.assertEqual(Like.objects.count(), result.likes)
+        self.assertEqual(Comment.objects.count(), 40)
+        # Денормализованные поля досчитаны, как будто работали сигналы
+        call_command("recount_project_counters", stdout=StringIO())
+        self.assertEqual(Project.objects.filter(search_vector__isnull=True).count(), 0)
+        self.assertEqual(len(set(Project.objects.values_list("slug", flat=True))), 30)
+        for comment in Comment.objects.select_related("parent"):
+            prefix = comment.parent.path if comment.parent_id else ""
+            self.assertEqual(comment.path, f"{prefix}{comment.pk:010d}/")
+        # Ципф: самый популярный проект заметно выше среднего
+        top = Project.objects.order_by("-likes_count")[0].likes_count
+        self.assertGreater(top, 2 * result.likes / 30)
+
+    def test_seed_is_additive(self):
+        seed(users=3, projects=10, likes=20, comments=5, seed=7)
+        seed(users=3, projects=10, likes=20, comments=5, seed=7)
+        self.assertEqual(Project.objects.count(), 20)
+        self.assertEqual(CustomUser.objects.count(), 6)
+
+    def test_benchmark_command_reports_every_scenario(self):
+        out = StringIO()
+        call_command(
+            "benchmark",
+            "--in-place",
+            "--sizes=20",
+            "--iterations=3",
+            "--warmup=1",
+            "--json",
+            stdout=out,
+        )
+        rows = json.loads(out.getvalue())
+        self.assertIn("like toggle", {row["scenario"] for row in rows})
+        for row in rows:
+            self.assertEqual(row["size"], 20)
+            self.assertEqual(row["requests"], 3)
+            self.assertGreater(row["queries"], 0)
+
+    def test_percentiles(self):
+        m = Measurement("list", 1, [i / 1000 for i in range(1, 101)], [3])
+        self.assertAlmostEqual(m.p50, 50)
+        self.assertAlmostEqual(m.p95, 95)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False, LIKE_BUFFER_ENABLED=False)
+class EndpointQueryBudgetTests(APITestCase):
+    """
+    Все GET-маршруты роутеров (и вложенные маршруты комментариев) на двух
+    объёмах данных: число запросов не должно расти вместе с содержимым
+    страницы (N+1), а планы — читать большие таблицы целиком.
+    """
+
+    # Таблицы, растущие с данными; справочники (технологии, теги) сюда не входят
+    LARGE_TABLES = {
+        "projects_project",
+        "projects_like",
+        "projects_comment",
+        "projects_projectmedia",
+        "projects_project_technologies",
+        "projects_uploadsession",
+        "taggit_taggeditem",
+        "users_customuser",
+    }
+    EXTRA_ROUTES = (
+        "project-comments-list-create",
+        "project-comment-detail",
+        "project-comment-thread",
+        "current_user",
+    )
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = CustomUser.objects.create_user(
+            username="viewer", email="viewer@example.com", password="password123"
+        )
+        self.project = Project.objects.create(
+            owner=self.viewer, title="Под нагрузкой", description="..."
+        )
+        self.comment = Comment.objects.create(
+            project=self.project, author=self.viewer, text="Корень"
+        )
+        self.technology = Technology.objects.create(name="Django")
+        self.session = UploadSession.objects.create(
+            project=self.project,
+            owner=self.viewer,
+            filename="a.png",
+            size=10,
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        token = RefreshToken.for_user(self.viewer).access_token
+        self.clients = {"anonymous": self.client_class()}
+        self.clients["authenticated"] = self.client_class(
+            HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+    def grow(self, n):
+        """Досеивает данные и наращивает всё, что видно на страницах проекта."""
+        result = seed(users=n, projects=n, likes=n * 4, comments=n * 3, seed=n)
+        users = list(CustomUser.objects.exclude(pk=self.viewer.pk)[:n])
+        Like.objects.bulk_create(
+            [Like(project=self.project, user=user) for user in users],
+            ignore_conflicts=True,
+        )
+        for user in users:
+            reply = Comment.objects.create(
+                project=self.project, author=user, parent=self.comment, text="..."
+            )
+            Comment.objects.create(
+                project=self.project, author=user, parent=reply, text="..."
+            )
+            ProjectMedia.objects.create(
+                project=self.project, file=f"projects/media/{user.pk}.jpg"
+            )
+        self.project.tags.add(*[f"tag-{n}-{i}" for i in range(n)])
+        self.project.technologies.add(
+            self.technology, *Technology.objects.exclude(pk=self.technology.pk)[:n]
+        )
+        return result
+
+    def route_kwargs(self):
+        slug = {"slug": self.project.slug}
+        nested = {"project_slug": self.project.slug, "comment_pk": self.comment.pk}
+        return {
+            "api-root": {},
+            "project-list": {},
+            "project-detail": slug,
+            "project-media-files": slug,
+            "project-upload-session": {**slug, "upload_id": self.session.pk},
+            "technology-list": {},
+            "technology-detail": {"pk": self.technology.pk},
+            "user-list": {},
+            "user-detail": {"pk": self.viewer.pk},
+            "project-comments-list-create": {"project_slug": self.project.slug},
+            "project-comment-detail": nested,
+            "project-comment-thread": nested,
+            "current_user": {},
+        }
+
+    def urls(self):
+        routes = router_get_routes(projects_router, users_router)
+        kwargs = self.route_kwargs()
+        missing = set(routes) - set(kwargs)
+        self.assertFalse(
+            missing, f"Новые GET-маршруты без параметров в тесте: {sorted(missing)}"
+        )
+        for name in (*routes, *self.EXTRA_ROUTES):
+            yield name, reverse(name, kwargs=kwargs[name])
+
+    def measure(self):
+        counts, queries = {}, {}
+        for name, url in self.urls():
+            for who, client in self.clients.items():
+                if who == "anonymous" and name in (
+                    "project-upload-session",
+                    "current_user",
+                ):
+                    continue
+                client.get(url)  # прогрев: кэш пользователя, ContentType и т.п.
+                # Пагинация несортированного queryset'а — тоже регрессия
+                with warnings.catch_warnings():
+                    warnings.simplefilter("error", UnorderedObjectListWarning)
+                    with CaptureQueriesContext(connection) as captured:
+                        response = client.get(url)
+                self.assertEqual(response.status_code, 200, f"{who} {url}")
+                counts[name, who] = len(captured)
+                queries[name, who] = [q["sql"] for q in captured]
+        return counts, queries
+
+    def test_query_counts_do_not_grow_with_data(self):
+        self.grow(2)
+        small, _ = self.measure()
+        self.grow(12)
+        large, _ = self.measure()
+        grown = {
+            key: (small[key], large[key]) for key in small if large[key] != small[key]
+        }
+        self.assertEqual(grown, {}, "Число запросов выросло вместе с данными (N+1)")
+
+    def test_no_sequential_scans_on_large_tables(self):
+        self.grow(12)
+        _, queries = self.measure()
+        scans = {}
+        for (name, who), statements in queries.items():
+            for sql in statements:
+                if not is_explainable(sql):
+                    continue
+                tables = seq_scans(explain(sql)) & self.LARGE_TABLES
+                if tables:
+                    scans.setdefault(name, set()).update(tables)
+        self.assertEqual(scans, {}, "Seq Scan по большим таблицам")
+
+
+def async_urlconf():
+    """Маршруты чтения, собранные как под ASGI с ASYNC_READ_VIEWS=True."""
+    with override_settings(ASYNC_READ_VIEWS=True):
+        router = DefaultRouter()
+        router.register("projects", ProjectViewSet, basename="project")
+        router.register("technologies", TechnologyViewSet, basename="technology")
+        urlpatterns = [
+            path("api/", include(router.urls)),
+            path(
+                "api/projects/<slug:project_slug>/comments/",
+                CommentListCreateView.as_view(),
+                name="project-comments-list-create",
+            ),
+        ]
+    return type("AsyncURLConf", (), {"urlpatterns": urlpatterns})
+
+
+@override_settings(
+    ROOT_URLCONF=async_urlconf(),
+    RESPONSE_CACHE_ENABLED=False,
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+)
+class AsyncReadViewTests(APITestCase):
+    """Асинхронные GET отдают то же, что синхронные вью, байт в байт."""
+
+    def setUp(self):
+        cache.clear()
+        cache_stats.reset()
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.fan = User.objects.create_user(
+            username="fan", password="password123", email="fan@test.com"
+        )
+        self.technology = Technology.objects.create(name="Django")
+        # 12 проектов — две страницы при PAGE_SIZE=10
+        projects = [
+            Project.objects.create(
+                owner=self.owner, title=f"Асинхронный {n}", description="..."
+            )
+            for n in range(12)
+        ]
+        self.project = projects[0]
+        self.project.technologies.add(self.technology)
+        self.project.tags.add("async")
+        Like.objects.create(project=self.project, user=self.fan)
+        root = Comment.objects.create(project=self.project, author=self.fan, text="Hi")
+        Comment.objects.create(
+            project=self.project, author=self.owner, text="Reply", parent=root
+        )
+        ProjectMedia.objects.create(
+            project=self.project,
+            file=SimpleUploadedFile("notes.txt", b"data"),
+            file_type="other",
+        )
+        access = RefreshToken.for_user(self.fan).access_token
+        self.auth = {"authorization": f"Bearer {access}"}
+
+    def urls(self):
+        slug = self.project.slug
+        projects = reverse("project-list")
+        comments = reverse(
+            "project-comments-list-create", kwargs={"project_slug": slug}
+        )
+        return [
+            projects,
+            f"{projects}?page=2",
+            f"{projects}?page=last",
+            f"{projects}?cursor=",
+            f"{projects}?ordering=-likes_count&cursor=",
+            f"{projects}?search=асинхронный&tags__name=async",
+            reverse("project-detail", kwargs={"slug": slug}),
+            reverse("project-media-files", kwargs={"slug": slug}),
+            comments,
+            f"{comments}?roots",
+            f"{comments}?cursor=",
+            reverse("technology-list"),
+            reverse("technology-detail", kwargs={"pk": self.technology.pk}),
+        ]
+
+    async def get_sync(self, url, **headers):
+        # Тот же запрос к обычному URLconf с синхронными вью
+        with self.settings(ROOT_URLCONF="portfolio_platform.urls"):
+            return await sync_to_async(self.client.get)(url, headers=headers)
+
+    async def assertSameAsSync(self, url, **headers):
+        expected = await self.get_sync(url, **headers)
+        response = await self.async_client.get(url, headers=headers)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response.get("ETag"), expected.get("ETag"))
+        return response
+
+    def test_views_are_async_only_when_enabled(self):
+        self.assertFalse(iscoroutinefunction(ProjectViewSet.as_view({"get": "list"})))
+        with override_settings(ASYNC_READ_VIEWS=True):
+            view = ProjectViewSet.as_view({"get": "list"})
+        self.assertTrue(iscoroutinefunction(view))
+        # Роутер и querycheck читают эти атрибуты с функции вью
+        self.assertIs(view.cls, ProjectViewSet)
+        self.assertEqual(view.actions, {"get": "list"})
+
+    async def test_responses_match_sync_views(self):
+        for url in self.urls():
+            for headers in ({}, self.auth):
+                with self.subTest(url=url, auth=bool(headers)):
+                    response = await self.assertSameAsSync(url, **headers)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    async def test_errors_match_sync_views(self):
+        projects = reverse("project-list")
+        urls = [
+            reverse("project-detail", kwargs={"slug": "missing"}),
+            reverse("project-media-files", kwargs={"slug": "missing"}),
+            reverse("technology-list") + "abc/",
+            reverse("project-comments-list-create", kwargs={"project_slug": "missing"}),
+            f"{projects}?page=99",
+            f"{projects}?page=abc",
+            f"{projects}?cursor=garbage",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = await self.assertSameAsSync(url)
+                self.assertGreaterEqual(response.status_code, 400)
+
+    async def test_is_owner_with_bearer_token(self):
+        access = await sync_to_async(RefreshToken.for_user)(self.owner)
+        auth = {"authorization": f"Bearer {access.access_token}"}
+        detail = reverse("project-detail", kwargs={"slug": self.project.slug})
+        for url in (reverse("project-list"), detail):
+            with self.subTest(url=url):
+                response = await self.assertSameAsSync(url, **auth)
+                data = response.json()
+                data = data["results"][0] if "results" in data else data
+                self.assertIs(data["is_owner"], True)
+
+    async def test_keyset_pages_follow(self):
+        first = await self.async_client.get(f"{reverse('project-list')}?cursor=")
+        second = await self.assertSameAsSync(first.json()["next"])
+        slugs = [item["slug"] for item in first.json()["results"]]
+        slugs += [item["slug"] for item in second.json()["results"]]
+        self.assertEqual(len(set(slugs)), 12)
+        self.assertIsNone(second.json()["next"])
+
+    async def test_not_modified(self):
+        url = reverse("project-detail", kwargs={"slug": self.project.slug})
+        response = await self.async_client.get(url)
+        response = await self.async_client.get(
+            url, headers={"if-none-match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = await self.async_client.head(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    async def test_writes_use_sync_views(self):
+        media = reverse("project-media-files", kwargs={"slug": self.project.slug})
+        response = await self.async_client.post(media, {"caption": "x"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        comments = reverse(
+            "project-comments-list-create", kwargs={"project_slug": self.project.slug}
+        )
+        response = await self.async_client.post(
+            comments, {"text": "Async"}, headers=self.auth
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = await self.async_client.get(comments)
+        self.assertEqual(response.json()["count"], 3)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    async def test_response_cache(self):
+        url = reverse("project-list")
+        self.assertEqual((await self.async_client.get(url))["X-Cache"], "MISS")
+        self.assertEqual((await self.async_client.get(url))["X-Cache"], "HIT")
+        self.assertEqual(cache_stats.snapshot(), {"hits": 1, "misses": 1})
+
+
+@override_settings(REPLICA_DATABASES=["replica"], RESPONSE_CACHE_ENABLED=False)
+class ReplicaRoutingTests(APITransactionTestCase):
+    """
+    Реплика смотрит в ту же БД, что и default: данные одни, а по соединению
+    видно, куда ушли запросы. Транзакционный тест — иначе второе соединение
+    не увидит данных из незакоммиченной транзакции TestCase.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        health.reset()
+        self.owner = User.objects.create_user(
+            username="owner", password="password123", email="owner@test.com"
+        )
+        self.technology = Technology.objects.create(name="Django")
+        self.project = Project.objects.create(
+            owner=self.owner, title="Реплика", description="..."
+        )
+        self.comment = Comment.objects.create(
+            project=self.project, author=self.owner, text="Hi"
+        )
+        access = RefreshToken.for_user(self.owner).access_token
+        self.auth = {"authorization": f"Bearer {access}"}
+
+    def get(self, url, client=None, **headers):
+        """Ответ и число запросов к default и к реплике."""
+        client = client or self.client
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                response = client.get(url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        return response, len(primary), len(replica)
+
+    def test_safe_reads_go_to_replica(self):
+        slug = self.project.slug
+        comment = {"project_slug": slug, "comment_pk": self.comment.pk}
+        urls = [
+            reverse("project-list"),
+            reverse("project-detail", kwargs={"slug": slug}),
+            reverse("project-media-files", kwargs={"slug": slug}),
+            reverse("project-comments-list-create", kwargs={"project_slug": slug}),
+            reverse("project-comment-detail", kwargs=comment),
+            reverse("project-comment-thread", kwargs=comment),
+            reverse("technology-list"),
+            reverse("technology-detail", kwargs={"pk": self.technology.pk}),
+            reverse("user-list"),
+            reverse("user-detail", kwargs={"pk": self.owner.pk}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                _, primary, replica = self.get(url)
+                self.assertEqual(primary, 0)
+                self.assertGreater(replica, 0)
+
+    def test_other_views_stay_on_primary(self):
+        for url, headers in (
+            (f"{reverse('suggest')}?q=Реп", {}),
+            (reverse("current_user"), self.auth),
+        ):
+            with self.subTest(url=url):
+                _, primary, replica = self.get(url, **headers)
+                self.assertGreater(primary, 0)
+                self.assertEqual(replica, 0)
+
+    def test_write_pins_client_to_primary(self):
+        url = reverse(
+            "project-comments-list-create", kwargs={"project_slug": self.project.slug}
+        )
+        response = self.client.post(url, {"text": ""}, headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("db_primary_until", response.cookies)
+
+        response = self.client.post(url, {"text": "Новый"}, headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        until = response["X-DB-Primary-Until"]
+        self.assertEqual(response.cookies["db_primary_until"].value, until)
+        self.assertGreater(float(until), time.time())
+
+        # Cookie тестовый клиент возвращает сам
+        response, primary, replica = self.get(url)
+        self.assertEqual((primary > 0, replica), (True, 0))
+        self.assertEqual(response.json()["count"], 2)
+        # Клиент без cookie присылает метку заголовком
+        _, primary, replica = self.get(url, APIClient(), x_db_primary_until=until)
+        self.assertEqual((primary > 0, replica), (True, 0))
+        # Истёкшая метка не закрепляет
+        expired = str(int(time.time()) - 1)
+        _, primary, replica = self.get(url, APIClient(), x_db_primary_until=expired)
+        self.assertEqual((primary, replica > 0), (0, True))
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        url = reverse("project-list")
+        down = OperationalError("replica is down")
+        with mock.patch.object(connections["replica"], "cursor", side_effect=down):
+            _, primary, replica = self.get(url)
+        self.assertEqual((primary > 0, replica), (True, 0))
+        # Результат проверки кэшируется до REPLICA_HEALTH_CHECK_INTERVAL
+        _, primary, replica = self.get(url)
+        self.assertEqual((primary > 0, replica), (True, 0))
+
+        health.reset()
+        _, primary, replica = self.get(url)
+        self.assertEqual((primary, replica > 0), (0, True))
+
+        health.reset()
+        with self.settings(REPLICA_MAX_LAG_SECONDS=-1):
+            _, primary, replica = self.get(url)
+        # На реплике — только сама проверка отставания
+        self.assertEqual((primary > 0, replica), (True, 1))
+
+    def test_async_handler_routes_reads(self):
+        # Под ASGI реплику выбирает aprocess_view; ORM sync-вью работает
+        # в этом же потоке (thread_sensitive), поэтому запросы видны здесь
+        url = reverse("project-detail", kwargs={"slug": self.project.slug})
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                response = async_to_sync(self.async_client.get)(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(primary), 0)
+        self.assertGreater(len(replica), 0)
+
+    def test_router(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Project))
+        token = read_alias.set("replica")
+        try:
+            self.assertEqual(router.db_for_read(Project), "replica")
+            self.assertIsNone(router.db_for_write(Project))
+            # Внутри транзакции на primary реплика её изменений ещё не видит
+            with transaction.atomic():
+                self.assertIsNone(router.db_for_read(Project))
+            # Ответ, прочитанный с реплики, кэшируется ненадолго
+            with self.settings(REPLICA_RESPONSE_CACHE_TIMEOUT=7):
+                self.assertEqual(ProjectViewSet()._timeout(), 7)
+        finally:
+            read_alias.reset(token)
+        self.assertIs(router.allow_migrate("replica", "projects"), False)
+        self.assertIsNone(router.allow_migrate("default", "projects"))
@@ -0,0 +1,276 @@
+# Файл: apps/projects/uploads.py
+
+import hashlib
+import os
+import re
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+
+from apps.jobs.queue import enqueue
+
+from .models import ProjectMedia, UploadSession
+
+# Content-Range: bytes <first>-<last>/<total>
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+READ_BLOCK = 64 * 1024
+
+
+class OffsetMismatch(APIException):
+    """Часть пришла не с того места: клиент должен продолжить с offset."""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Chunk does not start at the current upload offset."
+    default_code = "offset_mismatch"
+
+    def __init__(self, offset):
+        super().__init__()
+        # offset отдаём числом, а не строкой ErrorDetail
+        self.detail = {"detail": self.detail, "offset": offset}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def temp_dir():
+    return _setting("UPLOAD_TEMP_DIR", None) or os.path.join(
+        tempfile.gettempdir(), "portfolio-uploads"
+    )
+
+
+def temp_path(session):
+    return os.path.join(temp_dir(), f"{session.pk}.part")
+
+
+def start_session(project, owner, **fields):
+    ttl = _setting("UPLOAD_SESSION_TTL", 24 * 60 * 60)
+    session = UploadSession.objects.create(
+        project=project,
+        owner=owner,
+        expires_at=timezone.now() + timedelta(seconds=ttl),
+        **fields,
+    )
+    os.makedirs(temp_dir(), exist_ok=True)
+    open(temp_path(session), "wb").close()
+    return session
+
+
+def parse_content_range(header, size):
+    match = CONTENT_RANGE_RE.match(header or "")
+    if not match:
+        raise ValidationError(
+            {"Content-Range": "Expected 'bytes <first>-<last>/<total>'."}
+        )
+    first, last, total = (int(value) for value in match.groups())
+    if total != size or first > last or last >= size:
+        raise ValidationError({"Content-Range": "Range is outside the upload."})
+    length = last - first + 1
+    if length > _setting("UPLOAD_CHUNK_MAX_SIZE", 16 * 1024 * 1024):
+        raise ValidationError({"Content-Range": "Chunk is too large."})
+    return first, length
+
+
+def append_chunk(session_id, stream, content_range, sha256=""):
+    """
+    Дописывает часть во временный файл потоково, блоками по 64 КБ.
+    Строка сессии заблокирована на время записи: два PUT одной части
+    не перепишут друг друга. Контрольная сумма сверяется до сдвига offset,
+    поэтому битая часть просто отбрасывается и повторяется клиентом.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id)
+        first, length = parse_content_range(content_range, session.size)
+        if first != session.received:
+            raise OffsetMismatch(session.received)
+
+        digest = hashlib.sha256()
+        written = 0
+        with open(temp_path(session), "r+b") as part:
+            part.seek(first)
+            while written < length:
+                block = stream.read(min(READ_BLOCK, length - written))
+                if not block:
+                    break
+                part.write(block)
+                digest.update(block)
+                written += len(block)
+            if written != length or (sha256 and digest.hexdigest() != sha256.lower()):
+                part.truncate(first)
+                raise ValidationError(
+                    {"detail": "Chunk is incomplete or its checksum does not match."}
+                )
+            part.truncate(first + length)
+
+        session.received = first + length
+        session.save(update_fields=["received"])
+    return session
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class HashingReader:
+    """
+    Файл, который считает SHA-256 того, что из него прочитали: storage
+    копирует файл, а сумма готова к концу копии — один проход вместо двух.
+    Если storage перечитывает файл не с начала, сумма считается заново.
+    """
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.digest = hashlib.sha256()
+        self.hashed = 0
+
+    def read(self, size=-1):
+        data = self.fh.read(size)
+        if self.digest is not None:
+            self.digest.update(data)
+            self.hashed += len(data)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        position = self.fh.seek(offset, whence)
+        if position == 0:
+            self.digest, self.hashed = hashlib.sha256(), 0
+        elif position != self.hashed:
+            self.digest = None
+        return position
+
+    def hexdigest(self):
+        return self.digest.hexdigest() if self.digest is not None else None
+
+    def __getattr__(self, name):
+        return getattr(self.fh, name)
+
+
+def complete(session_id):
+    """
+    Ставит сборку файла в очередь задач: сверка суммы и копия в storage
+    идут в воркере, а не в запросе. Повторный complete
+    возвращает ту же сессию и вторую задачу не ставит.
+    """
+    # Пока finish копирует файл, строка заблокирована: повтор complete
+    # отвечаем без блокировки, а не ждём конца копии
+    session = UploadSession.objects.filter(pk=session_id).first()
+    if session is None:
+        raise NotFound()
+    if session.status != UploadSession.Status.UPLOADING:
+        return session
+    with transaction.atomic():
+        session = (
+            UploadSession.objects.select_for_update().filter(pk=session_id).first()
+        )
+        if session is None:
+            raise NotFound()
+        if session.status != UploadSession.Status.UPLOADING:
+            return session
+        if session.received != session.size:
+            raise OffsetMismatch(session.received)
+        session.status = UploadSession.Status.PROCESSING
+        session.save(update_fields=["status"])
+        enqueue("projects.finish_upload", args=[str(session.pk)], unique=True)
+    return session
+
+
+def finish(session_id):
+    """
+    Задача projects.finish_upload: копирует файл в storage как ProjectMedia.
+    Строка сессии заблокирована до конца копии (SKIP LOCKED): задача, снова
+    выданная requeue_stale, пока первая ещё копирует, просто завершается.
+    Если воркер умер, блокировка снимается вместе с соединением.
+    """
+    with transaction.atomic():
+        session = (
+            UploadSession.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("project")
+            .filter(pk=session_id, status=UploadSession.Status.PROCESSING)
+            .first()
+        )
+        if session is None:
+            return None
+        media = _store(session)
+    # Сессия остаётся до expires_at: по ней клиент узнаёт результат
+    _remove_temp(session)
+    return media
+
+
+def _store(session):
+    path = temp_path(session)
+    media = ProjectMedia(
+        project=session.project,
+        file_type=session.file_type,
+        caption=session.caption,
+    )
+    # FieldFile.save копирует файл в storage блоками (или multipart в S3),
+    # строку в БД пишем только после сверки суммы
+    with open(path, "rb") as fh:
+        reader = HashingReader(fh)
+        media.file.save(session.filename, File(reader, name=path), save=False)
+    checksum = reader.hexdigest() or (session.sha256 and _file_sha256(path))
+    pending = UploadSession.objects.filter(
+        pk=session.pk, status=UploadSession.Status.PROCESSING
+    )
+    if session.sha256 and checksum != session.sha256.lower():
+        media.file.delete(save=False)
+        pending.update(
+            status=UploadSession.Status.FAILED,
+            error="Uploaded file checksum does not match.",
+        )
+        return None
+    try:
+        with transaction.atomic():
+            media.save()
+            if not pending.update(status=UploadSession.Status.COMPLETE, media=media):
+                raise UploadSession.DoesNotExist
+    except UploadSession.DoesNotExist:
+        # Сессию успели завершить или удалить: второй копии файла не оставляем
+        media.file.delete(save=False)
+        return None
+    return media
+
+
+def fail(session_id, error="Could not store the uploaded file."):
+    """
+    Задача projects.finish_upload провалена окончательно: без этого сессия
+    осталась бы в processing, и клиент опрашивал бы её до expires_at.
+    """
+    session = UploadSession.objects.filter(pk=session_id).first()
+    if session is None:
+        return
+    UploadSession.objects.filter(
+        pk=session.pk, status=UploadSession.Status.PROCESSING
+    ).update(status=UploadSession.Status.FAILED, error=error)
+    _remove_temp(session)
+
+
+def _remove_temp(session):
+    try:
+        os.remove(temp_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def discard(session):
+    _remove_temp(session)
+    session.delete()
+
+
+def clear_expired(now=None):
+    expired = UploadSession.objects.filter(expires_at__lt=now or timezone.now())
+    count = 0
+    for session in expired.iterator():
+        discard(session)
+        count += 1
+    return count
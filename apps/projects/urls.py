@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProjectViewSet, TechnologyViewSet, CommentListCreateView, CommentDetailView
+from .views import ProjectViewSet, TechnologyViewSet, CommentListCreateView, CommentDetailView, CommentThreadView, SuggestView
 
 router = DefaultRouter()
 router.register(r'projects', ProjectViewSet, basename='project')
@@ -8,7 +8,9 @@ router.register(r'technologies', TechnologyViewSet, basename='technology')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('suggest/', SuggestView.as_view(), name='suggest'),
     # Вложенные маршруты для комментариев
     path('projects/<slug:project_slug>/comments/', CommentListCreateView.as_view(), name='project-comments-list-create'),
     path('projects/<slug:project_slug>/comments/<int:comment_pk>/', CommentDetailView.as_view(), name='project-comment-detail'),
+    path('projects/<slug:project_slug>/comments/<int:comment_pk>/thread/', CommentThreadView.as_view(), name='project-comment-thread'),
 ]
\ No newline at end of file
@@ -2,45 +2,123 @@
 
 # Убираем неиспользуемый импорт Any
 # from typing import Any
-from rest_framework import viewsets, status, filters, generics
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.db.models import Count, Exists, Max, OuterRef
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.permissions import (
+    AllowAny,
+    IsAuthenticatedOrReadOnly,
+    IsAuthenticated,
+)
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Project, Technology, Comment, Like, ProjectMedia
+from apps.core.asyncviews import AsyncReadMixin, alist, gather
+from apps.core.conditional import ConditionalGetMixin
+from .models import Project, Technology, Comment, Like, ProjectMedia, UploadSession
 from .serializers import (
     ProjectSerializer,
     TechnologySerializer,
     CommentSerializer,
     ProjectMediaSerializer,
+    UploadIntentSerializer,
+    UploadSessionSerializer,
 )
+from . import batch, direct_uploads, likes, uploads
+from .cache import VersionedResponseCacheMixin
+from .filters import ProjectOrderingFilter, ProjectSearchFilter
 from .permissions import IsOwnerOrReadOnly
+from .suggest import suggest
+
+
+def _changes(queryset, field):
+    """Валидаторы набора строк: (время последнего изменения, количество)."""
+    # COUNT(*), а не COUNT(id): тогда хватает индекса по field (index-only scan)
+    stats = queryset.order_by().aggregate(last=Max(field), total=Count("*"))
+    # Только ETag: удаление строки не двигает MAX(updated_at), и по одному
+    # If-Modified-Since клиент получил бы 304 со старым списком. Счётчик в ETag
+    # удаление замечает
+    return (stats["last"], stats["total"]), None
+
+
+def _row_changes(queryset, **lookup):
+    """Валидаторы одной строки; None, если её нет (404 отдаст сам обработчик)."""
+    try:
+        updated_at = (
+            queryset.filter(**lookup).values_list("updated_at", flat=True).first()
+        )
+    except (TypeError, ValueError, ValidationError):
+        # Некорректный ключ из URL: retrieve ответит 404, как и без валидаторов
+        return None
+    return None if updated_at is None else ((updated_at,), updated_at)
 
 
-class TechnologyViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Technology.objects.all()
+class TechnologyViewSet(
+    ConditionalGetMixin, AsyncReadMixin, viewsets.ReadOnlyModelViewSet
+):
+    # Явная сортировка: страницы без неё не стабильны (по уникальному индексу name)
+    queryset = Technology.objects.order_by("name")
     serializer_class = TechnologySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    async_actions = ("list", "retrieve")
+    replica_read_actions = ("list", "retrieve")
 
+    def get_validators(self, request):
+        if self.action == "retrieve":
+            return _row_changes(Technology.objects, pk=self.kwargs["pk"])
+        return _changes(self.get_queryset(), "updated_at")
 
-class ProjectViewSet(viewsets.ModelViewSet):
-    queryset = Project.objects.all().prefetch_related(
-        "tags", "technologies", "owner", "comments", "likes"
-    )
+
+class SuggestView(APIView):
+    """Автодополнение: технологии, теги и заголовки проектов за один запрос."""
+
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        max_limit = getattr(settings, "SUGGEST_MAX_LIMIT", 20)
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+        limit = min(max(limit, 1), max_limit)
+        results = suggest(request.query_params.get("q", ""), limit)
+        return Response({"results": results})
+
+
+class ProjectViewSet(
+    ConditionalGetMixin,
+    VersionedResponseCacheMixin,
+    AsyncReadMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     permission_classes = [
         IsAuthenticatedOrReadOnly,
         IsOwnerOrReadOnly,
     ]
     lookup_field = "slug"
+    # Под ASGI (ASYNC_READ_VIEWS) эти GET не занимают поток: apps/core/asyncviews.py
+    async_actions = ("list", "retrieve", "media_files")
+    # GET, которые можно читать с реплики (apps/core/replicas.py); upload_session
+    # опрашивает только что записанную сессию и остаётся на primary
+    replica_read_actions = ("list", "retrieve", "media_files")
 
     # Из-за несовершенства в django-stubs, Pylance выдает ошибку о несовместимости типов.
     # Так как проблема не в нашем коде, а во внешних определениях, мы осознанно
     # подавляем эту ошибку для данной конкретной строки.
     filter_backends = (  # type: ignore
         DjangoFilterBackend,
-        filters.SearchFilter,
-        filters.OrderingFilter,
+        ProjectSearchFilter,
+        ProjectOrderingFilter,
     )
 
     filterset_fields = (
@@ -48,12 +126,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         "technologies__slug",
         "owner__username",
     )
-    search_fields = (
-        "title",
-        "description",
-        "tags__name",
-        "technologies__name",
-    )
+    # ?search= ищет по search_vector проекта (title, tags, technologies, description)
     ordering_fields = (
         "created_at",
         "likes_count",
@@ -62,49 +135,292 @@ class ProjectViewSet(viewsets.ModelViewSet):
     )
     ordering = ("-created_at",)
 
+    # Экшены, которым нужна только сама строка проекта (права + счётчик)
+    bare_project_actions = (
+        "like",
+        "media_files",
+        "start_upload",
+        "upload_intent",
+        "complete_upload_intent",
+    )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("list", "retrieve"):
+            # Счётчики лежат в строке проекта, поэтому comments/likes не грузим;
+            # владельца подтягиваем JOIN'ом, теги и технологии — двумя запросами на страницу.
+            return self.with_viewer_flags(
+                queryset.select_related("owner").prefetch_related(
+                    "tags", "technologies"
+                )
+            )
+        if self.action in self.bare_project_actions:
+            return queryset
+        # create/update/destroy: owner нужен для проверки прав и owner_username в ответе
+        return self.with_viewer_flags(queryset.select_related("owner"))
+
+    def with_viewer_flags(self, queryset):
+        """
+        is_liked для всей страницы — подзапросом EXISTS в том же SELECT,
+        по уникальному индексу (project, user). Анониму аннотация не нужна.
+        """
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset
+        return queryset.annotate(
+            is_liked=Exists(
+                Like.objects.filter(project=OuterRef("pk"), user_id=user.pk)
+            )
+        )
+
+    def get_validators(self, request):
+        # updated_at проекта двигают и сохранения, и счётчики, и смена тегов/технологий
+        if self.action == "list":
+            return _changes(self.filter_queryset(self.get_queryset()), "updated_at")
+        if self.action == "retrieve":
+            return _row_changes(Project.objects, slug=self.kwargs["slug"])
+        if self.action == "media_files":
+            # updated_at двигает и задача, дописывающая производные изображений
+            media = ProjectMedia.objects.filter(project__slug=self.kwargs["slug"])
+            return _changes(media, "updated_at")
+        return None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == "list":
+            # Списки не должны тянуть полноразмерные main_image
+            context["thumbnail_width"] = settings.IMAGE_LIST_WIDTH
+        return context
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    # Импорт пачкой: до PROJECT_BATCH_MAX_SIZE проектов за запрос, всё или ничего
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="batch",
+        url_name="batch",
+        permission_classes=[IsAuthenticated],
+    )
+    def save_batch(self, request):
+        items = request.data.get("projects") if isinstance(request.data, dict) else None
+        max_size = batch.max_batch_size()
+        if not isinstance(items, list) or not 0 < len(items) <= max_size:
+            return Response(
+                {"projects": [f"Expected a list of 1 to {max_size} projects."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        validated, existing, errors = batch.validate(request.user, items)
+        if errors:
+            # Ничего не записано: ошибки по индексам, остальные элементы валидны
+            results = [
+                {"index": index, "errors": errors[index]} for index in sorted(errors)
+            ]
+            return Response({"results": results}, status=status.HTTP_400_BAD_REQUEST)
+
+        saved = batch.save_batch(request.user, validated, existing)
+        results = [
+            {
+                "index": index,
+                "status": "created" if created else "updated",
+                "id": project.pk,
+                "slug": project.slug,
+            }
+            for index, (project, created) in enumerate(saved)
+        ]
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
     # Мы ранее исправляли этот экшен, но теперь, после фиксов моделей, он окончательно корректен
     # permission_classes здесь был `[IsAuthenticatedOrReadOnly]` и ручная проверка, исправим на IsOwnerOrReadOnly
     @action(
         detail=True, methods=["post", "get"], permission_classes=[IsOwnerOrReadOnly]
     )
     def media_files(self, request, slug=None):
+        if request.method == "GET":
+            # 304 отдаём по MAX(updated_at)/COUNT(*) ещё до загрузки проекта
+            return self.conditional_response(request, self._list_media_files, slug=slug)
+
         project = self.get_object()
-        if request.method == "POST":
-            # Ручная проверка больше не нужна, IsOwnerOrReadOnly сделает это за нас для небезопасных методов
-            # if project.owner != request.user and not request.user.is_staff:
-            #      return Response(
-            #         {"detail": "You do not have permission to perform this action."},
-            #         status=status.HTTP_403_FORBIDDEN
-            #     )
-
-            serializer = ProjectMediaSerializer(
-                data=request.data, context={"request": request}
-            )
-            if serializer.is_valid():
-                serializer.save(project=project)
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # Ручная проверка больше не нужна, IsOwnerOrReadOnly сделает это за нас для небезопасных методов
+        # if project.owner != request.user and not request.user.is_staff:
+        #      return Response(
+        #         {"detail": "You do not have permission to perform this action."},
+        #         status=status.HTTP_403_FORBIDDEN
+        #     )
+
+        serializer = ProjectMediaSerializer(
+            data=request.data, context={"request": request}
+        )
+        if serializer.is_valid():
+            serializer.save(project=project)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        # GET
+    def _list_media_files(self, request, slug=None):
+        project = self.get_object()
         media = ProjectMedia.objects.filter(project=project)
         serializer = ProjectMediaSerializer(
             media, many=True, context={"request": request}
         )
         return Response(serializer.data)
 
+    async def amedia_files(self, request, slug=None):
+        # Только GET: POST в media_files обрабатывается синхронно
+        return await self.aconditional_response(
+            request, self._alist_media_files, slug=slug
+        )
+
+    async def _alist_media_files(self, request, slug=None):
+        # Проект нужен лишь для 404 и прав, файлы выбираются по slug — параллельно
+        _, media = await gather(
+            self.aget_object(),
+            alist(ProjectMedia.objects.filter(project__slug=slug)),
+        )
+        serializer = ProjectMediaSerializer(
+            media, many=True, context={"request": request}
+        )
+        return Response(serializer.data)
+
+    # Возобновляемая загрузка больших файлов: создать сессию, слать части PUT'ом
+    # с Content-Range, затем complete. Протокол и проверки — в uploads.py.
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="uploads",
+        permission_classes=[IsAuthenticated, IsOwnerOrReadOnly],
+    )
+    def start_upload(self, request, slug=None):
+        project = self.get_object()
+        serializer = UploadSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = uploads.start_session(
+            project, request.user, **serializer.validated_data
+        )
+        return Response(
+            UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED
+        )
+
+    # Загрузка мимо Django: клиент кладёт файл в S3/MinIO по presigned PUT,
+    # затем подтверждает её токеном. На файловом storage отдаём сессию загрузки частями.
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="upload-intents",
+        permission_classes=[IsAuthenticated, IsOwnerOrReadOnly],
+    )
+    def upload_intent(self, request, slug=None):
+        project = self.get_object()
+        serializer = UploadIntentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        fields = dict(serializer.validated_data)
+        if direct_uploads.supports_direct_upload():
+            intent = direct_uploads.create_intent(project, request.user, **fields)
+            return Response(intent, status=status.HTTP_201_CREATED)
+
+        fields.pop("content_type")
+        session = uploads.start_session(project, request.user, **fields)
+        upload_url = reverse(
+            "project-upload-session",
+            kwargs={"slug": project.slug, "upload_id": session.pk},
+        )
+        return Response(
+            {
+                "mode": "chunked",
+                "url": request.build_absolute_uri(upload_url),
+                "upload": UploadSessionSerializer(session).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="upload-intents/complete",
+        permission_classes=[IsAuthenticated, IsOwnerOrReadOnly],
+    )
+    def complete_upload_intent(self, request, slug=None):
+        project = self.get_object()
+        if not direct_uploads.supports_direct_upload():
+            return Response(
+                {"detail": "Direct uploads are disabled; use the chunked upload."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        media, created = direct_uploads.complete_intent(
+            project, request.user, request.data.get("token", "")
+        )
+        serializer = ProjectMediaSerializer(media, context={"request": request})
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    def _get_upload_session(self, request, slug, upload_id):
+        # Чужие и просроченные сессии не отличаем от несуществующих
+        return get_object_or_404(
+            UploadSession.objects.select_related("project"),
+            pk=upload_id,
+            project__slug=slug,
+            owner_id=request.user.pk,
+            expires_at__gt=timezone.now(),
+        )
+
+    @action(
+        detail=True,
+        methods=["get", "put", "delete"],
+        url_path=r"uploads/(?P<upload_id>[0-9a-f-]{36})",
+        permission_classes=[IsAuthenticated],
+    )
+    def upload_session(self, request, slug=None, upload_id=None):
+        session = self._get_upload_session(request, slug, upload_id)
+        if request.method == "PUT":
+            session = uploads.append_chunk(
+                session.pk,
+                request.stream or BytesIO(),
+                request.headers.get("Content-Range"),
+                request.headers.get("X-Chunk-SHA256", ""),
+            )
+        elif request.method == "DELETE":
+            uploads.discard(session)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(UploadSessionSerializer(session).data)
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path=r"uploads/(?P<upload_id>[0-9a-f-]{36})/complete",
+        permission_classes=[IsAuthenticated],
+    )
+    def complete_upload(self, request, slug=None, upload_id=None):
+        # Файл собирает задача: ответ 202, результат (status, media) — GET сессии
+        session = self._get_upload_session(request, slug, upload_id)
+        session = uploads.complete(session.pk)
+        return Response(
+            UploadSessionSerializer(session).data, status=status.HTTP_202_ACCEPTED
+        )
+
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def like(self, request, slug=None):
         project = self.get_object()
         user = request.user
 
+        if likes.buffer_enabled():
+            # Под нагрузкой: переключение в буфер, счётчик — с учётом ещё не сброшенного
+            liked, likes_count = likes.toggle_like(project, user)
+            if liked:
+                return Response(
+                    {"status": "liked", "likes_count": likes_count},
+                    status=status.HTTP_201_CREATED,
+                )
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
         like_instance, created = Like.objects.get_or_create(project=project, user=user)
 
         if created:
+            # Счётчик уже увеличен сигналом, перечитываем только его — без COUNT(*)
+            project.refresh_from_db(fields=["likes_count"])
             return Response(
-                {"status": "liked", "likes_count": project.likes.count()},
+                {"status": "liked", "likes_count": project.likes_count},
                 status=status.HTTP_201_CREATED,
             )
         else:
@@ -114,29 +430,97 @@ class ProjectViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-# ... (CommentListCreateView и CommentDetailView без изменений)
-class CommentListCreateView(generics.ListCreateAPIView):
+# Комментарии: проект ищется один раз на запрос, автор — JOIN'ом, страницы —
+# keyset по (created_at, id) через ?cursor=. Ответы хранят материализованный путь.
+class ProjectCommentsMixin:
+    def get_project(self):
+        if not hasattr(self, "_project"):
+            self._project = get_object_or_404(
+                Project.objects.only("id", "slug"), slug=self.kwargs["project_slug"]
+            )
+        return self._project
+
+    async def aget_project(self):
+        if not hasattr(self, "_project"):
+            try:
+                self._project = await Project.objects.only("id", "slug").aget(
+                    slug=self.kwargs["project_slug"]
+                )
+            except Project.DoesNotExist:
+                raise Http404("No Project matches the given query.")
+        return self._project
+
+    def get_queryset(self):
+        return Comment.objects.filter(project=self.get_project()).select_related(
+            "author"
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        # Дальше get_project() берёт проект из self._project, без запроса
+        await self.aget_project()
+        return await super().alist(request, *args, **kwargs)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["project"] = self.get_project()
+        return context
+
+
+class CommentListCreateView(
+    ConditionalGetMixin,
+    ProjectCommentsMixin,
+    AsyncReadMixin,
+    generics.ListCreateAPIView,
+):
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    async_actions = ("get",)
+    replica_read_actions = ("get",)
+
+    async def aget(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    def get_validators(self, request):
+        # Для 304 хватает одного запроса с JOIN'ом, сам проект не нужен
+        comments = Comment.objects.filter(project__slug=self.kwargs["project_slug"])
+        return _changes(comments, "updated_at")
 
     def get_queryset(self):
-        project_slug = self.kwargs["project_slug"]
-        return Comment.objects.filter(project__slug=project_slug)
+        queryset = super().get_queryset()
+        if "roots" in self.request.query_params:
+            # ?roots — только комментарии к самому проекту, без ответов
+            queryset = queryset.filter(parent__isnull=True)
+        return queryset
 
     def perform_create(self, serializer):
-        project_slug = self.kwargs["project_slug"]
-        project = Project.objects.get(slug=project_slug)
-        serializer.save(author=self.request.user, project=project)
+        serializer.save(author=self.request.user, project=self.get_project())
+
+
+class CommentThreadView(ProjectCommentsMixin, generics.ListAPIView):
+    """
+    Комментарий со всеми ответами в порядке обхода дерева: один запрос
+    path LIKE '<путь корня>%' по индексу (project, path).
+    """
+
+    serializer_class = CommentSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    replica_read_actions = ("get",)
 
+    def get_queryset(self):
+        root = get_object_or_404(
+            Comment.objects.filter(project=self.get_project()).only("path"),
+            pk=self.kwargs["comment_pk"],
+        )
+        return (
+            super().get_queryset().filter(path__startswith=root.path).order_by("path")
+        )
 
-class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
+
+class CommentDetailView(ProjectCommentsMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CommentSerializer
     permission_classes = [
         IsAuthenticatedOrReadOnly,
         IsOwnerOrReadOnly,
     ]
     lookup_url_kwarg = "comment_pk"
-
-    def get_queryset(self):
-        project_slug = self.kwargs["project_slug"]
-        return Comment.objects.filter(project__slug=project_slug)
+    replica_read_actions = ("get",)
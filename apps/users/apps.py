@@ -5,3 +5,6 @@ class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.users"  # <--- ИЗМЕНИТЬ ЗДЕСЬ
     label = "users"  # <--- Явно указать label для Django
+
+    def ready(self):
+        from . import signals  # noqa: F401  регистрирует обработчики сигналов
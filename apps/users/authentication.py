@@ -0,0 +1,44 @@
+# Файл: apps/users/authentication.py
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import principals
+from .tokens import issued_before_cutoff
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication, который берёт пользователя из кэша (principals.py)
+    вместо SELECT по id на каждый запрос. Проверки is_active, пароля
+    и tokens_valid_after выполняются на каждом запросе, в том числе на GET.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                "Token contained no recognizable user identification"
+            ) from e
+
+        user, version = principals.get(user_id)
+        if user is None:
+            # Проверки is_active и пароля делает родитель; кэшируем только прошедших
+            user = super().get_user(validated_token)
+            principals.store(user_id, user, version)
+        else:
+            if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+                raise AuthenticationFailed("User is inactive", code="user_inactive")
+            if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    "The user's password has been changed.", code="password_changed"
+                )
+
+        if issued_before_cutoff(user, validated_token):
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+        return user
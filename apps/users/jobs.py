@@ -0,0 +1,15 @@
+# Файл: apps/users/jobs.py
+
+from apps.core.images import UnreadableImage, refresh_derivatives
+from apps.jobs.registry import register
+
+from . import principals
+from .models import CustomUser
+
+
+@register("users.avatar_derivatives", permanent=[UnreadableImage])
+def avatar_derivatives(user_id):
+    user = CustomUser.objects.filter(pk=user_id).first()
+    # refresh_derivatives пишет UPDATE'ом, без post_save: кэш сбрасываем сами
+    if user is not None and refresh_derivatives(user, "avatar"):
+        principals.invalidate(user.pk)
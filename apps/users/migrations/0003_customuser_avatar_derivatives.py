@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="avatar_derivatives",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_customuser_avatar_derivatives"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevokedToken",
+            fields=[
+                (
+                    "jti",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="customuser",
+            name="tokens_valid_after",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
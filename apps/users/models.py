@@ -5,11 +5,31 @@ class CustomUser(AbstractUser):
     # Дополнительные поля, если нужны (например, avatar, bio)
     bio = models.TextField(blank=True, null=True)
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    # Уменьшенные копии аватара, строятся фоновой задачей (apps/users/jobs.py)
+    avatar_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     # email должен быть уникальным для восстановления пароля и т.д.
     email = models.EmailField(unique=True)
+    # Отзыв всех токенов пользователя: токены, выданные раньше, не принимаются
+    tokens_valid_after = models.DateTimeField(null=True, blank=True, editable=False)
 
     #USERNAME_FIELD = 'email' # Если хотим логиниться по email
     #REQUIRED_FIELDS = ['username'] # Убрать email если он USERNAME_FIELD
 
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return self.username
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Под keyset-пагинацию списка пользователей: (date_joined, id)
+            models.Index(fields=["date_joined", "id"], name="user_joined_id_idx"),
+        ]
+
+
+class RevokedToken(models.Model):
+    # Отозванные refresh-токены (ротация, выход). Поиск — по первичному ключу jti,
+    # строки после expires_at бесполезны и удаляются prune_revoked_tokens
+    jti = models.CharField(max_length=255, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,77 @@
+# Файл: apps/users/principals.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import CustomUser
+
+# Кэш пользователей для аутентификации по JWT. Ключ записи включает версию
+# пользователя: сохранение, смена пароля или деактивация сдвигают версию,
+# и старая запись больше никогда не читается (просто истекает по TTL).
+
+
+def auth_cache():
+    return caches[getattr(settings, "AUTH_USER_CACHE_ALIAS", "default")]
+
+
+def _timeout():
+    return getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 60)
+
+
+def version_key(user_id):
+    return f"users:principal-version:{user_id}"
+
+
+def user_key(user_id, version):
+    return f"users:principal:{user_id}:{version}"
+
+
+def current_version(user_id):
+    cache = auth_cache()
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Не начинаем с 1: вытесненная версия не должна оживить старые записи
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get(user_id):
+    """(пользователь из кэша или None, версия, под которой его сохранять)."""
+    version = current_version(user_id)
+    return auth_cache().get(user_key(user_id, version)), version
+
+
+def get_or_load(user_id):
+    """Пользователь из кэша, а при промахе — из БД (None, если его нет)."""
+    user, version = get(user_id)
+    if user is None:
+        user = CustomUser.objects.filter(pk=user_id).first()
+        if user is not None:
+            store(user_id, user, version)
+    return user
+
+
+def store(user_id, user, version):
+    # Версию читаем до запроса в БД: если пользователя успели изменить,
+    # запись ляжет под устаревшую версию и не будет прочитана
+    auth_cache().set(user_key(user_id, version), user, _timeout())
+
+
+def bump(user_id):
+    cache = auth_cache()
+    try:
+        cache.incr(version_key(user_id))
+    except ValueError:
+        current_version(user_id)
+
+
+def invalidate(user_id):
+    """Сдвигает версию сразу и ещё раз после коммита — как cache.invalidate проектов."""
+    bump(user_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump(user_id))
@@ -2,13 +2,21 @@ from rest_framework import serializers
 from .models import CustomUser
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from apps.core.serializers import SrcsetField
+from . import principals, tokens
 
 User = get_user_model()
 
 class UserSerializer(serializers.ModelSerializer):
+    avatar_srcset = SrcsetField('avatar')
+
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'bio', 'avatar')
+        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'bio', 'avatar', 'avatar_srcset')
         read_only_fields = ('id',)
 
 
@@ -35,4 +43,40 @@ class RegisterSerializer(serializers.ModelSerializer):
         )
         user.set_password(validated_data['password'])
         user.save()
-        return user
\ No newline at end of file
+        return user
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    # Отозванные токены отсекает RevocableRefreshToken; пользователь — из кэша principals
+    token_class = tokens.RevocableRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = principals.get_or_load(refresh.get(api_settings.USER_ID_CLAIM))
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist() # INSERT jti: второй запрос с тем же токеном получит 401
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class TokenVerifySerializer(jwt_serializers.TokenVerifySerializer):
+    # Тот же отзыв, что у API: по jti (RevokedToken) и по отсечке tokens_valid_after
+    def validate(self, attrs):
+        tokens.check_revoked(UntypedToken(attrs['token']))
+        return {}
+
+
+class TokenBlacklistSerializer(jwt_serializers.TokenBlacklistSerializer):
+    token_class = tokens.RevocableRefreshToken
+
+    def validate(self, attrs):
+        tokens.revoke(self.token_class(attrs['refresh']))
+        return {}
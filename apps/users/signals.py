@@ -0,0 +1,25 @@
+# Файл: apps/users/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.images import is_stale
+from apps.jobs.queue import enqueue
+
+from . import principals
+from .models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+def avatar_changed(sender, instance, raw=False, **kwargs):
+    if not raw and is_stale(instance, "avatar"):
+        enqueue("users.avatar_derivatives", args=[instance.pk], unique=True)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Вход обновляет только last_login — для аутентификации это ничего не меняет
+    if raw or update_fields == frozenset({"last_login"}):
+        return
+    principals.invalidate(instance.pk)
@@ -1,19 +1,41 @@
 # Файл: apps/users/tests.py
 
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
 # Убираем неиспользуемый импорт APIClient - ошибка Ruff F401 будет исправлена
 # from rest_framework.test import APIClient
 # Убираем get_user_model
 # from django.contrib.auth import get_user_model
 # Импортируем нашу конкретную модель пользователя
-from .models import CustomUser
+from apps.jobs.queue import run_pending
+from apps.projects.models import Project
+from .models import CustomUser, RevokedToken
 
 # Теперь User - это наш CustomUser, и Pylance это знает
 User = CustomUser
 
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(prefix="portfolio-tests-")
+
+
+def tearDownModule():
+    shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
 
 class UserAuthTests(APITestCase):
 
@@ -107,3 +129,191 @@ class UserAuthTests(APITestCase):
         # После установки djangorestframework-stubs, здесь ошибки нет
         self.assertEqual(response.data["first_name"], "Updated")
         self.assertEqual(response.data["bio"], "A new bio.")
+
+
+class UserListPaginationTests(APITestCase):
+    def test_users_cursor_pagination(self):
+        """Список пользователей листается курсором без COUNT(*)."""
+        for i in range(12):
+            User.objects.create_user(
+                username=f"user{i}", password="password123", email=f"u{i}@test.com"
+            )
+        response = self.client.get(reverse("user-list"), {"cursor": ""})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        first_page = [item["username"] for item in response.data["results"]]
+
+        response = self.client.get(response.data["next"])
+        second_page = [item["username"] for item in response.data["results"]]
+        self.assertIsNone(response.data["next"])
+        self.assertEqual(len(first_page) + len(second_page), 12)
+        self.assertFalse(set(first_page) & set(second_page))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_DERIVATIVE_WIDTHS=(64, 128))
+class AvatarDerivativeTests(APITestCase):
+    def test_avatar_srcset(self):
+        buffer = BytesIO()
+        Image.new("RGB", (400, 400), "blue").save(buffer, "PNG")
+        user = User.objects.create_user(
+            username="avatar",
+            password="password123",
+            email="avatar@test.com",
+            avatar=SimpleUploadedFile("me.png", buffer.getvalue()),
+        )
+        self.assertEqual(run_pending(), 1)
+        response = self.client.get(reverse("user-detail", kwargs={"pk": user.pk}))
+        srcset = response.data["avatar_srcset"]
+        self.assertIn("derivatives/me-64w.jpg 64w, ", srcset["jpeg"])
+        self.assertTrue(srcset["webp"].endswith("derivatives/me-128w.webp 128w"))
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="cached", password="password123", email="cached@test.com"
+        )
+        self.url = reverse("current_user")
+
+    def authorize(self):
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def user_queries(self, url=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url or self.url)
+        queries = [q for q in ctx.captured_queries if "users_customuser" in q["sql"]]
+        return response, len(queries)
+
+    def test_user_comes_from_cache_after_first_request(self):
+        self.authorize()
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, 1)
+        response, queries = self.user_queries()
+        self.assertEqual(response.data["username"], "cached")
+        self.assertEqual(queries, 0)
+
+    def test_save_and_deactivation_invalidate_cache(self):
+        self.authorize()
+        self.user_queries()
+        self.user.first_name = "Renamed"
+        self.user.save()
+        response, queries = self.user_queries()
+        self.assertEqual((response.data["first_name"], queries), ("Renamed", 1))
+
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        response, _ = self.user_queries()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_does_not_invalidate_cache(self):
+        self.authorize()
+        self.user_queries()
+        self.client.post(
+            reverse("token_obtain_pair"),
+            {"username": "cached", "password": "password123"},
+            format="json",
+        )
+        _, queries = self.user_queries()
+        self.assertEqual(queries, 0)
+
+    def test_safe_project_requests_use_cached_user(self):
+        project = Project.objects.create(
+            owner=self.user, title="Mine", description="..."
+        )
+        detail = reverse("project-detail", kwargs={"slug": project.slug})
+        self.authorize()
+        self.user_queries(reverse("project-list"))
+        # Пользователь из кэша: is_owner сравнивает настоящие pk, без SELECT
+        for url in (reverse("project-list"), detail):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            data = response.data["results"][0] if url != detail else response.data
+            self.assertTrue(data["is_owner"])
+            # Автора проекты берут JOIN'ом; отдельного SELECT пользователя нет
+            sql = [q["sql"] for q in ctx.captured_queries]
+            self.assertFalse([q for q in sql if 'FROM "users_customuser"' in q])
+
+        # Деактивация и logout-all действуют и на GET, не дожидаясь expiry токена
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        response, _ = self.user_queries(detail)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TokenRevocationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="revoker", password="password123", email="revoker@test.com"
+        )
+        self.refresh_url = reverse("token_refresh")
+
+    def refresh(self, token):
+        return self.client.post(self.refresh_url, {"refresh": str(token)})
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        token = RefreshToken.for_user(self.user)
+        # Ротация: пользователь из кэша, отзыв — один INSERT, без SELECT по jti
+        self.refresh(RefreshToken.for_user(self.user))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.refresh(token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("refresh", response.data)
+        self.assertEqual(
+            [
+                q["sql"].split()[0]
+                for q in ctx.captured_queries
+                if "revoked" in q["sql"]
+            ],
+            ["INSERT"],
+        )
+
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Кэш мог потерять запись — повтор всё равно ловит первичный ключ
+        cache.clear()
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_and_logout_all(self):
+        token = RefreshToken.for_user(self.user)
+        response = self.client.post(reverse("token_blacklist"), {"refresh": str(token)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+        other = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {other.access_token}")
+        self.assertEqual(self.client.get(reverse("current_user")).status_code, 200)
+        response = self.client.post(reverse("logout_all"))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get(reverse("current_user")).status_code, 401)
+        self.assertEqual(self.refresh(other).status_code, 401)
+
+    def test_verify_rejects_revoked_tokens(self):
+        verify_url = reverse("token_verify")
+        token = RefreshToken.for_user(self.user)
+        access = str(token.access_token)
+        response = self.client.post(verify_url, {"token": str(token)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.post(reverse("token_blacklist"), {"refresh": str(token)})
+        response = self.client.post(verify_url, {"token": str(token)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Access-токен отзывается отсечкой logout-all
+        response = self.client.post(verify_url, {"token": access})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.client.post(reverse("logout_all"))
+        self.client.credentials()
+        response = self.client.post(verify_url, {"token": access})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_prune_removes_only_expired(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti="old", expires_at=now - timedelta(days=1))
+        RevokedToken.objects.create(jti="live", expires_at=now + timedelta(days=1))
+        call_command("prune_revoked_tokens", batch_size=1, stdout=StringIO())
+        self.assertEqual(
+            list(RevokedToken.objects.values_list("jti", flat=True)), ["live"]
+        )
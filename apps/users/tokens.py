@@ -0,0 +1,113 @@
+# Файл: apps/users/tokens.py
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import principals
+from .models import RevokedToken
+
+# Чёрный список refresh-токенов без token_blacklist из simplejwt: одна таблица
+# отозванных jti (первичный ключ) с кэшем впереди и отсечка по времени выдачи
+# на пользователе для отзыва всех его токенов сразу.
+
+
+def revoked_key(jti):
+    return f"users:revoked:{jti}"
+
+
+def _expires_at(token):
+    return datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+
+
+def revoke(token):
+    """
+    Отзывает токен. INSERT по первичному ключу jti — он же проверка: вернёт
+    False, если токен уже был отозван (повторное использование при ротации).
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=_expires_at(token))
+        created = True
+    except IntegrityError:
+        created = False
+    ttl = int((_expires_at(token) - timezone.now()).total_seconds())
+    if ttl > 0:
+        principals.auth_cache().set(revoked_key(jti), True, ttl)
+    return created
+
+
+def is_revoked(token, check_db=True):
+    jti = token[api_settings.JTI_CLAIM]
+    if principals.auth_cache().get(revoked_key(jti)):
+        return True
+    return check_db and RevokedToken.objects.filter(jti=jti).exists()
+
+
+def issued_before_cutoff(user, token):
+    """Токен выдан до revoke_all(user)."""
+    cutoff = user.tokens_valid_after
+    return cutoff is not None and token.get("iat", 0) < cutoff.timestamp()
+
+
+def check_revoked(token, check_db=True):
+    """
+    TokenError, если токен отозван по jti или выдан до revoke_all(user).
+    Общая проверка для ротации refresh-токенов и /api/auth/token/verify/.
+    """
+    if is_revoked(token, check_db=check_db):
+        raise TokenError("Token is blacklisted")
+    user = principals.get_or_load(token.get(api_settings.USER_ID_CLAIM))
+    if user is not None and issued_before_cutoff(user, token):
+        raise TokenError("Token is blacklisted")
+
+
+def revoke_all(user):
+    """
+    Отзывает все токены пользователя (access и refresh) одной записью в его
+    строке. Токены, выданные в ту же секунду уже после вызова, тоже
+    отклоняются: iat в JWT округляется до секунд.
+    """
+    user.tokens_valid_after = timezone.now()
+    # post_save сдвигает версию кэша пользователя (principals)
+    user.save(update_fields=["tokens_valid_after"])
+
+
+def prune_expired(batch_size=10000, now=None):
+    """Удаляет истёкшие записи пачками, чтобы не держать долгих блокировок."""
+    now = now or timezone.now()
+    removed = 0
+    while True:
+        batch = list(
+            RevokedToken.objects.filter(expires_at__lt=now).values_list(
+                "pk", flat=True
+            )[:batch_size]
+        )
+        if not batch:
+            return removed
+        removed += RevokedToken.objects.filter(pk__in=batch).delete()[0]
+
+
+class RevocableRefreshToken(RefreshToken):
+    """RefreshToken с проверкой по RevokedToken и отсечке пользователя."""
+
+    def verify(self):
+        super().verify()
+        self.check_blacklist()
+
+    def check_blacklist(self):
+        # При ротации с отзывом повторное использование и так поймает INSERT
+        # в blacklist(), поэтому в БД смотрим только без неё
+        enforced_on_use = (
+            api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION
+        )
+        check_revoked(self, check_db=not enforced_on_use)
+
+    def blacklist(self):
+        if not revoke(self):
+            raise TokenError("Token is blacklisted")
@@ -1,8 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserViewSet, RegisterView, CurrentUserView
+from .views import UserViewSet, RegisterView, CurrentUserView, LogoutAllView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
+    TokenBlacklistView,
     TokenRefreshView,
     TokenVerifyView,
 )
@@ -16,5 +17,7 @@ urlpatterns = [
     path('auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'), # Получение токена
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'), # Обновление токена
     path('auth/token/verify/', TokenVerifyView.as_view(), name='token_verify'),   # Верификация токена
+    path('auth/logout/', TokenBlacklistView.as_view(), name='token_blacklist'), # Отзыв refresh-токена
+    path('auth/logout-all/', LogoutAllView.as_view(), name='logout_all'), # Отзыв всех токенов пользователя
     path('auth/me/', CurrentUserView.as_view(), name='current_user'),
 ]
\ No newline at end of file
@@ -1,13 +1,18 @@
-from rest_framework import generics, viewsets, permissions
+from rest_framework import generics, viewsets, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from .serializers import UserSerializer, RegisterSerializer
+from .tokens import revoke_all
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 class UserViewSet(viewsets.ReadOnlyModelViewSet): # Только чтение для списка и деталей
-    queryset = User.objects.all()
+    # Явная сортировка нужна и для стабильных страниц, и для keyset-курсора
+    queryset = User.objects.order_by("-date_joined", "-id")
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    replica_read_actions = ("list", "retrieve") # Чтения с реплик, см. apps/core/replicas.py
 
 
 class RegisterView(generics.CreateAPIView):
@@ -23,4 +28,13 @@ class CurrentUserView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
 
-    # Можно добавить partial_update для PATCH
\ No newline at end of file
+    # Можно добавить partial_update для PATCH
+
+
+class LogoutAllView(APIView):
+    """Отзывает все access- и refresh-токены текущего пользователя."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        revoke_all(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,137 @@
+# Файл: gunicorn.conf.py
+#
+# Продакшен-запуск: gunicorn -c gunicorn.conf.py
+#
+# SERVER_MODE=wsgi (по умолчанию) — gthread-воркеры поверх portfolio_platform.wsgi;
+# SERVER_MODE=asgi — uvicorn-воркеры поверх portfolio_platform.asgi.
+# Размеры выводятся из числа ядер, любую величину можно задать через GUNICORN_*.
+# Соединения с PostgreSQL берутся из пула psycopg в каждом воркере (DB_POOL):
+# workers * DB_POOL_MAX_SIZE не должно превышать max_connections (или пул
+# PgBouncer) за вычетом запаса на миграции и cron. Пулу gthread-воркера нужно
+# не меньше GUNICORN_THREADS соединений, иначе потоки ждут друг друга.
+
+import glob
+import multiprocessing
+import os
+import sys
+
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+CPU_COUNT = multiprocessing.cpu_count()
+
+# Общий каталог метрик нужен только под gunicorn (несколько процессов), поэтому
+# он задаётся здесь, а не в образе: runserver из того же образа обходится без него
+os.environ.setdefault("METRICS_MULTIPROC_DIR", "/tmp/metrics")
+
+
+def _int(name, default):
+    return int(os.getenv(name, default))
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+backlog = _int("GUNICORN_BACKLOG", 2048)
+
+if SERVER_MODE == "asgi":
+    wsgi_app = "portfolio_platform.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+    # Воркер с event loop занимает ядро целиком; ожидание БД и клиентов
+    # он перекрывает сам, лишние процессы только делят CPU
+    workers = _int("GUNICORN_WORKERS", max(CPU_COUNT, 2))
+else:
+    wsgi_app = "portfolio_platform.wsgi:application"
+    worker_class = "gthread"
+    # Классическое 2 * ядра + 1, но не больше GUNICORN_MAX_WORKERS: процессы
+    # дороги по памяти, а ожидание ввода-вывода перекрывают потоки
+    workers = _int(
+        "GUNICORN_WORKERS", min(2 * CPU_COUNT + 1, _int("GUNICORN_MAX_WORKERS", 12))
+    )
+    threads = _int("GUNICORN_THREADS", 4)
+
+# Кэш ответов версионируется в общем кэше: в LocMem у каждого воркера свои версии,
+# и инвалидация из одного воркера не видна остальным. Буфер лайков без Redis живёт
+# в памяти процесса, и воркеры показывали бы разное состояние лайка. Без REDIS_URL
+# при нескольких воркерах выключаем и то и другое (до импорта settings, в том
+# числе при preload): лайки пишутся прямо в БД
+if workers > 1 and not os.getenv("REDIS_URL"):
+    for name, default, what in (
+        ("RESPONSE_CACHE_ENABLED", "True", "кэш ответов"),
+        ("LIKE_BUFFER_ENABLED", "False", "буфер лайков"),
+    ):
+        if os.getenv(name, default) == "True":
+            os.environ[name] = "False"
+            print(
+                f"gunicorn.conf.py: REDIS_URL не задан, {what} выключен "
+                f"для {workers} воркеров (LocMem не общий между процессами)",
+                file=sys.stderr,
+            )
+
+# Приложение импортируется один раз в мастере, воркеры получают его через fork:
+# общая память copy-on-write и быстрый рестарт воркеров
+preload_app = os.getenv("GUNICORN_PRELOAD", "True") == "True"
+
+# Плановый перезапуск воркеров против утечек памяти; jitter — чтобы они
+# не уходили на рестарт одновременно
+max_requests = _int("GUNICORN_MAX_REQUESTS", 2000)
+max_requests_jitter = _int("GUNICORN_MAX_REQUESTS_JITTER", 200)
+timeout = _int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _int("GUNICORN_KEEPALIVE", 5)
+
+# Heartbeat воркеров в tmpfs: на overlayfs в Docker запись в /tmp может тормозить
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None  # "-" — в stdout
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+forwarded_allow_ips = os.getenv("GUNICORN_FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def on_starting(server):
+    # Файлы метрик от прошлого запуска: их pid уже ничего не значат
+    directory = os.getenv("METRICS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            os.remove(path)
+
+
+def post_fork(server, worker):
+    # preload_app: соединения, открытые в мастере при импорте, воркерам не делим
+    from django.core.cache import caches
+    from django.db import connections
+
+    connections.close_all()
+    for connection in connections.all(initialized_only=True):
+        # Потоки пула, открытого в мастере, после fork не существуют
+        if getattr(connection, "pool", None) is not None:
+            connection.close_pool()
+    for cache in caches.all(initialized_only=True):
+        cache.close()
+
+
+def worker_exit(server, worker):
+    # Воркер уходит (max_requests, SIGTERM): буфер лайков в памяти процесса
+    # и несброшенные метрики иначе пропадут вместе с ним
+    from django.conf import settings
+    from django.db import connections
+
+    from apps.metrics.registry import registry
+    from apps.projects import likes
+
+    if settings.LIKE_BUFFER_ENABLED and isinstance(
+        likes.get_buffer(), likes.LocalLikeBuffer
+    ):
+        likes.flush_likes()
+    registry.flush(force=True)
+    # Соединения пула закрываются явно, а не обрывом при выходе процесса
+    connections.close_all()
+    for connection in connections.all(initialized_only=True):
+        if getattr(connection, "pool", None) is not None:
+            connection.close_pool()
+
+
+def child_exit(server, worker):
+    # Вызывается в мастере: данные мёртвого воркера уходят в общий архив метрик
+    from apps.metrics.registry import mark_process_dead
+
+    mark_process_dead(worker.pid, os.getenv("METRICS_MULTIPROC_DIR"))
@@ -24,6 +24,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Сторонние приложения
     "rest_framework",
     "rest_framework_simplejwt",
@@ -33,9 +34,13 @@ INSTALLED_APPS = [
     # Наши приложения (ИЗМЕНЕНЫ ЗДЕСЬ)
     "apps.users.apps.UsersConfig",  # Или просто 'apps.users' если UsersConfig - стандартное имя
     "apps.projects.apps.ProjectsConfig",  # Или просто 'apps.projects'
+    "apps.jobs.apps.JobsConfig",
+    "apps.metrics.apps.MetricsConfig",
 ]
 
 MIDDLEWARE = [
+    "apps.metrics.middleware.MetricsMiddleware",  # первым: меряет весь запрос
+    "apps.core.replicas.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -68,6 +73,22 @@ WSGI_APPLICATION = "portfolio_platform.wsgi.application"
 
 # Database (PostgreSQL)
 # Заполняется из переменных окружения (см. docker-compose.yml)
+# Соединения с PostgreSQL переиспользуются: либо пул psycopg 3 в каждом процессе
+# (DB_POOL, по умолчанию; нужен Django 5.1+), либо постоянные соединения на поток
+# (DB_POOL=False, DB_CONN_MAX_AGE секунд). Без этого каждый запрос платит за TCP-рукопожатие
+# и аутентификацию. Под ASGI постоянные соединения не переиспользуются (у каждого
+# запроса свой контекст) и копятся до "too many clients" — там только пул.
+DB_POOL = os.getenv("DB_POOL", "True") == "True"
+DB_CONN_MAX_AGE = (
+    0
+    if DB_POOL or os.getenv("SERVER_MODE") == "asgi"
+    else int(os.getenv("DB_CONN_MAX_AGE", "60"))
+)
+# За PgBouncer в режиме transaction: соединение сервера меняется между
+# транзакциями, поэтому именованные (server-side) курсоры .iterator() и
+# подготовленные запросы недопустимы
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "False") == "True"
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -76,8 +97,108 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        # С пулом соединение возвращается в пул в конце запроса, CONN_MAX_AGE — 0
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        # Проверка перед выдачей: соединение из пула или постоянное могло умереть
+        "CONN_HEALTH_CHECKS": True,
+        "DISABLE_SERVER_SIDE_CURSORS": DB_PGBOUNCER,
+        "OPTIONS": {},
     }
 }
+if DB_POOL:
+    # На процесс: workers × DB_POOL_MAX_SIZE должно укладываться в max_connections
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        # Сколько ждать свободное соединение, прежде чем запрос упадёт
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+        "name": "default",
+    }
+if os.getenv("DB_PREPARE_THRESHOLD") and not DB_PGBOUNCER:
+    # Django с psycopg 3 по умолчанию не готовит запросы (prepare_threshold=None);
+    # без PgBouncer повторяющиеся запросы можно готовить после N выполнений
+    DATABASES["default"]["OPTIONS"]["prepare_threshold"] = int(
+        os.getenv("DB_PREPARE_THRESHOLD")
+    )
+
+# Реплики для чтения (apps/core/replicas.py): DB_REPLICA_HOSTS — хосты через запятую
+# ("host" или "host:port"), остальное как у default. Алиасы replica_1, replica_2...
+# В тестах реплика — зеркало default (TEST MIRROR), отдельная БД не создаётся.
+DB_REPLICA_HOSTS = [
+    host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()
+]
+REPLICA_DATABASES = []
+for number, address in enumerate(DB_REPLICA_HOSTS, start=1):
+    alias = f"replica_{number}"
+    host, port = address, DATABASES["default"]["PORT"]
+    if not address.startswith("/") and ":" in address:
+        host, port = address.rsplit(":", 1)
+    options = {
+        **DATABASES["default"]["OPTIONS"],
+        # Недоступная реплика должна отваливаться быстро: дальше чтение с primary
+        "connect_timeout": int(os.getenv("REPLICA_CONNECT_TIMEOUT", "2")),
+    }
+    if "pool" in options:
+        options["pool"] = {
+            **options["pool"],
+            "name": alias,
+            "timeout": float(os.getenv("REPLICA_CONNECT_TIMEOUT", "2")),
+        }
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port,
+        "OPTIONS": options,
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(alias)
+# manage.py test и pytest: алиас "replica" для тестов роутера — второе соединение
+# с тестовой БД default (TEST MIRROR). Раннер проверяет databases тестов до их
+# запуска, поэтому алиас задаётся здесь. В REPLICA_DATABASES он не входит:
+# тесты включают его сами через override_settings
+TESTING = sys.argv[1:2] == ["test"] or "pytest" in sys.modules
+if TESTING:
+    DATABASES["replica"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    if "pool" in DATABASES["default"]["OPTIONS"]:
+        DATABASES["replica"]["OPTIONS"] = {
+            **DATABASES["default"]["OPTIONS"],
+            "pool": {**DATABASES["default"]["OPTIONS"]["pool"], "name": "replica"},
+        }
+DATABASE_ROUTERS = ["apps.core.replicas.ReplicaRouter"]
+# После записи клиент столько секунд читает с primary (cookie и заголовок)
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+REPLICA_PIN_COOKIE = "db_primary_until"
+REPLICA_PIN_HEADER = "X-DB-Primary-Until"
+# Реплика с большим отставанием или недоступная пропускается до следующей проверки
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", "5"))
+REPLICA_RETRY_INTERVAL = float(os.getenv("REPLICA_RETRY_INTERVAL", "30"))
+# Ответы, прочитанные с реплики, живут в кэше ответов не дольше этого
+REPLICA_RESPONSE_CACHE_TIMEOUT = int(os.getenv("REPLICA_RESPONSE_CACHE_TIMEOUT", "10"))
+
+# Cache: Redis в продакшене (REDIS_URL), иначе локальная память процесса (dev/тесты)
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "portfolio-platform",
+        }
+    }
+
+# Версионируемый кэш ответов ProjectViewSet (анонимные GET list/retrieve)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "True") == "True"
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300"))  # секунды
 
 AUTH_USER_MODEL = "users.CustomUser"
 
@@ -108,28 +229,110 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Django REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWTAuthentication, но пользователь берётся из кэша (apps/users/principals.py)
+        "apps.users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    # PageNumberPagination + опциональный keyset-режим по ?cursor=
+    "DEFAULT_PAGINATION_CLASS": "apps.core.pagination.KeysetPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     # 'DEFAULT_SCHEMA_CLASS': 'drf_yasg.openapi.AutoSchema', # Опционально
 }
 
+# Кэш пользователей для CachedJWTAuthentication: версия сдвигается при сохранении
+# пользователя (в т.ч. смене пароля и деактивации), TTL — страховка
+AUTH_USER_CACHE_ALIAS = "default"
+AUTH_USER_CACHE_TIMEOUT = 60  # секунды
+
 # Simple JWT
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    # Отзыв через apps.users.tokens (RevokedToken + кэш), а не token_blacklist
+    "TOKEN_REFRESH_SERIALIZER": "apps.users.serializers.TokenRefreshSerializer",
+    "TOKEN_BLACKLIST_SERIALIZER": "apps.users.serializers.TokenBlacklistSerializer",
+    "TOKEN_VERIFY_SERIALIZER": "apps.users.serializers.TokenVerifySerializer",
 }
 
 # Taggit
 TAGGIT_CASE_INSENSITIVE = True
 
+# Полнотекстовый поиск по проектам: конфигурация PostgreSQL text search.
+# "simple" не стеммит, зато одинаково ведёт себя на русском и английском.
+PROJECT_SEARCH_CONFIG = os.getenv("PROJECT_SEARCH_CONFIG", "simple")
+
+# Автодополнение /api/suggest/: in-process LRU для горячих префиксов
+SUGGEST_CACHE_SIZE = int(os.getenv("SUGGEST_CACHE_SIZE", "1024"))
+SUGGEST_CACHE_TTL = int(os.getenv("SUGGEST_CACHE_TTL", "30"))  # секунды
+SUGGEST_MIN_LENGTH = 2
+SUGGEST_MAX_LIMIT = 20
+
+# Фоновые задачи (apps.jobs): очередь в БД, воркеры — manage.py run_workers
+JOBS_EAGER = os.getenv("JOBS_EAGER", "False") == "True"  # выполнять сразу, без воркера
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BACKOFF = 10  # секунды до второй попытки, дальше удваивается
+JOBS_RETRY_BACKOFF_MAX = 3600
+JOBS_LOCK_TIMEOUT = 600  # через сколько секунд задача "running" считается брошенной
+
+# Производные изображений (main_image, ProjectMedia, аватары) — см. apps/core/images.py
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1280)
+IMAGE_DERIVATIVE_FORMATS = ("webp", "jpeg")
+IMAGE_DERIVATIVE_QUALITY = 80
+IMAGE_LIST_WIDTH = 640  # какую копию main_image отдавать в списках проектов
+
+# Возобновляемые загрузки частями (POST /api/projects/<slug>/uploads/)
+# Общий для всех воркеров каталог; по умолчанию <системный tmp>/portfolio-uploads
+UPLOAD_TEMP_DIR = os.getenv("UPLOAD_TEMP_DIR")
+UPLOAD_MAX_SIZE = 2 * 1024**3  # 2 ГБ на файл
+UPLOAD_CHUNK_MAX_SIZE = 16 * 1024**2  # 16 МБ на один PUT
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # незавершённые сессии живут сутки
+# Срок жизни presigned PUT для загрузки прямо в S3/MinIO (POST .../upload-intents/)
+DIRECT_UPLOAD_EXPIRES = 3600
+
+# Буферизованные лайки: переключения копятся в Redis (если кэш на Redis) или в памяти
+# процесса и пачками применяются flush_likes (таймером или manage.py flush_likes).
+# gunicorn.conf.py выключает его при нескольких воркерах без REDIS_URL
+LIKE_BUFFER_ENABLED = os.getenv("LIKE_BUFFER_ENABLED", "False") == "True"
+LIKE_BUFFER_ALIAS = "default"
+LIKE_FLUSH_INTERVAL = 5  # секунды; только для буфера в памяти процесса
+LIKE_FLUSH_BATCH_SIZE = 500
+
+# Импорт пачкой (POST /api/projects/batch/): максимум проектов в одном запросе
+PROJECT_BATCH_MAX_SIZE = 500
+
+# Ветки комментариев: максимальная глубина (путь хранится в CharField(255),
+# по 11 символов на уровень)
+COMMENT_MAX_DEPTH = 10
+
+# Метрики запросов (apps.metrics), выдача на /metrics в формате Prometheus.
+# Под gunicorn с несколькими воркерами нужен общий каталог METRICS_MULTIPROC_DIR:
+# каждый воркер сбрасывает туда свои значения не чаще METRICS_FLUSH_INTERVAL секунд
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = 5
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # если задан — Authorization: Bearer <token>
+# Без токена /metrics вне DEBUG отдаётся только с этих адресов (REMOTE_ADDR;
+# за прокси это адрес прокси — тогда лучше METRICS_TOKEN)
+METRICS_ALLOWED_IPS = [
+    ip.strip()
+    for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if ip.strip()
+]
+# Запросы дольше порога пишутся в лог apps.metrics.middleware; 0 — не писать
+METRICS_SLOW_REQUEST_SECONDS = float(os.getenv("METRICS_SLOW_REQUEST_SECONDS", "1"))
+
+# Асинхронные GET списков/деталей проектов, технологий и комментариев
+# (apps/core/asyncviews.py). Имеет смысл только под ASGI: под WSGI каждый такой
+# запрос обернулся бы в async_to_sync. По умолчанию включено при SERVER_MODE=asgi
+ASYNC_READ_VIEWS = (
+    os.getenv("ASYNC_READ_VIEWS", str(os.getenv("SERVER_MODE") == "asgi")) == "True"
+)
+
 
 # Django Storages (для S3-совместимого хранилища)
 # Эти настройки будут использоваться если DEFAULT_FILE_STORAGE будет изменен на S3
@@ -8,6 +8,8 @@ from drf_yasg.views import get_schema_view  # Раскомментировали
 from drf_yasg import openapi  # Раскомментировали
 from rest_framework import permissions  # Раскомментировали
 
+from apps.metrics.views import metrics_view
+
 schema_view = get_schema_view(  # Раскомментировали
     openapi.Info(
         title="Portfolio Platform API",
@@ -26,6 +28,7 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("apps.users.urls")),
     path("api/", include("apps.projects.urls")),
+    path("metrics", metrics_view, name="metrics"),
     # Добавляем URL'ы для Swagger и ReDoc
     path(
         "api/docs/",